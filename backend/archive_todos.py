@@ -0,0 +1,47 @@
+"""
+Archive job for the todos table.
+
+Purges todos deleted more than TODO_PURGE_DELETED_AFTER_DAYS ago and moves
+completed todos untouched for TODO_ARCHIVE_COMPLETED_AFTER_DAYS to
+``todos_archive`` (see crud/archive.py), in batches of
+TODO_ARCHIVE_BATCH_SIZE rows, printing the counts as JSON. Archived todos
+are published as ``deleted`` change events, so API workers drop their
+cached responses and clients their rows; this needs the PostgreSQL change
+feed broker (see routes/changes.py), an in-process one reaches no worker.
+Run it from cron, or keep it running with ``--interval``.
+
+Usage (from the backend directory):
+    python archive_todos.py                  # once
+    python archive_todos.py --interval 600   # every 10 minutes
+"""
+
+import argparse
+import json
+import time
+from config.database import SessionLocal
+from crud import archive
+from routes import changes
+
+def archive_once(max_batches=None) -> dict:
+    with SessionLocal() as db:
+        return archive.run(db, max_batches=max_batches, on_archived=changes.publish_deleted)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, help="repeat every this many seconds")
+    parser.add_argument("--max-batches", type=int, help="stop each run after this many batches per kind")
+    args = parser.parse_args()
+
+    changes.broker.start_sender()
+    try:
+        while True:
+            print(json.dumps(archive_once(args.max_batches)), flush=True)
+            if not args.interval:
+                return
+            time.sleep(args.interval)
+    finally:
+        # Sends the events still queued before exiting
+        changes.broker.stop_sender()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Latency of GET /todos per 1k rows: ORM + response_model versus the fast path.
+
+"before" is the original handler shape: load ORM entities and let FastAPI
+validate every row through ``response_model=List[Todo]`` and encode it.
+"after" is the current router, which loads column tuples and dumps them
+through a pre-built TypeAdapter into a raw response.
+
+Usage (from the backend directory):
+    python -m benchmarks.list_serialization --rows 1000 --iterations 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from benchmarks.async_vs_sync import seed
+import config.database
+from config.database import get_db
+from models.schemas import Todo
+from models.todo import Todo as TodoModel
+from routes.todo import router as todo_router
+
+def build_apps(url: str):
+    # Point get_db at the benchmark database; dependency_overrides would be
+    # re-analysed on every request and distort the numbers
+    config.database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(url))
+
+    before = FastAPI()
+
+    @before.get("/todos/", response_model=List[Todo])
+    def get_todos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+        return db.query(TodoModel).order_by(TodoModel.id).offset(skip).limit(limit).all()
+
+    after = FastAPI()
+    after.include_router(todo_router)
+    return {"before": before, "after": after}
+
+async def measure(app: FastAPI, rows: int, iterations: int) -> List[float]:
+    """Return per-request latencies in milliseconds"""
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up connections and caches
+        (await client.get("/todos/", params={"limit": rows})).raise_for_status()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = await client.get("/todos/", params={"limit": rows})
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert len(response.json()) == rows
+    return latencies
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="sync SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed(url, args.rows)
+
+    for name, app in build_apps(url).items():
+        latencies = asyncio.run(measure(app, args.rows, args.iterations))
+        per_1k = statistics.median(latencies) * 1000 / args.rows
+        print(f"{name:>6}: median {statistics.median(latencies):7.2f} ms  ({per_1k:6.2f} ms per 1k rows)")
+
+if __name__ == "__main__":
+    main()
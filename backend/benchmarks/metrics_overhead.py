@@ -0,0 +1,88 @@
+"""
+Overhead of request and query metrics on the hot path.
+
+The same sync router is served twice: "bare" without instrumentation and
+"metrics" with MetricsMiddleware plus engine query timing, as main.py runs
+it by default. Requests alternate between the two apps so drift in the
+machine affects both equally.
+
+Usage (from the backend directory):
+    python -m benchmarks.metrics_overhead --iterations 2000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from benchmarks.async_vs_sync import seed
+import config.database
+from config.queries import instrument_engine, uninstrument_engine
+from routes.metrics import MetricsMiddleware
+from routes.todo import router as todo_router
+
+PATHS = {"item": "/todos/{id}", "list": "/todos/?limit=100"}
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    app.include_router(todo_router)
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+async def measure(apps: Dict[str, FastAPI], engine, path: str, iterations: int) -> Dict[str, List[float]]:
+    """Per-request latencies in microseconds, per app"""
+    clients = {
+        name: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        for name, app in apps.items()
+    }
+    latencies: Dict[str, List[float]] = {name: [] for name in apps}
+    first_id = (await clients["bare"].get("/todos/", params={"limit": 1})).json()[0]["id"]
+    url = path.format(id=first_id)
+    for i in range(iterations + 50):
+        for name, client in clients.items():
+            # Query timing is an engine listener: attach it only for the metrics app
+            if name == "metrics":
+                instrument_engine(engine)
+            start = time.perf_counter()
+            response = await client.get(url)
+            elapsed = time.perf_counter() - start
+            if name == "metrics":
+                uninstrument_engine(engine)
+            response.raise_for_status()
+            if i >= 50:  # warm-up
+                latencies[name].append(elapsed * 1e6)
+    for client in clients.values():
+        await client.aclose()
+    return latencies
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="sync SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed(url, 100)
+    engine = create_engine(url)
+    config.database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    apps = {"bare": build_app(False), "metrics": build_app(True)}
+
+    for label, path in PATHS.items():
+        latencies = asyncio.run(measure(apps, engine, path, args.iterations))
+        bare, instrumented = (statistics.median(latencies[name]) for name in ("bare", "metrics"))
+        overhead = instrumented - bare
+        print(
+            f"{label:>5}: bare {bare:8.1f} us  metrics {instrumented:8.1f} us  "
+            f"overhead {overhead:+6.1f} us ({overhead / bare:+.1%})"
+        )
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
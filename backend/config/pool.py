@@ -0,0 +1,104 @@
+"""
+Connection pool instrumentation.
+
+The pool classes below behave exactly like SQLAlchemy's ``QueuePool`` but
+record how long each checkout waited for a free connection, so pool sizing
+can be checked against real traffic on the ``/health/pool`` endpoint.
+They also track the checkouts waiting right now, so load shedding can see
+a saturated pool as it happens (``longest_wait``).
+"""
+
+from bisect import bisect_left
+from itertools import count
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+class WaitHistogram:
+    """Thread-safe cumulative histogram of pool checkout wait times"""
+
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._timeouts = 0
+        self._lock = Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, seconds)] += 1
+            self._sum += seconds
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self) -> dict:
+        """Cumulative bucket counts keyed by upper bound, Prometheus style"""
+        with self._lock:
+            counts, total, timeouts = list(self._counts), self._sum, self._timeouts
+        cumulative, running = {}, 0
+        for bound, observed in zip(self.buckets + (float("inf"),), counts):
+            running += observed
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"count": running, "sum": total, "timeouts": timeouts, "buckets": cumulative}
+
+class _TimedCheckoutMixin:
+    """Time ``_do_get``, the call that blocks while the pool is exhausted"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = WaitHistogram()
+        # Start times of the checkouts waiting right now
+        self._waiting: Dict[int, float] = {}
+        self._waiting_lock = Lock()
+        self._waiter_ids = count()
+
+    def _do_get(self):
+        start = perf_counter()
+        waiter = next(self._waiter_ids)
+        with self._waiting_lock:
+            self._waiting[waiter] = start
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.wait_histogram.record_timeout()
+            raise
+        finally:
+            with self._waiting_lock:
+                del self._waiting[waiter]
+            self.wait_histogram.observe(perf_counter() - start)
+
+    def longest_wait(self) -> float:
+        """Seconds the oldest checkout in progress has been waiting (0 if none)"""
+        with self._waiting_lock:
+            oldest = min(self._waiting.values(), default=None)
+        return 0.0 if oldest is None else perf_counter() - oldest
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool that records checkout wait times"""
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times"""
+
+def pool_status(pool: Pool) -> dict:
+    """Live statistics of an engine's pool, as far as its class supports them"""
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    histogram = getattr(pool, "wait_histogram", None)
+    if histogram is not None:
+        status["wait_time"] = histogram.snapshot()
+    return status
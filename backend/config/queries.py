@@ -0,0 +1,85 @@
+"""
+SQL statement instrumentation.
+
+``instrument_engine`` hooks an engine's cursor events to time every
+statement into the ``db_query_duration_seconds`` histogram and to count
+slow ones. Inside ``track_queries`` (one per HTTP request, opened by the
+metrics middleware) statements are also tallied per request, so the
+middleware can record queries per request and flag N+1 patterns: the same
+statement run ``N_PLUS_ONE_THRESHOLD`` times or more in one request.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this (seconds) are counted and logged
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.5"))
+# Executions of one statement per request that count as an N+1 pattern
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+QUERY_DURATION = registry.histogram("db_query_duration_seconds", "SQL statement execution time")
+SLOW_QUERIES = registry.counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_SECONDS")
+
+@dataclass
+class QueryStats:
+    """Statements executed within one ``track_queries`` block"""
+    count: int = 0
+    duration: float = 0.0
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statements executed at least ``threshold`` times"""
+        return [(statement, count) for statement, count in self.statements.items() if count >= threshold]
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements run in this context (threadpool and run_sync included)"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info["query_start"].pop()
+    QUERY_DURATION.observe(elapsed)
+    if elapsed >= SLOW_QUERY_SECONDS:
+        SLOW_QUERIES.inc()
+        logger.warning("Slow query (%.3fs): %s", elapsed, statement)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+def _handle_error(context):
+    # The failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement of a sync engine (or an AsyncEngine's sync_engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def uninstrument_engine(engine: Engine) -> None:
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+    event.remove(engine, "handle_error", _handle_error)
@@ -0,0 +1,80 @@
+"""
+Read replica selection and read-your-writes pinning.
+
+``ReplicaSet`` picks the engine a read-only request uses, either in turn
+(``round_robin``) or the one with the fewest checked-out connections
+(``least_connections``, ties broken in turn). Writes always use the
+primary.
+
+Replicas lag behind the primary, so a client that just wrote could read
+its old data back. After a successful write the API sets the
+``PRIMARY_COOKIE`` cookie holding the time until which that client's reads
+stay on the primary (``DB_READ_YOUR_WRITES_SECONDS``). Clients can also ask
+for a primary read with ``X-Consistency: strong``.
+"""
+
+from itertools import count
+from threading import Lock
+from time import time
+from typing import Generic, List, Mapping, Optional, TypeVar
+import os
+from sqlalchemy.pool import QueuePool
+
+# Replica balancing: round_robin or least_connections
+DB_REPLICA_BALANCE = os.getenv("DB_REPLICA_BALANCE", "round_robin")
+# Seconds a client's reads stay on the primary after it wrote (0 disables)
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+PRIMARY_COOKIE = "todo_read_primary_until"
+CONSISTENCY_HEADER = "x-consistency"
+
+BALANCE_STRATEGIES = ("round_robin", "least_connections")
+
+Engine = TypeVar("Engine")
+
+def replica_urls(value: str) -> List[str]:
+    """Parse a comma-separated list of database URLs"""
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+def checked_out(engine) -> int:
+    pool = engine.pool
+    return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+class ReplicaSet(Generic[Engine]):
+    """Thread-safe choice among replica engines (sync or async)"""
+
+    def __init__(self, engines: List[Engine], strategy: str = DB_REPLICA_BALANCE):
+        if strategy not in BALANCE_STRATEGIES:
+            raise ValueError(f"Unknown replica balancing strategy: {strategy}")
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._turn = count()
+        self._lock = Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Optional[Engine]:
+        """The replica to read from, or None when there are none"""
+        if not self.engines:
+            return None
+        with self._lock:
+            turn = next(self._turn)
+        size = len(self.engines)
+        if self.strategy == "round_robin":
+            return self.engines[turn % size]
+        rotated = [self.engines[(turn + offset) % size] for offset in range(size)]
+        return min(rotated, key=checked_out)
+
+def pin_until(now: Optional[float] = None) -> float:
+    """Cookie value pinning a client to the primary after a write"""
+    return (now or time()) + DB_READ_YOUR_WRITES_SECONDS
+
+def pinned_to_primary(cookies: Mapping[str, str], headers: Mapping[str, str]) -> bool:
+    """Whether a read must see the primary (recent write or explicit request)"""
+    if headers.get(CONSISTENCY_HEADER, "").lower() == "strong":
+        return True
+    try:
+        return float(cookies.get(PRIMARY_COOKIE, "0")) > time()
+    except ValueError:
+        return False
@@ -0,0 +1,106 @@
+"""
+Purging and archiving of finished todos.
+
+Deleting a todo only sets ``deleted_at`` (see ``crud.todo``), and completed
+todos stay in ``todos`` until someone deletes them, so left alone the table
+and its indexes keep growing while list queries only want the live working
+set. The archive job (``archive_todos.py``) shrinks it in bounded batches:
+
+- todos deleted more than ``TODO_PURGE_DELETED_AFTER_DAYS`` ago are removed
+- completed todos not updated for ``TODO_ARCHIVE_COMPLETED_AFTER_DAYS`` are
+  moved to ``todos_archive`` and leave the API
+
+Every batch is one short transaction that locks at most
+``TODO_ARCHIVE_BATCH_SIZE`` rows, skipping rows other transactions hold on
+PostgreSQL, so the job never stalls the API. Deleted todos left the stats
+counters when they were deleted; archived ones leave them (through the
+``crud.stats`` triggers) in the batch that moves them. ``on_archived`` receives the ids of every archived batch
+once committed; ``archive_todos.py`` publishes them as ``deleted`` change
+events, which the API workers apply to their caches and pass on to clients.
+Purged todos need no announcement: they left the API when they were deleted.
+"""
+
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Callable, List, Optional, Sequence
+import os
+from sqlalchemy import and_, delete, insert, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from crud.todo import live, todos_table
+from models.todo import TodoArchive
+
+# Days a deleted todo is kept before it is purged (0 keeps them forever)
+TODO_PURGE_DELETED_AFTER_DAYS = float(os.getenv("TODO_PURGE_DELETED_AFTER_DAYS", "7"))
+# Days after its last update a completed todo is archived (0 never archives)
+TODO_ARCHIVE_COMPLETED_AFTER_DAYS = float(os.getenv("TODO_ARCHIVE_COMPLETED_AFTER_DAYS", "90"))
+# Rows removed per transaction
+TODO_ARCHIVE_BATCH_SIZE = int(os.getenv("TODO_ARCHIVE_BATCH_SIZE", "1000"))
+
+archive_table = TodoArchive.__table__
+
+# Columns copied from todos to todos_archive
+_ARCHIVED_COLUMNS = [todos_table.c[column.key] for column in archive_table.c if column.key in todos_table.c]
+
+def _due_ids(db: Session, condition, batch_size: int) -> List[int]:
+    """Lock and return up to ``batch_size`` ids of todos matching ``condition``"""
+    query = select(todos_table.c.id).where(condition).order_by(todos_table.c.id).limit(batch_size)
+    return list(db.execute(query.with_for_update(skip_locked=True)).scalars())
+
+def purge_deleted(db: Session, deleted_before: datetime, batch_size: int = TODO_ARCHIVE_BATCH_SIZE) -> int:
+    """Remove one batch of todos deleted before the cutoff, then commit; returns the count"""
+    condition = todos_table.c.deleted_at < deleted_before
+    ids = _due_ids(db, condition, batch_size)
+    purged = db.execute(delete(todos_table).where(todos_table.c.id.in_(ids), condition)).rowcount if ids else 0
+    db.commit()
+    return purged
+
+def archive_completed(
+    db: Session,
+    completed_before: datetime,
+    batch_size: int = TODO_ARCHIVE_BATCH_SIZE,
+    on_archived: Optional[Callable[[List[int]], None]] = None,
+) -> int:
+    """Move one batch of todos completed and untouched since the cutoff to the archive, then commit"""
+    condition = and_(live, todos_table.c.completed.is_(True), todos_table.c.updated_at < completed_before)
+    ids = _due_ids(db, condition, batch_size)
+    rows: Sequence[Row] = []
+    if ids:
+        # The condition is checked again: a row may have changed since it was picked (SQLite has no row locks)
+        rows = db.execute(delete(todos_table).where(todos_table.c.id.in_(ids), condition).returning(*_ARCHIVED_COLUMNS)).all()
+    if rows:
+        db.execute(insert(archive_table), [row._asdict() for row in rows])
+    db.commit()
+    if rows and on_archived is not None:
+        on_archived([row.id for row in rows])
+    return len(rows)
+
+def run(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = TODO_ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    on_archived: Optional[Callable[[List[int]], None]] = None,
+) -> dict:
+    """Purge and archive everything due, batch after batch; returns the counts.
+
+    ``max_batches`` bounds the work of one run (per kind), leaving the rest
+    for the next run. ``on_archived`` is passed on to ``archive_completed``.
+    """
+    now = now or datetime.now(timezone.utc)
+    jobs = []
+    if TODO_PURGE_DELETED_AFTER_DAYS > 0:
+        jobs.append(("purged", purge_deleted, now - timedelta(days=TODO_PURGE_DELETED_AFTER_DAYS)))
+    if TODO_ARCHIVE_COMPLETED_AFTER_DAYS > 0:
+        jobs.append(("archived", partial(archive_completed, on_archived=on_archived), now - timedelta(days=TODO_ARCHIVE_COMPLETED_AFTER_DAYS)))
+
+    counts = {"purged": 0, "archived": 0}
+    for name, step, cutoff in jobs:
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            done = step(db, cutoff, batch_size)
+            counts[name] += done
+            batches += 1
+            if done < batch_size:
+                break
+    return counts
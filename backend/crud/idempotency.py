@@ -0,0 +1,58 @@
+"""
+Stored responses of writes sent with an ``Idempotency-Key``.
+
+A key is claimed with a single INSERT before its request runs. Until
+``complete`` fills in the response, the row tells every worker that the
+first request is still in flight. A claim only lasts ``lease`` seconds, so
+the key of a worker that died mid-request can be claimed again. The same
+INSERT takes over rows whose ``expires_at`` has passed. As in
+``crud.stats``, the statements are plain SQL that SQLite and PostgreSQL
+spell the same way and SQLAlchemy compiles once.
+"""
+
+from typing import Any, Optional
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.orm import Session
+from models.todo import IdempotencyKey
+
+keys_table = IdempotencyKey.__table__
+
+CLAIM = text(
+    "INSERT INTO idempotency_keys (idempotency_key, expires_at) VALUES (:key, :expires_at) "
+    "ON CONFLICT (idempotency_key) DO UPDATE SET status_code = NULL, fingerprint = NULL, "
+    "headers = NULL, body = NULL, expires_at = excluded.expires_at "
+    "WHERE idempotency_keys.expires_at < :now RETURNING idempotency_key"
+)
+
+def claim(db: Session, key: str, now: float, lease: float) -> bool:
+    """Claim a key for a new request; False if it is taken and not expired"""
+    claimed = db.execute(CLAIM, {"key": key, "expires_at": now + lease, "now": now}).first() is not None
+    db.commit()
+    return claimed
+
+def get(db: Session, key: str) -> Optional[Any]:
+    """The key's row (``status_code`` is None while in flight), or None"""
+    return db.execute(select(keys_table).where(keys_table.c.idempotency_key == key)).first()
+
+def complete(
+    db: Session, key: str, status_code: int, fingerprint: str, headers: str, body: bytes, expires_at: float
+) -> None:
+    """Store the response of a claimed key"""
+    db.execute(
+        update(keys_table)
+        .where(keys_table.c.idempotency_key == key)
+        .values(status_code=status_code, fingerprint=fingerprint, headers=headers, body=body, expires_at=expires_at)
+    )
+    db.commit()
+
+def release(db: Session, key: str) -> None:
+    """Drop an unfinished claim so a retry runs the request again"""
+    db.execute(delete(keys_table).where(keys_table.c.idempotency_key == key, keys_table.c.status_code.is_(None)))
+    db.commit()
+
+def purge_expired(db: Session, now: float, limit: int = 1000) -> int:
+    """Delete up to ``limit`` expired keys; returns how many were deleted"""
+    expired = select(keys_table.c.idempotency_key).where(keys_table.c.expires_at < now).limit(limit)
+    deleted = db.execute(delete(keys_table).where(keys_table.c.idempotency_key.in_(expired.scalar_subquery()))).rowcount
+    db.commit()
+    return deleted
@@ -0,0 +1,104 @@
+"""
+Incrementally maintained todo statistics.
+
+Triggers on ``todos`` (see ``models.todo``) add every write's count changes to the counters, in
+the statement that makes the write, so the counters move in the same
+transaction as the rows they describe, writes cost no extra round trip and
+the counters never need a ``COUNT(*)`` over ``todos`` to be read. Each
+counter is spread over ``STATS_SHARDS`` rows and a write adds to one of them
+at random, so concurrent writers rarely queue on the same row lock; reads
+sum a fixed number of rows whatever the table size.
+
+``reconcile`` recounts ``todos`` to repair drift (counters added to an
+existing database, triggers dropped for a bulk load). Totals count live
+todos only: soft-deleted and archived ones left the counters when they went.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.orm import Session
+from models.todo import Todo as TodoModel, TodoCounter, TodoDailyCount
+
+TOTAL = "total"
+COMPLETED = "completed"
+
+counters_table = TodoCounter.__table__
+daily_table = TodoDailyCount.__table__
+todos_table = TodoModel.__table__
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def _upsert(table, key: str, column: str):
+    """INSERT adding ``column`` to the existing row of the same key and shard.
+
+    Plain SQL, which SQLite and PostgreSQL spell the same way and which
+    SQLAlchemy caches compiled (its on_conflict constructs are recompiled
+    on every execution).
+    """
+    return text(
+        f"INSERT INTO {table.name} ({key}, shard, {column}) VALUES (:{key}, :shard, :{column}) "
+        f"ON CONFLICT ({key}, shard) DO UPDATE SET {column} = {table.name}.{column} + excluded.{column}"
+    ).bindparams(bindparam(key, type_=table.c[key].type))
+
+ADD_DAILY = _upsert(daily_table, "day", "created")
+
+def get_stats(db: Session, days: int) -> dict:
+    """Totals plus todos created per day over the last ``days`` days (UTC)"""
+    totals = dict(db.execute(select(counters_table.c.name, func.sum(counters_table.c.value)).group_by(counters_table.c.name)).tuples().all())
+    since = today() - timedelta(days=days - 1)
+    created = dict(db.execute(
+        select(daily_table.c.day, func.sum(daily_table.c.created))
+        .where(daily_table.c.day >= since)
+        .group_by(daily_table.c.day)
+    ).tuples().all())
+    per_day: List[Dict[str, Any]] = [{"day": day, "created": int(created.get(day, 0))} for day in (since + timedelta(days=n) for n in range(days))]
+
+    total, completed = int(totals.get(TOTAL, 0)), int(totals.get(COMPLETED, 0))
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "created_per_day": per_day,
+        "average_created_per_day": sum(row["created"] for row in per_day) / days,
+    }
+
+def reconcile(db: Session) -> dict:
+    """Recount ``todos`` and correct the counters, then commit.
+
+    Totals are rewritten from the live rows. Per-day creation counts also
+    include todos deleted or archived since, so they are only raised to the
+    number of todos still in the table created that day (backfilling days
+    never counted).
+    Returns the corrections applied.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Writers queue on their counter update until the recount commits, so
+        # each change is either in the recount or applied after it, never both
+        db.execute(text(f"LOCK TABLE {counters_table.name}, {daily_table.name} IN EXCLUSIVE MODE"))
+
+    counted = dict(db.execute(select(counters_table.c.name, func.sum(counters_table.c.value)).group_by(counters_table.c.name)).tuples().all())
+    total, completed = db.execute(
+        select(func.count(), func.count().filter(todos_table.c.completed.is_(True))).where(todos_table.c.deleted_at.is_(None))
+    ).one()
+    corrections = {
+        TOTAL: total - int(counted.get(TOTAL, 0)),
+        COMPLETED: completed - int(counted.get(COMPLETED, 0)),
+    }
+    db.execute(counters_table.delete())
+    db.execute(counters_table.insert(), [{"name": TOTAL, "shard": 0, "value": total}, {"name": COMPLETED, "shard": 0, "value": completed}])
+
+    created_day = func.date(todos_table.c.created_at, type_=TodoDailyCount.day.type)
+    surviving = db.execute(select(created_day, func.count()).group_by(created_day)).all()
+    recorded = dict(db.execute(select(daily_table.c.day, func.sum(daily_table.c.created)).group_by(daily_table.c.day)).tuples().all())
+    backfill = [
+        {"day": day, "shard": 0, "created": count - int(recorded.get(day, 0))}
+        for day, count in surviving
+        if day is not None and count > int(recorded.get(day, 0))
+    ]
+    if backfill:
+        db.execute(ADD_DAILY, backfill)
+    db.commit()
+    corrections["days_backfilled"] = len(backfill)
+    return corrections
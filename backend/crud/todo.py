@@ -0,0 +1,295 @@
+"""
+Database operations for todos.
+
+Every function takes a plain ``Session`` so the same code serves both the
+sync routes and the async routes (through ``AsyncSession.run_sync``).
+Writes need not touch the statistics: the ``crud.stats`` triggers count them.
+
+Deletes are soft: they set ``deleted_at`` and every query here only sees
+rows where it is null, which the partial indexes of ``models.todo`` cover.
+``crud.archive`` later removes the deleted rows in batches.
+"""
+
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+import io
+from operator import itemgetter
+from sqlalchemy import bindparam, func, insert, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+from sqlalchemy.util import await_only
+from models.todo import Todo as TodoModel, search_document
+
+# Core table, used where plain rows are enough and identity-map bookkeeping is not
+todos_table = TodoModel.__table__
+
+# Rows that have not been deleted; the only ones the API reads or writes
+live = todos_table.c.deleted_at.is_(None)
+
+@dataclass
+class TodoPage:
+    """One page of todos plus whether neighbouring pages exist"""
+    items: Sequence[Row]
+    has_next: bool
+    has_prev: bool
+    # Cursor ids bounding the page, set even when it came back empty
+    next_after: Optional[int] = None
+    prev_before: Optional[int] = None
+
+# Columns todos can be sorted by
+SORT_COLUMNS: Dict[str, ColumnElement] = {
+    "id": TodoModel.id,
+    "created_at": TodoModel.created_at,
+    "updated_at": TodoModel.updated_at,
+    "title": TodoModel.title,
+}
+
+@dataclass
+class TodoFilter:
+    """Filtering, search and ordering of a todo listing"""
+    completed: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    search: Optional[str] = None
+    sort: str = "id"
+    order: str = "asc"
+
+    def is_default(self) -> bool:
+        """True for the plain id-ordered, unfiltered listing"""
+        return self == TodoFilter()
+
+def apply_filter(query: Select, todo_filter: TodoFilter, dialect: str) -> Select:
+    """Narrow a todo query to live rows and the filter's conditions (ordering is not applied)"""
+    query = query.filter(live)
+    if todo_filter.completed is not None:
+        query = query.filter(TodoModel.completed == todo_filter.completed)
+    if todo_filter.created_after is not None:
+        query = query.filter(TodoModel.created_at >= todo_filter.created_after)
+    if todo_filter.created_before is not None:
+        query = query.filter(TodoModel.created_at < todo_filter.created_before)
+    if todo_filter.updated_after is not None:
+        query = query.filter(TodoModel.updated_at >= todo_filter.updated_after)
+    if todo_filter.updated_before is not None:
+        query = query.filter(TodoModel.updated_at < todo_filter.updated_before)
+    if todo_filter.search:
+        if dialect == "postgresql":
+            # Matches the ix_todos_search GIN index
+            query = query.filter(search_document().match(todo_filter.search, postgresql_regconfig="simple"))
+        else:
+            pattern = f"%{todo_filter.search}%"
+            query = query.filter(or_(TodoModel.title.ilike(pattern), TodoModel.description.ilike(pattern)))
+    return query
+
+def _ordering(todo_filter: TodoFilter, reverse: bool = False) -> list:
+    """ORDER BY clauses for the filter, with id as the tie-breaker"""
+    descending = (todo_filter.order == "desc") != reverse
+    columns = [SORT_COLUMNS[todo_filter.sort]]
+    if todo_filter.sort != "id":
+        columns.append(TodoModel.id)
+    return [column.desc() if descending else column.asc() for column in columns]
+
+def projection(fields: Optional[Sequence[str]] = None) -> list:
+    """Columns to SELECT for a sparse fieldset (all by default; id is always loaded)"""
+    if fields is None:
+        return list(todos_table.c)
+    return [column for column in todos_table.c if column.key == "id" or column.key in fields]
+
+def list_todos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    todo_filter: Optional[TodoFilter] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> TodoPage:
+    """List todos using offset or keyset pagination.
+
+    Returns plain column rows rather than ORM entities, which keeps large
+    pages cheap to load and serialize. Keyset cursors (``after_id`` /
+    ``before_id``) require ordering by id, in either direction. ``fields``
+    limits the columns loaded (see ``projection``).
+    """
+    todo_filter = todo_filter or TodoFilter()
+    descending = todo_filter.order == "desc"
+    query = apply_filter(select(*projection(fields)), todo_filter, db.get_bind().dialect.name)
+
+    if before_id is not None:
+        # Walk backwards from the cursor, then restore the requested order
+        query = query.filter(TodoModel.id > before_id if descending else TodoModel.id < before_id)
+        todos = db.execute(query.order_by(*_ordering(todo_filter, reverse=True)).limit(limit + 1)).all()
+        has_prev = len(todos) > limit
+        todos = list(reversed(todos[:limit]))
+        # The client came from the page starting at before_id, so it can always go back
+        # there; an empty page points just past the cursor, as ``after`` is exclusive
+        next_after = todos[-1].id if todos else (before_id + 1 if descending else before_id - 1)
+        prev_before: Optional[int] = todos[0].id if todos else None
+        return TodoPage(
+            items=todos, has_next=True, has_prev=has_prev, next_after=next_after, prev_before=prev_before
+        )
+
+    query = query.order_by(*_ordering(todo_filter))
+    if after_id is not None:
+        query = query.filter(TodoModel.id < after_id if descending else TodoModel.id > after_id)
+    else:
+        query = query.offset(skip)
+    # Fetching one extra row tells us whether another page exists
+    todos = db.execute(query.limit(limit + 1)).all()
+    has_next = len(todos) > limit
+    todos = todos[:limit]
+    has_prev = after_id is not None or skip > 0
+    next_after = todos[-1].id if todos else None
+    if todos:
+        prev_before = todos[0].id
+    elif after_id is not None:
+        # An empty page past the cursor still leads back to the page ending at after_id
+        prev_before = after_id - 1 if descending else after_id + 1
+    else:
+        prev_before = None
+    return TodoPage(
+        items=todos, has_next=has_next, has_prev=has_prev, next_after=next_after, prev_before=prev_before
+    )
+
+def export_statement(todo_filter: TodoFilter, dialect: str) -> Select:
+    """SELECT of every todo matching the filter, in id order, for streaming"""
+    return apply_filter(select(todos_table), todo_filter, dialect).order_by(TodoModel.id)
+
+def get_todo(db: Session, todo_id: int) -> Optional[TodoModel]:
+    """Get a todo by id, or None if it does not exist"""
+    return db.query(TodoModel).filter(TodoModel.id == todo_id, live).first()
+
+def get_todo_fields(db: Session, todo_id: int, fields: Sequence[str]) -> Optional[Row]:
+    """Get only some columns of a todo (plus id), or None if it does not exist"""
+    return db.execute(select(*projection(fields)).where(todos_table.c.id == todo_id, live)).first()
+
+def find_todo(db: Session, todo_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Any]:
+    """``get_todo``, or ``get_todo_fields`` when ``fields`` is given"""
+    return get_todo(db, todo_id) if fields is None else get_todo_fields(db, todo_id, fields)
+
+def lock_todo(db: Session, todo_id: int) -> Optional[TodoModel]:
+    """Get a todo with a row lock (SELECT ... FOR UPDATE) held until the next commit"""
+    return db.query(TodoModel).filter(TodoModel.id == todo_id, live).with_for_update().first()
+
+def create_todo(db: Session, data: dict) -> Row:
+    """Insert a new todo with a single INSERT ... RETURNING"""
+    statement = insert(todos_table).values(**data).returning(*todos_table.c)
+    row = db.execute(statement).one()
+    db.commit()
+    return row
+
+def update_todo(db: Session, todo_id: int, data: dict) -> Optional[Row]:
+    """Update the given fields of a todo with a single UPDATE ... RETURNING.
+
+    Returns None if the todo does not exist.
+    """
+    if not data:
+        # Nothing to write, just read the current state
+        return get_todo(db, todo_id)
+
+    statement = update(todos_table).where(todos_table.c.id == todo_id, live).values(**data).returning(*todos_table.c)
+    row = db.execute(statement).one_or_none()
+    db.commit()
+    return row
+
+def _soft_delete(*conditions):
+    """UPDATE marking matching live todos deleted, RETURNING their id and completion state"""
+    return (
+        update(todos_table)
+        .where(*conditions, live)
+        .values(deleted_at=func.now())
+        .returning(todos_table.c.id, todos_table.c.completed)
+    )
+
+def delete_todo(db: Session, todo_id: int) -> bool:
+    """Soft-delete a todo with a single UPDATE ... RETURNING, False if it does not exist"""
+    statement = _soft_delete(todos_table.c.id == todo_id)
+    row = db.execute(statement).first()
+    db.commit()
+    return row is not None
+
+def bulk_create_todos(db: Session, items: List[dict]) -> Sequence[Row]:
+    """Insert many todos with one multi-row INSERT ... RETURNING, in item order"""
+    if not items:
+        return []
+    statement = insert(todos_table).returning(*todos_table.c, sort_by_parameter_order=True)
+    rows = db.execute(statement, items).all()
+    db.commit()
+    return rows
+
+# Columns written by import_todos, in COPY order
+IMPORT_COLUMNS = ("title", "description", "completed")
+
+def _copy_field(value) -> str:
+    """Encode one value for COPY ... (FORMAT csv): unquoted empty is NULL, quoted empty is ''"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return '"' + str(value).replace('"', '""') + '"'
+
+def import_todos(db: Session, items: List[dict]) -> None:
+    """Load validated todos as fast as the driver allows, then commit.
+
+    PostgreSQL uses ``COPY ... FROM STDIN`` (psycopg2) or the binary COPY
+    protocol (asyncpg); other databases get a chunked executemany INSERT.
+    Nothing is returned, unlike bulk_create_todos.
+    """
+    if not items:
+        return
+    connection = db.connection()
+    driver = connection.dialect.driver
+    if driver == "psycopg2":
+        buffer = io.StringIO()
+        buffer.writelines(",".join(map(_copy_field, (item[c] for c in IMPORT_COLUMNS))) + "\n" for item in items)
+        buffer.seek(0)
+        with closing(connection.connection.cursor()) as cursor:
+            cursor.copy_expert(f"COPY {todos_table.name} ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    elif driver == "asyncpg":
+        # Running inside AsyncSession.run_sync, so the coroutine can be awaited in place
+        raw: Any = connection.connection.driver_connection
+        records = [tuple(item[c] for c in IMPORT_COLUMNS) for item in items]
+        await_only(raw.copy_records_to_table(todos_table.name, records=records, columns=list(IMPORT_COLUMNS)))
+    else:
+        # Compiled once and sent straight to the driver's executemany, skipping
+        # per-row parameter processing
+        compiled = insert(todos_table).values({c: bindparam(c) for c in IMPORT_COLUMNS}).compile(dialect=connection.dialect)
+        if compiled.positiontup is not None:
+            params = list(map(itemgetter(*compiled.positiontup), items))
+        else:
+            params = [{c: item[c] for c in IMPORT_COLUMNS} for item in items]
+        connection.exec_driver_sql(compiled.string, params)
+    db.commit()
+
+def bulk_update_todos(db: Session, items: List[dict]) -> dict:
+    """Apply many partial updates in one transaction.
+
+    Each item holds an ``id`` plus the fields to change. Updates are sent as
+    an executemany by primary key; returns the updated rows keyed by id
+    (ids that do not exist are missing from the result).
+    """
+    ids = {item["id"] for item in items}
+    if not ids:
+        return {}
+    # Locked so none of them is deleted before its update
+    found = set(db.execute(select(todos_table.c.id).where(todos_table.c.id.in_(ids), live).with_for_update()).scalars())
+
+    changes = [item for item in items if item["id"] in found and len(item) > 1]
+    if changes:
+        db.execute(update(TodoModel), changes)
+
+    rows = db.execute(select(todos_table).where(todos_table.c.id.in_(found))).all()
+    db.commit()
+    return {row.id: row for row in rows}
+
+def bulk_delete_todos(db: Session, ids: List[int]) -> set:
+    """Soft-delete many todos with one UPDATE ... WHERE id IN (...), returning the deleted ids"""
+    if not ids:
+        return set()
+    rows = db.execute(_soft_delete(todos_table.c.id.in_(ids))).all()
+    db.commit()
+    return {row.id for row in rows}
@@ -0,0 +1,63 @@
+"""
+Command-line bulk import of todos from an NDJSON or CSV file.
+
+Streams the file through the same validator and loader as POST
+/todos/import (COPY on PostgreSQL, chunked INSERT elsewhere) against
+DATABASE_URL, and prints the JSON result. The schema must exist: run
+``python migrate.py`` first, or pass ``--create-schema``.
+
+Usage (from the backend directory):
+    python import_todos.py todos.ndjson
+    python import_todos.py todos.ndjson --create-schema
+    python import_todos.py todos.csv --chunk-size 10000
+    cat todos.ndjson | python import_todos.py - --format ndjson
+"""
+
+import argparse
+import json
+import sys
+import time
+import config.database as database
+from services.todo_import import ImportFormat, import_stream
+
+# Bytes read from the file per chunk
+READ_SIZE = 1 << 20
+
+def read_chunks(stream):
+    while True:
+        data = stream.read(READ_SIZE)
+        if not data:
+            return
+        yield data
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="file to import, or - for stdin")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, help="rows per batch (default: IMPORT_CHUNK_SIZE)")
+    parser.add_argument("--create-schema", action="store_true", help="create missing tables first, like migrate.py")
+    args = parser.parse_args()
+
+    import_format: ImportFormat = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    if args.create_schema:
+        from migrate import create_schema
+        create_schema(database.engine)
+
+    start = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        if args.path == "-":
+            result = import_stream(db, read_chunks(sys.stdin.buffer), import_format, chunk_size=args.chunk_size)
+        else:
+            with open(args.path, "rb") as stream:
+                result = import_stream(db, read_chunks(stream), import_format, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    json.dump(result, sys.stdout, indent=2)
+    print(f"\n{result['imported']} imported, {result['failed']} failed in {elapsed:.2f}s", file=sys.stderr)
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,61 @@
+from time import perf_counter
+# Start of the import phase of the startup profile (see services.startup)
+_import_started = perf_counter()
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from dotenv import load_dotenv
 import os
-from routes.todo import router as todo_router
-from config.database import engine, Base
+from sqlalchemy import text
+# Loads .env before any module reads its configuration; engines are built in the lifespan
+import config.database as database
+from config.database import Base, DB_ASYNC, DB_CREATE_SCHEMA, METRICS_ENABLED
+# Only the router being served is imported (async handlers when DB_ASYNC is enabled)
+if DB_ASYNC:
+    from routes.todo_async import router as todo_router
+else:
+    from routes.todo import router as todo_router
+from config.replicas import DB_READ_YOUR_WRITES_SECONDS
+from config.pool import pool_status
+from routes import caching, changes
+from routes.cache_policy import CachePolicyMiddleware
+from routes.compression import COMPRESSION_ENABLED, CompressionMiddleware
+from routes.consistency import ReadYourWritesMiddleware
+from routes.idempotency import IDEMPOTENCY_ENABLED, IdempotencyMiddleware, idempotency_store
+from routes.load_shedding import LOAD_SHED_ENABLED, LoadSheddingMiddleware
+from routes.rate_limit import RATE_LIMIT_ENABLED, RateLimitMiddleware
+from routes.metrics import MetricsMiddleware, metrics_response, pool_collector
+from services.metrics import registry
+from services.readiness import ReadinessProbe
+from services.startup import StartupProfile
 
-# Load environment variables
-load_dotenv()
+# How long this worker took to start, served at /health/startup
+startup_profile = StartupProfile()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables on startup
-    Base.metadata.create_all(bind=engine)
+    with startup_profile.phase("engines"):
+        database.init_engines()
+    # The schema is created by migrate.py once per deploy; opt in for local runs
+    if DB_CREATE_SCHEMA:
+        with startup_profile.phase("schema"):
+            if DB_ASYNC:
+                async with database.async_engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+            else:
+                Base.metadata.create_all(bind=database.engine)
+    with startup_profile.phase("event_broker"):
+        await changes.broker.start()
+    startup_profile.log()
     yield
     # Cleanup if needed (optional)
+    await changes.broker.stop()
+    if DB_ASYNC:
+        await database.async_engine.dispose()
+    for replica in database.async_replicas.engines:
+        await replica.dispose()
 
 # Create FastAPI app
 app = FastAPI(
@@ -24,6 +65,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Run each Idempotency-Key's write once (innermost: stores the handler's own response)
+if IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
 # CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -37,9 +82,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "X-Page-Size-Capped", "ETag", "Last-Modified", "Idempotent-Replayed"],  # Cursors, validators, replays
 )
 
-# Include routers
+# Pin a client's reads to the primary for a while after it writes
+if database.DATABASE_REPLICA_URLS and DB_READ_YOUR_WRITES_SECONDS > 0:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Cache-Control/Vary per route
+app.add_middleware(CachePolicyMiddleware)
+
+# gzip (brotli/zstd when installed); the API is not behind nginx's gzip
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Token buckets per client and route (429 + Retry-After)
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+# Refuse work past capacity (503 + Retry-After) so admitted requests stay fast
+if LOAD_SHED_ENABLED:
+    app.add_middleware(LoadSheddingMiddleware, pool=lambda: active_engine().pool)
+
+# Request latency, status and per-request DB metrics for /metrics (outermost)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+def active_engine():
+    """The engine serving requests (the async engine's sync side when DB_ASYNC)"""
+    return database.async_engine.sync_engine if DB_ASYNC else database.engine
+
+registry.add_collector(pool_collector(lambda: active_engine().pool))
+
+def ping_database(bind) -> None:
+    with bind.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+async def check_database() -> None:
+    """Run a trivial query over a pooled connection of the serving engine"""
+    if DB_ASYNC:
+        async with database.async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    else:
+        await run_in_threadpool(ping_database, database.engine)
+
+# Readiness hits the database at most once per READINESS_CACHE_TTL seconds per worker
+readiness = ReadinessProbe(
+    check_database,
+    ttl=float(os.getenv("READINESS_CACHE_TTL", "5")),
+    timeout=float(os.getenv("READINESS_TIMEOUT", "2")),
+)
+
+# Include routers (async handlers when DB_ASYNC is enabled)
 app.include_router(todo_router)
 
 @app.get("/")
@@ -48,4 +142,53 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    """Liveness (kept for existing probes); use /health/ready for traffic routing"""
+    return {"status": "healthy"}
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving; never touches the database"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Whether this worker can reach the database (cached, 503 when not ready)"""
+    result = await readiness.status()
+    return JSONResponse(result, status_code=200 if result["status"] == "ready" else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    return metrics_response()
+
+@app.get("/health/pool")
+async def pool_health():
+    """Live connection pool statistics for sizing workers against the DB"""
+    status = pool_status(active_engine().pool)
+    served = database.async_replicas if DB_ASYNC else database.replicas
+    if served:
+        status["replicas"] = [pool_status(replica.pool) for replica in served.engines]
+    return status
+
+@app.get("/health/cache")
+async def cache_health():
+    """Read cache hit/miss/eviction counters, plus reads that joined a running query"""
+    coalesced = caching.todo_reads.shared + caching.async_todo_reads.shared
+    return {**caching.todo_cache.stats(), "coalesced_reads": coalesced}
+
+@app.get("/health/idempotency")
+async def idempotency_health():
+    """Idempotency-Key responses held in this worker's memory"""
+    return idempotency_store.stats()
+
+@app.get("/health/events")
+async def events_health():
+    """Change feed broker: subscribers, buffered and published events"""
+    return changes.broker.stats()
+
+@app.get("/health/startup")
+async def startup_health():
+    """How long this worker took to import and start, per phase"""
+    return startup_profile.report()
+
+startup_profile.record("import", perf_counter() - _import_started)
@@ -0,0 +1,74 @@
+"""
+Schema command: create the database schema once per deploy.
+
+Workers no longer create tables on startup (unless ``DB_CREATE_SCHEMA`` is
+set), so run this before starting or rolling out the API. It is
+idempotent: missing tables, nullable columns and indexes are added, the
+statistics triggers (re)created, superseded indexes dropped, and
+everything else is left alone.
+
+Usage (from the backend directory):
+    python migrate.py           # create missing tables and indexes
+    python migrate.py --check   # exit 1 if any table is missing
+"""
+
+import argparse
+import sys
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import config.database as database
+from config.database import Base
+from crud import stats
+from models.todo import TodoCounter
+
+# Indexes replaced by a differently named one in the models
+SUPERSEDED_INDEXES = ["ix_todos_completed_created_at", "ix_todos_updated_at", "ix_todos_search"]
+
+def create_schema(bind: Engine) -> None:
+    """Create every missing table, nullable column and index of the models"""
+    Base.metadata.create_all(bind=bind)
+    existing = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            columns = {column["name"] for column in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns and column.nullable:
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(bind)}"))
+        for name in SUPERSEDED_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    # create_all skips the indexes of tables that already existed
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+def missing_tables(bind: Engine) -> List[str]:
+    existing = set(inspect(bind).get_table_names())
+    return [table for table in Base.metadata.tables if table not in existing]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only report missing tables")
+    args = parser.parse_args()
+
+    engine = database.engine
+    try:
+        if args.check:
+            missing = missing_tables(engine)
+            print("Missing tables: " + ", ".join(missing) if missing else "Schema is up to date")
+            return 1 if missing else 0
+        missing = missing_tables(engine)
+        create_schema(engine)
+        if TodoCounter.__tablename__ in missing:
+            # New statistics tables start from a count of the existing todos
+            with Session(engine) as db:
+                stats.reconcile(db)
+        print("Database schema is up to date")
+        return 0
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    sys.exit(main())
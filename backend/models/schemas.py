@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
 # Base Todo schema
 class TodoBase(BaseModel):
@@ -27,3 +27,51 @@ class Todo(TodoBase):
     class Config:
         from_attributes = True  # Allows conversion from SQLAlchemy models
 
+# Compact projection for list views (GET /todos?fields=summary)
+class TodoSummary(BaseModel):
+    title: str
+    completed: bool
+    id: int
+
+# Item of a bulk update request (id plus the fields to change)
+class TodoBulkUpdate(TodoUpdate):
+    id: int
+
+# Bulk delete request
+class TodoBulkDelete(BaseModel):
+    ids: List[int]
+
+# Outcome of one item in a bulk request
+class TodoBulkItemResult(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[int] = None
+    status: str = Field(..., description="created, updated, deleted or not_found")
+    todo: Optional[Todo] = None
+
+# Bulk response with per-item results in request order
+class TodoBulkResult(BaseModel):
+    results: List[TodoBulkItemResult]
+
+# One row rejected by an import
+class TodoImportError(BaseModel):
+    line: int = Field(..., description="1-based line of the row in the upload")
+    error: str
+
+# Outcome of a streaming import
+class TodoImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[TodoImportError] = Field(..., description="First failures, capped at IMPORT_MAX_ERRORS")
+
+# Todos created on one day (UTC)
+class TodoDailyCreated(BaseModel):
+    day: date
+    created: int
+
+# Aggregate counts, read from incrementally maintained counters
+class TodoStats(BaseModel):
+    total: int
+    completed: int
+    pending: int
+    created_per_day: List[TodoDailyCreated] = Field(..., description="Oldest first, one entry per day")
+    average_created_per_day: float
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+import os
+from sqlalchemy import DDL, event, BigInteger, Column, Date, Float, Integer, LargeBinary, String, Boolean, DateTime, Index, Text, text
 from sqlalchemy.sql import func
 from config.database import Base
 
@@ -11,4 +12,181 @@ class Todo(Base):
     completed = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Set by DELETE; the row stays until the archive job purges it (see crud.archive)
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
+    __table_args__ = (
+        # Serves "completed=... ordered/ranged by created_at" list queries; live rows only
+        Index(
+            "ix_todos_live_completed_created_at", "completed", "created_at",
+            postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL"),
+        ),
+        # Serves updated_at ranges (export) and the archive job's cutoff; live rows only
+        Index(
+            "ix_todos_live_updated_at", "updated_at",
+            postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL"),
+        ),
+        # Finds soft-deleted rows due for purging without scanning live ones
+        Index(
+            "ix_todos_deleted_at", "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"), sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
+
+def search_document():
+    """Full-text document of a todo (PostgreSQL).
+
+    Queries must use this exact expression so the planner can match it to
+    the GIN index below, hence constants are inlined instead of bound.
+    """
+    empty, space = text("''"), text("' '")
+    document = func.coalesce(Todo.title, empty).op("||")(space).op("||")(func.coalesce(Todo.description, empty))
+    return func.to_tsvector(text("'simple'"), document)
+
+# GIN index for full-text search over live rows; other databases fall back to LIKE scans
+Index(
+    "ix_todos_live_search", search_document(), postgresql_using="gin", postgresql_where=text("deleted_at IS NULL"),
+).ddl_if(dialect="postgresql")
+
+class TodoArchive(Base):
+    """A completed todo moved out of ``todos`` by the archive job, see crud.archive"""
+    __tablename__ = "todos_archive"
+
+    # The archive's own key: SQLite may hand the id of a removed newest todo out again
+    archive_id = Column(Integer, primary_key=True)
+    id = Column(Integer, nullable=False, index=True)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    completed = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class TodoCounter(Base):
+    """One shard of a running todo count ("total", "completed"), see crud.stats"""
+    __tablename__ = "todo_counters"
+
+    name = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+class TodoDailyCount(Base):
+    """One shard of the number of todos created on a day (UTC), see crud.stats"""
+    __tablename__ = "todo_daily_counts"
+
+    day = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    created = Column(BigInteger, nullable=False, default=0)
+
+# Rows each statistics counter is spread over (more shards, less lock contention)
+STATS_SHARDS = int(os.getenv("STATS_SHARDS", "8"))
+
+# The counters follow every write to todos through triggers, in the writing
+# statement itself, so no code path can forget them and writes cost no
+# extra round trip. Live rows only: a soft delete leaves the counts, an
+# archived or purged row leaves them if it was still live.
+
+def _counter_delta(completed: str, total: str) -> str:
+    """Upsert adding the two SQL expressions to the counters, in name order so
+    two transactions never lock shards crosswise"""
+    return (
+        f"INSERT INTO {TodoCounter.__tablename__} (name, shard, value) "
+        f"SELECT name, shard, value FROM (SELECT 'completed' AS name, {completed} AS value "
+        f"UNION ALL SELECT 'total', {total}) AS delta, (SELECT {{shard}} AS shard) AS sharded "
+        f"WHERE value <> 0 ORDER BY name "
+        f"ON CONFLICT (name, shard) DO UPDATE SET value = {TodoCounter.__tablename__}.value + excluded.value"
+    )
+
+_ADD_DAILY_ROW = (
+    f"INSERT INTO {TodoDailyCount.__tablename__} (day, shard, created) VALUES ({{day}}, {{shard}}, 1) "
+    f"ON CONFLICT (day, shard) DO UPDATE SET created = {TodoDailyCount.__tablename__}.created + excluded.created"
+)
+
+# SQLite: row-level triggers, one counter upsert per changed row
+_SQLITE_SHARD = f"abs(random()) % {STATS_SHARDS}"
+_SQLITE_TRIGGERS = {
+    "insert": (
+        "AFTER INSERT ON todos WHEN NEW.deleted_at IS NULL",
+        _counter_delta("coalesce(NEW.completed, 0)", "1").format(shard=_SQLITE_SHARD)
+        + "; "
+        + _ADD_DAILY_ROW.format(day="date(NEW.created_at)", shard=_SQLITE_SHARD),
+    ),
+    "update": (
+        "AFTER UPDATE OF completed, deleted_at ON todos",
+        _counter_delta(
+            "(NEW.deleted_at IS NULL AND coalesce(NEW.completed, 0)) - (OLD.deleted_at IS NULL AND coalesce(OLD.completed, 0))",
+            "(NEW.deleted_at IS NULL) - (OLD.deleted_at IS NULL)",
+        ).format(shard=_SQLITE_SHARD),
+    ),
+    "delete": (
+        "AFTER DELETE ON todos WHEN OLD.deleted_at IS NULL",
+        _counter_delta("-coalesce(OLD.completed, 0)", "-1").format(shard=_SQLITE_SHARD),
+    ),
+}
+
+# PostgreSQL: statement-level triggers over the transition tables, one
+# counter upsert per statement however many rows it changed
+_POSTGRESQL_FUNCTION = f"""\
+CREATE OR REPLACE FUNCTION todo_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    picked integer := floor(random() * {STATS_SHARDS});
+    delta_completed bigint;
+    delta_total bigint;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT count(*) FILTER (WHERE completed), count(*) INTO delta_completed, delta_total
+        FROM new_rows WHERE deleted_at IS NULL;
+        INSERT INTO {TodoDailyCount.__tablename__} (day, shard, created)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, picked, count(*) FROM new_rows
+        WHERE deleted_at IS NULL GROUP BY 1 ORDER BY 1
+        ON CONFLICT (day, shard) DO UPDATE SET created = {TodoDailyCount.__tablename__}.created + excluded.created;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT
+            coalesce(sum((n.deleted_at IS NULL AND n.completed IS TRUE)::int - (o.deleted_at IS NULL AND o.completed IS TRUE)::int), 0),
+            coalesce(sum((n.deleted_at IS NULL)::int - (o.deleted_at IS NULL)::int), 0)
+        INTO delta_completed, delta_total
+        FROM old_rows o JOIN new_rows n ON n.id = o.id;
+    ELSE
+        SELECT -count(*) FILTER (WHERE completed), -count(*) INTO delta_completed, delta_total
+        FROM old_rows WHERE deleted_at IS NULL;
+    END IF;
+    {_counter_delta("delta_completed", "delta_total").format(shard="picked")};
+    RETURN NULL;
+END
+$$"""
+_POSTGRESQL_TRIGGERS = {
+    "insert": "AFTER INSERT ON todos REFERENCING NEW TABLE AS new_rows",
+    "update": "AFTER UPDATE ON todos REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "AFTER DELETE ON todos REFERENCING OLD TABLE AS old_rows",
+}
+
+def trigger_ddl() -> list:
+    """Idempotent DDL (re)creating the statistics triggers, one statement each"""
+    statements = [
+        # DDL formats its statement with %, so the modulo is escaped
+        DDL(f"CREATE TRIGGER IF NOT EXISTS todo_counts_{op} {when} BEGIN {body}; END".replace("%", "%%")).execute_if(dialect="sqlite")
+        for op, (when, body) in _SQLITE_TRIGGERS.items()
+    ]
+    statements.append(DDL(_POSTGRESQL_FUNCTION).execute_if(dialect="postgresql"))
+    statements.extend(
+        DDL(f"CREATE OR REPLACE TRIGGER todo_counts_{op} {when} FOR EACH STATEMENT EXECUTE FUNCTION todo_counts()").execute_if(dialect="postgresql")
+        for op, when in _POSTGRESQL_TRIGGERS.items()
+    )
+    return statements
+
+# Created with the tables, and again (idempotently) by every create_all
+for _statement in trigger_ddl():
+    event.listen(Base.metadata, "after_create", _statement)
+
+class IdempotencyKey(Base):
+    """Response of a write sent with an Idempotency-Key, see crud.idempotency"""
+    __tablename__ = "idempotency_keys"
+
+    idempotency_key = Column(String, primary_key=True)
+    # Null until the first request finishes (it is still in flight)
+    status_code = Column(Integer, nullable=True)
+    fingerprint = Column(String, nullable=True)
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    # Unix time the row may be purged or taken over
+    expires_at = Column(Float, nullable=False, index=True)
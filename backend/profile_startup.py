@@ -0,0 +1,92 @@
+"""
+Startup profile of an API worker.
+
+Prints where a worker's cold start goes:
+
+- the import of ``main``, broken down per package from ``python -X
+  importtime`` in a fresh interpreter (time spent in each package's own
+  modules, excluding what they import from other packages)
+- the phases of the app lifespan (engines, schema, event broker), run
+  in-process against the configured database, as /health/startup reports
+  them
+
+Usage (from the backend directory):
+    python profile_startup.py             # table of the top packages
+    python profile_startup.py --top 30
+    python profile_startup.py --json      # machine-readable
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+def import_breakdown(module: str = "main") -> Tuple[float, List[Tuple[str, float]]]:
+    """Import ``module`` in a fresh interpreter; returns its total import
+    seconds and the seconds per top-level package, largest first."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    per_package: Dict[str, float] = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <indented module>"
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        name = name.strip()
+        per_package[name.split(".")[0]] += int(self_us) / 1e6
+        if name == module:
+            total = int(cumulative_us) / 1e6
+    return total, sorted(per_package.items(), key=lambda item: item[1], reverse=True)
+
+async def _run_lifespan() -> dict:
+    import main
+    async with main.app.router.lifespan_context(main.app):
+        pass
+    return main.startup_profile.report()
+
+def lifespan_phases() -> dict:
+    """Start and stop the app once; the startup profile it recorded"""
+    return asyncio.run(_run_lifespan())
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="packages listed (default: 15)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of tables")
+    args = parser.parse_args()
+
+    total, packages = import_breakdown()
+    try:
+        startup = lifespan_phases()
+    except Exception as error:
+        # A database the broker cannot reach still leaves the import breakdown useful
+        startup = {"error": f"{type(error).__name__}: {error}"}
+
+    if args.json:
+        print(json.dumps({
+            "import_ms": round(total * 1000, 1),
+            "packages_ms": {name: round(seconds * 1000, 1) for name, seconds in packages[: args.top]},
+            "startup": startup,
+        }))
+        return 0
+
+    print(f"import main: {total * 1000:.0f} ms")
+    for name, seconds in packages[: args.top]:
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms  {seconds / total:6.1%}" if total else f"  {name}")
+    print("startup phases (in-process import, then lifespan):")
+    if "error" in startup:
+        print(f"  failed: {startup['error']}")
+    else:
+        for name, ms in startup["phases_ms"].items():
+            print(f"  {name:<28} {ms:8.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
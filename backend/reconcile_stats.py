@@ -0,0 +1,37 @@
+"""
+Reconciliation job for the todo statistics counters.
+
+Recounts the todos table and corrects the counters behind GET
+/todos/stats (see crud/stats.py), printing the corrections as JSON. A
+non-zero correction means something wrote to ``todos`` with the
+statistics triggers disabled, or the counters were added to an existing
+database. Run it from cron, or keep it running with ``--interval``.
+
+Usage (from the backend directory):
+    python reconcile_stats.py                 # once
+    python reconcile_stats.py --interval 3600 # every hour
+"""
+
+import argparse
+import json
+import time
+from config.database import SessionLocal
+from crud import stats
+
+def reconcile_once() -> dict:
+    with SessionLocal() as db:
+        return stats.reconcile(db)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, help="repeat every this many seconds")
+    args = parser.parse_args()
+
+    while True:
+        print(json.dumps(reconcile_once()), flush=True)
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Write-behind batching of single-todo updates.
+
+Checkbox toggles arrive in bursts, and each ``PUT /todos/{id}`` would
+otherwise commit (and fsync) on its own. With ``TODO_WRITE_BATCHING`` set,
+concurrent updates are merged per id and group-committed through
+``crud.bulk_update_todos``. A batch is flushed every
+``TODO_WRITE_BATCH_DELAY_MS`` or when it reaches ``TODO_WRITE_BATCH_MAX``
+todos (see ``services.write_batch``). Each response still waits for its
+commit, so it shows the merged state of the todo after the batch. A batch
+that fails is retried one todo at a time, so an invalid update fails only
+its own request.
+
+Updates sent with If-Match bypass the batch, because the check and the
+write must share a transaction. Async batches are flushed in a session of
+their own: the flush outlives the leader's request when that is cancelled.
+"""
+
+import os
+from fastapi import Request
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+import config.database as database
+from crud import todo as crud
+from routes import conditional
+from services.metrics import registry
+from services.write_batch import AsyncUpdateBatcher, UpdateBatcher
+
+# Write batching configuration
+TODO_WRITE_BATCHING = os.getenv("TODO_WRITE_BATCHING", "false").lower() == "true"
+# Longest an update waits for others to join its batch
+TODO_WRITE_BATCH_DELAY_MS = float(os.getenv("TODO_WRITE_BATCH_DELAY_MS", "5"))
+# Todos per batch; a full batch is flushed at once
+TODO_WRITE_BATCH_MAX = int(os.getenv("TODO_WRITE_BATCH_MAX", "100"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+BATCH_SIZE = registry.histogram(
+    "todo_update_batch_size", "Todos per group-committed update batch", buckets=BATCH_SIZE_BUCKETS
+)
+FLUSH_LATENCY = registry.histogram("todo_update_flush_seconds", "Time to write and commit an update batch")
+
+def observe_flush(size: int, seconds: float) -> None:
+    BATCH_SIZE.observe(size)
+    FLUSH_LATENCY.observe(seconds)
+
+update_batcher = UpdateBatcher(TODO_WRITE_BATCH_MAX, TODO_WRITE_BATCH_DELAY_MS / 1000, observe_flush)
+async_update_batcher = AsyncUpdateBatcher(TODO_WRITE_BATCH_MAX, TODO_WRITE_BATCH_DELAY_MS / 1000, observe_flush)
+
+def batched(request: Request, data: dict) -> bool:
+    """Whether this update goes through the batch"""
+    return TODO_WRITE_BATCHING and bool(data) and not conditional.if_match_requested(request)
+
+def update_todo(db: Session, todo_id: int, data: dict) -> Optional[Any]:
+    """Batched ``crud.update_todo``: the todo's row after the group commit, or None"""
+
+    def flush(items: List[dict]) -> Dict[int, Any]:
+        try:
+            return crud.bulk_update_todos(db, items)
+        except Exception:
+            # The batcher retries the ids one by one on the same session
+            db.rollback()
+            raise
+
+    return update_batcher.submit(todo_id, data, flush)
+
+async def flush_async(items: List[dict]) -> Dict[int, Any]:
+    """Write an async batch in a session the batcher owns, not the leader's"""
+    async with database.AsyncSessionLocal() as db:
+        return await db.run_sync(crud.bulk_update_todos, items)
+
+async def update_todo_async(todo_id: int, data: dict) -> Optional[Any]:
+    """Batched ``crud.update_todo`` for the async routes"""
+    return await async_update_batcher.submit(todo_id, data, flush_async)
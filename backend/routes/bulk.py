@@ -0,0 +1,43 @@
+"""
+Helpers shared by the bulk todo endpoints of both routers.
+"""
+
+from fastapi import HTTPException
+from typing import List
+import os
+from models.schemas import TodoBulkItemResult, TodoBulkResult, TodoBulkUpdate
+
+# Largest number of items accepted by a single bulk request
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+
+def check_batch_size(count: int) -> None:
+    """Reject bulk requests larger than BULK_MAX_ITEMS with 413"""
+    if count > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Bulk requests are limited to {BULK_MAX_ITEMS} items")
+
+def update_payload(items: List[TodoBulkUpdate]) -> List[dict]:
+    """Turn bulk update items into crud dicts holding only the fields that were set"""
+    return [{**item.model_dump(exclude_unset=True, exclude={"id"}), "id": item.id} for item in items]
+
+def created_result(rows) -> TodoBulkResult:
+    return TodoBulkResult(
+        results=[TodoBulkItemResult(index=i, id=row.id, status="created", todo=row) for i, row in enumerate(rows)]
+    )
+
+def updated_result(ids: List[int], rows: dict) -> TodoBulkResult:
+    return TodoBulkResult(
+        results=[
+            TodoBulkItemResult(index=i, id=todo_id, status="updated", todo=rows[todo_id])
+            if todo_id in rows
+            else TodoBulkItemResult(index=i, id=todo_id, status="not_found")
+            for i, todo_id in enumerate(ids)
+        ]
+    )
+
+def deleted_result(ids: List[int], deleted: set) -> TodoBulkResult:
+    return TodoBulkResult(
+        results=[
+            TodoBulkItemResult(index=i, id=todo_id, status="deleted" if todo_id in deleted else "not_found")
+            for i, todo_id in enumerate(ids)
+        ]
+    )
@@ -0,0 +1,66 @@
+"""
+Cache-Control and Vary headers per route.
+
+``CachePolicyMiddleware`` (plain ASGI) looks up the matched route template
+in ``CACHE_POLICIES`` and sets ``Cache-Control`` plus any extra ``Vary``
+names on successful and 304 responses, unless the handler set its own
+``Cache-Control``. Todo reads carry ETags, so browsers may keep them but
+revalidate every time (``no-cache``) and usually get a bodiless 304 back.
+Everything else, including writes and errors, is ``no-store``.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+import os
+from starlette.datastructures import MutableHeaders
+from routes.compression import add_vary
+from routes.metrics import route_label
+
+@dataclass(frozen=True)
+class CachePolicy:
+    cache_control: str
+    vary: Tuple[str, ...] = ()
+
+# Seconds browsers may reuse /todos/stats without asking again
+TODO_STATS_MAX_AGE = int(os.getenv("TODO_STATS_MAX_AGE", "5"))
+
+NO_STORE = CachePolicy("no-store")
+# Responses differ by Origin through the CORS headers
+REVALIDATE = CachePolicy("private, no-cache", ("Origin",))
+
+# (method, route template) -> policy; unlisted routes get NO_STORE
+CACHE_POLICIES: Dict[Tuple[str, str], CachePolicy] = {
+    ("GET", "/todos/"): REVALIDATE,
+    ("GET", "/todos/{todo_id}"): REVALIDATE,
+    ("GET", "/todos/stats"): CachePolicy(f"private, max-age={TODO_STATS_MAX_AGE}", ("Origin",)),
+    ("GET", "/"): CachePolicy("public, max-age=60"),
+}
+
+def policy_for(method: str, route: str, status: int) -> CachePolicy:
+    if status >= 400 or (status >= 300 and status != 304):
+        return NO_STORE
+    if method == "HEAD":
+        method = "GET"
+    return CACHE_POLICIES.get((method, route), NO_STORE)
+
+class CachePolicyMiddleware:
+    """ASGI middleware applying ``CACHE_POLICIES`` to responses"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_policy(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if "cache-control" not in headers:
+                    policy = policy_for(scope["method"], route_label(scope), message["status"])
+                    headers["Cache-Control"] = policy.cache_control
+                    add_vary(headers, *policy.vary)
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
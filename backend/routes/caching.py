@@ -0,0 +1,147 @@
+"""
+Read cache for the todo routes.
+
+``get_todo`` and ``get_todos`` store their serialized JSON in ``todo_cache``
+when ``TODO_CACHE_ENABLED`` is set. Entries are tagged with the ids they
+contain, so the write handlers invalidate only the affected responses:
+
+- every entry is tagged with the ids of the todos in it
+- list pages without a next page are tagged ``tail`` (new todos land there)
+- offset pages past the first are tagged ``offset`` (deletes shift them)
+- filtered, searched or re-sorted pages are tagged ``filtered``; any write
+  can move rows in or out of them, so every write drops them
+
+Whether cached or not, identical concurrent ``get_todo`` reads share one
+query through ``todo_reads`` (``async_todo_reads`` for the async routes).
+Updates and deletes make later readers of those todos query again.
+
+Writes of other workers and jobs reach this worker as change events, which
+``routes.changes`` applies here with the same rules; a ``reset`` (events
+may have been missed) drops everything.
+"""
+
+from fastapi import Request, Response
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+import os
+from crud.todo import TodoPage
+from routes.conditional import not_modified
+from routes.serialization import dump_todo
+from services.cache import CacheBackend, CachedResponse, MemoryCacheBackend
+from services.singleflight import AsyncSingleFlight, SingleFlight
+
+# Cache configuration
+TODO_CACHE_ENABLED = os.getenv("TODO_CACHE_ENABLED", "false").lower() == "true"
+TODO_CACHE_MAX_ENTRIES = int(os.getenv("TODO_CACHE_MAX_ENTRIES", "1024"))
+TODO_CACHE_TTL = float(os.getenv("TODO_CACHE_TTL", "30"))
+
+# Swap for a shared CacheBackend to cache across workers
+todo_cache: CacheBackend = MemoryCacheBackend(max_entries=TODO_CACHE_MAX_ENTRIES, ttl=TODO_CACHE_TTL)
+
+# Concurrent identical single-todo reads share one query
+todo_reads = SingleFlight()
+async_todo_reads = AsyncSingleFlight()
+
+TAIL_TAG = "tail"
+OFFSET_TAG = "offset"
+FILTERED_TAG = "filtered"
+
+def item_key(todo_id: int, fields: Optional[tuple] = None) -> tuple:
+    """Key (and invalidation tag, without ``fields``) of a single todo response"""
+    return ("todo", todo_id) if fields is None else ("todo", todo_id, fields)
+
+def read_key(request: Request, todo_id: int, fields: Optional[tuple] = None) -> tuple:
+    """Single-flight key of a todo read; replica and primary reads never share"""
+    return (todo_id, fields, getattr(request.state, "read_replica", False))
+
+def page_key(request: Request) -> tuple:
+    """Key a list page by its full, order-independent query string"""
+    return ("list", tuple(sorted(request.query_params.multi_items())))
+
+def lookup(request: Request, key: tuple) -> Optional[Response]:
+    """Return the cached response for a key (304 if the client has it), or None on a miss"""
+    if not TODO_CACHE_ENABLED:
+        return None
+    entry = todo_cache.get(key)
+    if entry is None:
+        return None
+    return not_modified(request, entry.headers) or Response(
+        content=entry.body, media_type="application/json", headers=entry.headers
+    )
+
+# Never matches, so the response is not stored
+STALE_GENERATION = -1
+
+def generation(request: Request) -> int:
+    """Invalidation generation to read before loading a response from the DB
+
+    Reads served by a replica are not cached: a lagging replica could put a
+    todo's pre-write state back right after the write invalidated it.
+    """
+    if not TODO_CACHE_ENABLED:
+        return 0
+    if getattr(request.state, "read_replica", False):
+        return STALE_GENERATION
+    return todo_cache.generation()
+
+def store_todo(
+    response: Response, todo_id: int, todo: Any, headers: Dict[str, str], generation: int, fields: Optional[tuple] = None
+) -> Any:
+    """Cache a single todo (or its ``fields`` projection) with its headers and return the response to send"""
+    if not TODO_CACHE_ENABLED and fields is None:
+        response.headers.update(headers)
+        return todo
+    body = dump_todo(todo, fields)
+    if TODO_CACHE_ENABLED:
+        entry = CachedResponse(body=body, headers=headers)
+        todo_cache.set(item_key(todo_id, fields), entry, [item_key(todo_id)], generation)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def store_page(
+    request: Request, page: TodoPage, body: bytes, skip: int, filtered: bool, headers: Dict[str, str], generation: int
+) -> Response:
+    """Cache a serialized list page with its headers and return the response to send"""
+    if TODO_CACHE_ENABLED:
+        tags = page_tags(page, skip, filtered)
+        todo_cache.set(page_key(request), CachedResponse(body=body, headers=headers), tags, generation)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def page_tags(page: TodoPage, skip: int, filtered: bool) -> List[Hashable]:
+    """Invalidation tags of a list page"""
+    tags: List[Hashable] = [item_key(todo.id) for todo in page.items]
+    if not page.has_next:
+        tags.append(TAIL_TAG)
+    if skip > 0:
+        tags.append(OFFSET_TAG)
+    if filtered:
+        tags.append(FILTERED_TAG)
+    return tags
+
+def invalidate_created() -> None:
+    """New todos get the highest ids, so only tail pages change"""
+    if TODO_CACHE_ENABLED:
+        todo_cache.invalidate([TAIL_TAG, FILTERED_TAG])
+
+def forget_reads(todo_ids: Iterable[int]) -> None:
+    """Make later reads of the todos query again instead of joining a running read"""
+    todo_ids = set(todo_ids)
+    todo_reads.forget(lambda key: key[0] in todo_ids)
+    async_todo_reads.forget(lambda key: key[0] in todo_ids)
+
+def invalidate_updated(todo_ids: Iterable[int]) -> None:
+    todo_ids = list(todo_ids)
+    forget_reads(todo_ids)
+    if TODO_CACHE_ENABLED:
+        todo_cache.invalidate([item_key(todo_id) for todo_id in todo_ids] + [FILTERED_TAG])
+
+def invalidate_deleted(todo_ids: Iterable[int]) -> None:
+    todo_ids = list(todo_ids)
+    forget_reads(todo_ids)
+    if TODO_CACHE_ENABLED:
+        todo_cache.invalidate([item_key(todo_id) for todo_id in todo_ids] + [OFFSET_TAG, FILTERED_TAG])
+
+def invalidate_all() -> None:
+    """Writes may have been missed: nothing cached or running can be trusted"""
+    todo_reads.forget(lambda key: True)
+    async_todo_reads.forget(lambda key: True)
+    if TODO_CACHE_ENABLED:
+        todo_cache.clear()
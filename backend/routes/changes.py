@@ -0,0 +1,121 @@
+"""
+Change feed for the todo routes, served as Server-Sent Events.
+
+The write handlers publish ``created``, ``updated``, ``deleted`` and
+``imported`` events to ``broker`` after their transaction commits, and the
+archive job announces the todos it archives as ``deleted``;
+``GET /todos/events`` streams them to clients. A client resumes after a
+reconnect from its last event id (EventSource sends ``Last-Event-ID`` on
+its own); if that id has left the replay buffer it gets a ``reset`` event
+and should reload the list. A worker whose PostgreSQL LISTEN connection
+dropped sends ``reset`` too, once it has reconnected.
+"""
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+import asyncio
+import json
+import os
+from sqlalchemy.engine import make_url
+import config.database as database
+from routes import caching
+from routes.serialization import dump_todo
+from services.events import RESET, ChangeEvent, EventBroker, MemoryBroker, PostgresBroker
+
+# Change feed configuration
+TODO_EVENTS_BROKER = os.getenv("TODO_EVENTS_BROKER", "auto")  # auto, memory or postgres
+TODO_EVENTS_BUFFER = int(os.getenv("TODO_EVENTS_BUFFER", "1000"))
+TODO_EVENTS_QUEUE_SIZE = int(os.getenv("TODO_EVENTS_QUEUE_SIZE", "1000"))
+TODO_EVENTS_HEARTBEAT = float(os.getenv("TODO_EVENTS_HEARTBEAT", "15"))
+# Client reconnect delay suggested in the stream, in milliseconds
+TODO_EVENTS_RETRY = int(os.getenv("TODO_EVENTS_RETRY", "3000"))
+
+def _make_broker() -> EventBroker:
+    options: Dict[str, Any] = {"buffer_size": TODO_EVENTS_BUFFER, "queue_size": TODO_EVENTS_QUEUE_SIZE}
+    # Decided from the URL: the engine is only built in the app lifespan
+    use_postgres = TODO_EVENTS_BROKER == "postgres" or (
+        TODO_EVENTS_BROKER == "auto" and make_url(database.DATABASE_URL).get_driver_name() == "psycopg2"
+    )
+    if use_postgres:
+        return PostgresBroker(lambda: database.engine, **options)
+    return MemoryBroker(**options)
+
+broker: EventBroker = _make_broker()
+
+def invalidate_cache(event: ChangeEvent) -> None:
+    """Apply a write of any worker or job to this worker's read cache, like a
+    local write (this worker's own writes are dropped twice, harmlessly)"""
+    if event.type in ("created", "imported"):
+        caching.invalidate_created()
+    elif event.type == "updated":
+        caching.invalidate_updated([json.loads(event.data)["id"]])
+    elif event.type == "deleted":
+        caching.invalidate_deleted([json.loads(event.data)["id"]])
+    elif event.type == RESET:
+        caching.invalidate_all()
+
+broker.add_listener(invalidate_cache)
+
+def publish_created(todos: Iterable) -> None:
+    for todo in todos:
+        broker.publish("created", dump_todo(todo))
+
+def publish_updated(todos: Iterable) -> None:
+    for todo in todos:
+        broker.publish("updated", dump_todo(todo))
+
+def publish_deleted(ids: Iterable[int]) -> None:
+    for todo_id in ids:
+        broker.publish("deleted", json.dumps({"id": todo_id}).encode())
+
+def publish_imported(count: int) -> None:
+    """One event for a whole import; clients reload instead of applying rows"""
+    broker.publish("imported", json.dumps({"count": count}).encode())
+
+def parse_event_id(value: Optional[str]) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid event id")
+
+def format_event(event: ChangeEvent) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event.id, event.type.encode(), event.data)
+
+RESET_EVENT = b"event: reset\ndata: {}\n\n"
+
+async def event_stream(last_event_id: Optional[int]) -> AsyncIterator[bytes]:
+    """Yield SSE frames: the replayed backlog, then live events and heartbeats.
+
+    Runs until the client disconnects, which cancels the response.
+    """
+    subscription = broker.subscribe(last_event_id)
+    try:
+        yield b"retry: %d\n\n" % TODO_EVENTS_RETRY
+        if subscription.reset:
+            yield RESET_EVENT
+        for event in subscription.backlog:
+            yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), TODO_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield b": keep-alive\n\n"
+                continue
+            if event is None:
+                # Fell too far behind; the client reconnects and reloads
+                yield RESET_EVENT
+                return
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+def event_response(last_event_id: Optional[str]) -> StreamingResponse:
+    return StreamingResponse(
+        event_stream(parse_event_id(last_event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,243 @@
+"""
+Response compression.
+
+The API is served straight from uvicorn, without the gzip of
+``docker/nginx.conf`` in front of it, so ``CompressionMiddleware`` (plain
+ASGI, like ``MetricsMiddleware``) compresses JSON, NDJSON, CSV and text
+bodies itself. The encoding is negotiated from ``Accept-Encoding`` among
+``COMPRESSION_ENCODINGS``; zstd and brotli are used when the ``zstandard``
+or ``brotli`` packages are installed, gzip always works.
+
+Bodies sent in one piece are compressed when at least
+``COMPRESSION_MIN_SIZE`` bytes; streamed bodies (exports) are compressed
+chunk by chunk. Event streams are never compressed, since buffering would
+delay events.
+
+A compressed body is a different representation with different bytes, so
+its strong ETag gets the coding as a suffix (``"<hash>-gzip"``), as a
+strong validator must not be shared by two byte sequences. The suffix is
+stripped from If-None-Match and If-Match before the routes compare them
+with the uncoded ETags they compute, and put back on a 304 that confirms
+a coded ETag.
+"""
+
+import os
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # optional
+    zstandard = None
+
+# Compression configuration
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Server preference when the client accepts several equally
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+# Levels suited to compressing every response on the fly
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Content types worth compressing (prefix match); event streams are excluded
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+class _Zstd:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+# Content-Encoding -> compressor factory, for the encodings available here
+ENCODERS: Dict[str, Callable] = {"gzip": _Gzip}
+if brotli is not None:
+    ENCODERS["br"] = _Brotli
+if zstandard is not None:
+    ENCODERS["zstd"] = _Zstd
+
+def available_encodings(preference: str = COMPRESSION_ENCODINGS) -> List[str]:
+    return [name for name in (part.strip() for part in preference.split(",")) if name in ENCODERS]
+
+def negotiate(accept_encoding: Optional[str], encodings: Iterable[str]) -> Optional[str]:
+    """Pick the encoding with the highest client q-value, ties going to server order.
+
+    Returns None when the client accepts none of them (send identity).
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+# Codings an ETag suffix may name, whether or not their package is installed here
+ETAG_CODINGS = ("gzip", "br", "zstd")
+CONDITIONAL_HEADERS = (b"if-none-match", b"if-match")
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """ETag of the ``encoding``-coded representation: ``"<hash>-<coding>"``"""
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+def uncoded_etag(tag: str) -> str:
+    """The ETag the routes compute, from one a client got with a compressed body"""
+    for coding in ETAG_CODINGS:
+        suffix = f'-{coding}"'
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+def _strip_codings(value: bytes) -> bytes:
+    tags = (tag.strip() for tag in value.decode("latin-1").split(","))
+    return ", ".join(uncoded_etag(tag) for tag in tags if tag).encode("latin-1")
+
+def uncode_conditions(scope: dict) -> List[str]:
+    """Strip coding suffixes from the scope's If-None-Match / If-Match (in place,
+    so outer middleware still sees what the router adds); returns the
+    If-None-Match tags as the client sent them"""
+    sent: List[str] = []
+    headers = []
+    for name, value in scope["headers"]:
+        if name in CONDITIONAL_HEADERS:
+            if name == b"if-none-match":
+                sent += [tag.strip().removeprefix("W/") for tag in value.decode("latin-1").split(",")]
+            value = _strip_codings(value)
+        headers.append((name, value))
+    scope["headers"] = headers
+    return sent
+
+def compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return (
+        "content-encoding" not in headers
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+        and not content_type.startswith(UNCOMPRESSIBLE_TYPES)
+    )
+
+def add_vary(headers: MutableHeaders, *names: str) -> None:
+    """Add names to the Vary header, keeping the ones already listed"""
+    current = [value.strip() for line in headers.getlist("vary") for value in line.split(",") if value.strip()]
+    lowered = {value.lower() for value in current}
+    current += [name for name in names if name.lower() not in lowered]
+    if current:
+        headers["Vary"] = ", ".join(current)
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies per Accept-Encoding"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings() if encodings is None else encodings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        if scope["method"] != "HEAD":
+            encoding = negotiate(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        sent_etags = uncode_conditions(scope)
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows how large the body is
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if start is None:
+                # Later chunks of a streamed body
+                if compressor is not None:
+                    data = compressor.compress(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        data += compressor.flush()
+                    message = {**message, "body": data}
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(scope=response_start)
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if response_start["status"] == 304 and encoding is not None and "etag" in headers:
+                # Confirms the coded representation the client holds, if that is the one it sent
+                coded = coded_etag(headers["etag"], encoding)
+                if coded in sent_etags:
+                    headers["ETag"] = coded
+            if response_start["status"] in (204, 304) or not compressible(headers):
+                await send(response_start)
+                await send(message)
+                return
+
+            add_vary(headers, "Accept-Encoding")
+            if encoding is None or (not more_body and len(body) < self.minimum_size):
+                await send(response_start)
+                await send(message)
+                return
+
+            compressor = ENCODERS[encoding]()
+            headers["Content-Encoding"] = encoding
+            if "etag" in headers:
+                headers["ETag"] = coded_etag(headers["etag"], encoding)
+            data = compressor.compress(body)
+            if more_body:
+                # Length of a streamed body is unknown up front
+                del headers["Content-Length"]
+            else:
+                data += compressor.flush()
+                headers["Content-Length"] = str(len(data))
+            await send(response_start)
+            await send({**message, "body": data})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,92 @@
+"""
+Conditional request support (ETag / Last-Modified) for the todo routes.
+
+ETags are strong validators. A single todo's ETag is hashed from its column
+values, so it changes with any edit even when two updates fall in the same
+``updated_at`` second, and can be computed without serializing the todo.
+List pages are always serialized, so their ETag hashes the JSON body plus
+the pagination cursors.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import HTTPException, Request, Response
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+from crud.todo import todos_table
+
+_columns = [column.key for column in todos_table.c]
+
+def _digest(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+def _row_values(todo: Any) -> tuple:
+    return tuple(getattr(todo, column) for column in _columns)
+
+def _http_date(value: datetime) -> str:
+    # SQLite hands back naive timestamps; CURRENT_TIMESTAMP is UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def todo_etag(todo: Any) -> str:
+    return _digest(repr(_row_values(todo)).encode())
+
+def todo_headers(todo: Any, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, str]:
+    """Validators for a single todo, or for the ``fields`` projection of it"""
+    if fields is None:
+        headers = {"ETag": todo_etag(todo)}
+    else:
+        # A projection is its own representation, validated by the selected values only
+        values = tuple(getattr(todo, field) for field in fields)
+        headers = {"ETag": _digest(repr((fields, values)).encode())}
+    if "updated_at" in (fields or _columns) and todo.updated_at is not None:
+        headers["Last-Modified"] = _http_date(todo.updated_at)
+    return headers
+
+def page_headers(body: bytes, extra_headers: Dict[str, str]) -> Dict[str, str]:
+    """Validators for a serialized list page.
+
+    Pages only get an ETag: a delete does not move max(updated_at), so a
+    Last-Modified date could wrongly answer 304.
+    """
+    cursors = repr(sorted(extra_headers.items())).encode()
+    return {**extra_headers, "ETag": _digest(body + b"\n" + cursors)}
+
+def _parse_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """Return a 304 response if the client's cached copy is still current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        etag = headers["ETag"]
+        tags = [tag.removeprefix("W/") for tag in _parse_etags(if_none_match)]
+        matched = "*" in tags or etag in tags
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        last_modified = headers.get("Last-Modified")
+        if if_modified_since is None or last_modified is None:
+            return None
+        try:
+            matched = parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+
+    if not matched:
+        return None
+    validators = {name: value for name, value in headers.items() if name in ("ETag", "Last-Modified")}
+    return Response(status_code=304, headers=validators)
+
+def if_match_requested(request: Request) -> bool:
+    return "if-match" in request.headers
+
+def check_if_match(request: Request, todo: Any) -> None:
+    """Enforce If-Match against the current todo (404 if gone, 412 if changed)"""
+    if todo is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+    tags = _parse_etags(request.headers["if-match"])
+    # Strong comparison: weak validators never match
+    if "*" not in tags and todo_etag(todo) not in tags:
+        raise HTTPException(status_code=412, detail="Todo has been modified")
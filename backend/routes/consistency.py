@@ -0,0 +1,40 @@
+"""
+Read-your-writes for replica reads.
+
+``ReadYourWritesMiddleware`` (plain ASGI) sets the ``PRIMARY_COOKIE`` on
+every successful write response, so the client's following reads go to the
+primary until its write has had ``DB_READ_YOUR_WRITES_SECONDS`` to reach the
+replicas (see ``config.replicas``). ``main.py`` installs it only when
+replicas are configured.
+"""
+
+import math
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from config.replicas import DB_READ_YOUR_WRITES_SECONDS, PRIMARY_COOKIE, pin_until
+
+# Methods that never write
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def pin_cookie(now: Optional[float] = None) -> str:
+    """Set-Cookie value pinning the client's reads to the primary"""
+    max_age = math.ceil(DB_READ_YOUR_WRITES_SECONDS)
+    return f"{PRIMARY_COOKIE}={pin_until(now):.3f}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning a client to the primary after a successful write"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                MutableHeaders(scope=message).append("Set-Cookie", pin_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
@@ -0,0 +1,82 @@
+"""
+Streaming export of the todos table as NDJSON or CSV.
+
+Rows are read through a server-side cursor (``stream_results`` +
+``yield_per``) and written out one batch at a time, so memory stays flat
+regardless of table size. The stream opens its own session: FastAPI closes
+yield dependencies before a StreamingResponse body is sent.
+"""
+
+from datetime import datetime
+from fastapi import Query
+from typing import AsyncIterator, Iterator, List, Literal, Optional
+import csv
+import io
+import os
+import config.database as database
+from crud import todo as crud
+from crud.todo import TodoFilter
+from routes.serialization import TodoRow, dump_todo
+
+# Rows fetched from the server-side cursor per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+_columns = list(TodoRow.__annotations__)
+
+def export_filter_params(
+    completed: Optional[bool] = None,
+    updated_after: Optional[datetime] = Query(None, description="Only todos updated at or after this time"),
+    updated_before: Optional[datetime] = Query(None, description="Only todos updated before this time"),
+) -> TodoFilter:
+    """Dependency building the TodoFilter of an export request"""
+    return TodoFilter(completed=completed, updated_after=updated_after, updated_before=updated_before)
+
+def content_disposition(export_format: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="todos.{export_format}"'}
+
+def _encode_ndjson(rows: List) -> bytes:
+    return b"".join(dump_todo(row) + b"\n" for row in rows)
+
+def _encode_csv(rows: List, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(_columns)
+    for row in rows:
+        mapping = row._mapping
+        writer.writerow(
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (mapping[column] for column in _columns)
+        )
+    return buffer.getvalue().encode()
+
+def _encode(rows: List, export_format: str) -> bytes:
+    return _encode_ndjson(rows) if export_format == "ndjson" else _encode_csv(rows)
+
+def iter_export(export_format: Literal["ndjson", "csv"], todo_filter: TodoFilter) -> Iterator[bytes]:
+    """Yield the export in batches from a sync session"""
+    db = database.SessionLocal()
+    try:
+        statement = crud.export_statement(todo_filter, db.get_bind().dialect.name)
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        if export_format == "csv":
+            yield _encode_csv([], header=True)
+        for partition in result.partitions():
+            yield _encode(partition, export_format)
+    finally:
+        db.close()
+
+async def aiter_export(export_format: Literal["ndjson", "csv"], todo_filter: TodoFilter) -> AsyncIterator[bytes]:
+    """Yield the export in batches from an async session"""
+    async with database.AsyncSessionLocal() as db:
+        statement = crud.export_statement(todo_filter, db.get_bind().dialect.name)
+        result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == "csv":
+            yield _encode_csv([], header=True)
+        async for partition in result.partitions():
+            yield _encode(partition, export_format)
@@ -0,0 +1,44 @@
+"""
+Sparse fieldsets (``fields=``) for the todo read routes.
+
+``fields`` is a comma-separated list of todo fields and/or named
+projections (``summary`` = id, title, completed). Only those columns are
+selected from the database and serialized, so list pages that do not show
+descriptions stop paying for them.
+"""
+
+from fastapi import HTTPException, Query
+from typing import Optional, Set, Tuple
+from routes.serialization import SUMMARY_FIELDS, TODO_FIELDS
+
+# Named projections accepted in ``fields``
+PROJECTIONS = {
+    "summary": SUMMARY_FIELDS,
+}
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Requested fields in schema order, or None for the full todo"""
+    if not value:
+        return None
+    requested: Set[str] = set()
+    for name in (part.strip() for part in value.split(",")):
+        if not name:
+            continue
+        if name in PROJECTIONS:
+            requested.update(PROJECTIONS[name])
+        elif name in TODO_FIELDS:
+            requested.add(name)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+    fields = tuple(field for field in TODO_FIELDS if field in requested)
+    return fields if fields and fields != TODO_FIELDS else None
+
+def todo_fields_params(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return (id, title, description, completed, created_at, "
+        "updated_at) or 'summary' for id, title and completed",
+    ),
+) -> Optional[Tuple[str, ...]]:
+    """Dependency reading the sparse fieldset of a read request"""
+    return parse_fields(fields)
@@ -0,0 +1,34 @@
+"""
+Query parameters for filtering, searching and sorting todo listings.
+"""
+
+from datetime import datetime
+from fastapi import Depends, HTTPException, Query
+from typing import Literal, Optional
+from crud.todo import TodoFilter
+from routes.pagination import PageParams, page_params
+
+def todo_filter_params(
+    completed: Optional[bool] = None,
+    created_after: Optional[datetime] = Query(None, description="Only todos created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only todos created before this time"),
+    updated_after: Optional[datetime] = Query(None, description="Only todos updated at or after this time"),
+    updated_before: Optional[datetime] = Query(None, description="Only todos updated before this time"),
+    q: Optional[str] = Query(None, min_length=1, description="Text search in title and description"),
+    sort: Literal["id", "created_at", "updated_at", "title"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    page: PageParams = Depends(page_params),
+) -> TodoFilter:
+    """Dependency building the TodoFilter of a listing request"""
+    if sort != "id" and (page.after_id is not None or page.before_id is not None):
+        raise HTTPException(status_code=400, detail="Cursor pagination requires sort=id")
+    return TodoFilter(
+        completed=completed,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        search=q,
+        sort=sort,
+        order=order,
+    )
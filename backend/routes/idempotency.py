@@ -0,0 +1,246 @@
+"""
+Idempotency-Key support for the write endpoints.
+
+Clients retry writes after timeouts, and a retried ``POST /todos`` would
+otherwise create the todo twice. ``IdempotencyMiddleware`` (plain ASGI)
+handles POST, PUT, PATCH and DELETE requests that carry an
+``Idempotency-Key`` header:
+
+- the first request with a key claims it and runs; a response below 500
+  is stored for ``IDEMPOTENCY_TTL`` seconds. A 5xx, or a response no route
+  produced (such as the ``/todos`` -> ``/todos/`` redirect), releases the key
+  so the next attempt runs
+- later requests with the key get the stored response replayed, marked
+  with ``Idempotent-Replayed: true``, without running again
+- duplicates arriving while the first is still running wait for it rather
+  than run concurrently: in the same worker on an asyncio future, across
+  workers by polling the claim row. After ``IDEMPOTENCY_WAIT_TIMEOUT`` they
+  get 409
+- reusing a key with a different method, path (trailing slash aside) or
+  body is a 422
+
+Keys are scoped to the client (its address, as the rate limiter sees it),
+so one client's key never replays another client's response. The key
+rows are read and written on the serving engine: through the async
+session when ``DB_ASYNC`` is on, in the threadpool otherwise.
+
+Bodies are buffered to fingerprint them, up to ``IDEMPOTENCY_MAX_BODY``
+bytes (413 beyond that). The middleware sits inside CORS and compression,
+so stored responses do not depend on the Origin or Accept-Encoding of the
+first request.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+import config.database as database
+from routes.rate_limit import client_address
+from services.idempotency import IN_FLIGHT, IdempotencyStore, StoredResponse
+from services.metrics import registry
+
+# Idempotency configuration
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+# Seconds a stored response is replayed for
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+# Seconds a claim lasts without a response (a crashed worker's keys free up after this)
+IDEMPOTENCY_LEASE = float(os.getenv("IDEMPOTENCY_LEASE", "60"))
+# Seconds a duplicate waits for the first request before getting 409
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+# Seconds between checks of a key claimed by another worker
+IDEMPOTENCY_POLL_INTERVAL = float(os.getenv("IDEMPOTENCY_POLL_INTERVAL", "0.05"))
+# Finished responses kept in memory per worker
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_MAX_BODY = int(os.getenv("IDEMPOTENCY_MAX_BODY", str(1024 * 1024)))
+IDEMPOTENCY_MAX_KEY_LENGTH = 255
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+IDEMPOTENT_REQUESTS = registry.counter(
+    "idempotency_requests_total", "Write requests sent with an Idempotency-Key", ("outcome",)
+)
+
+idempotency_store = IdempotencyStore(
+    lambda: database.SessionLocal(),
+    ttl=IDEMPOTENCY_TTL,
+    lease=IDEMPOTENCY_LEASE,
+    max_entries=IDEMPOTENCY_MAX_ENTRIES,
+)
+
+class _Rejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        self.status_code = status_code
+        self.detail = detail
+
+def scoped_key(scope: dict, key: str) -> str:
+    """The stored key: the header value within the client that sent it"""
+    return hashlib.blake2b(f"{client_address(scope)}\n{key}".encode(), digest_size=16).hexdigest()
+
+async def in_store(operation: Callable[..., Any], *args) -> Any:
+    """Run an ``idempotency_store`` DB method without blocking the event loop"""
+    if database.DB_ASYNC:
+        async with database.AsyncSessionLocal() as db:
+            return await db.run_sync(lambda session: operation(*args, db=session))
+    return await run_in_threadpool(operation, *args)
+
+def fingerprint(method: str, path: str, body: bytes) -> str:
+    """What a key's retries must repeat exactly"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{method} {path.rstrip('/')}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+async def _json_response(send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+async def _replay(send, stored: StoredResponse) -> None:
+    await send({"type": "http.response.start", "status": stored.status_code, "headers": stored.headers + [(REPLAYED_HEADER, b"true")]})
+    await send({"type": "http.response.body", "body": stored.body})
+
+class IdempotencyMiddleware:
+    """ASGI middleware running each Idempotency-Key's write at most once"""
+
+    def __init__(self, app):
+        self.app = app
+        # Keys whose first request runs in this worker -> its stored response (None: released)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        header = Headers(scope=scope).get(IDEMPOTENCY_HEADER)
+        if header is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            if not header or len(header) > IDEMPOTENCY_MAX_KEY_LENGTH:
+                raise _Rejected(400, f"Idempotency-Key must be 1 to {IDEMPOTENCY_MAX_KEY_LENGTH} characters")
+            key = scoped_key(scope, header)
+            body = await self._read_body(receive)
+            request_fingerprint = fingerprint(scope["method"], scope["path"], body)
+            stored = await self._resolve(key)
+            if stored is not None and stored.fingerprint != request_fingerprint:
+                raise _Rejected(422, "Idempotency-Key was used for a different request")
+        except _Rejected as rejected:
+            IDEMPOTENT_REQUESTS.inc(str(rejected.status_code))
+            await _json_response(send, rejected.status_code, rejected.detail)
+            return
+
+        if stored is not None:
+            IDEMPOTENT_REQUESTS.inc("replayed")
+            await _replay(send, stored)
+            return
+        IDEMPOTENT_REQUESTS.inc("executed")
+        await self._run(scope, receive, send, body, key, request_fingerprint)
+
+    async def _read_body(self, receive) -> bytes:
+        chunks: List[bytes] = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise _Rejected(400, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > IDEMPOTENCY_MAX_BODY:
+                raise _Rejected(413, "Request body too large for an Idempotency-Key")
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    async def _resolve(self, key: str) -> Optional[StoredResponse]:
+        """The key's stored response, or None once this request has claimed the key"""
+        store = idempotency_store
+        deadline = monotonic() + IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            stored = store.cached(key)
+            if stored is not None:
+                return stored
+            pending = self._in_flight.get(key)
+            if pending is not None:
+                # Same worker: wait for the running request
+                remaining = deadline - monotonic()
+                try:
+                    stored = await asyncio.wait_for(asyncio.shield(pending), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    raise _Rejected(409, "A request with this Idempotency-Key is still in progress")
+                if stored is not None:
+                    return stored
+                continue
+
+            self._in_flight[key] = asyncio.get_running_loop().create_future()
+            try:
+                result = await in_store(store.claim, key)
+                while result == IN_FLIGHT:
+                    # Another worker runs it; its claim row fills in when done
+                    if monotonic() >= deadline:
+                        raise _Rejected(409, "A request with this Idempotency-Key is still in progress")
+                    await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+                    result = await in_store(store.claim, key)
+            except BaseException:
+                self._finish(key, None)
+                raise
+            if not isinstance(result, StoredResponse):
+                return None  # CLAIMED: this request runs it
+            self._finish(key, result)
+            return result
+
+    def _finish(self, key: str, stored: Optional[StoredResponse]) -> None:
+        pending = self._in_flight.pop(key, None)
+        if pending is not None and not pending.done():
+            pending.set_result(stored)
+
+    async def _run(self, scope, receive, send, body: bytes, key: str, request_fingerprint: str) -> None:
+        """Run the claimed request, then store (or release) its response"""
+        store = idempotency_store
+        body_sent = False
+
+        async def receive_body():
+            nonlocal body_sent
+            if body_sent:
+                # Only the disconnect is left on the connection
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status_code = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        complete = False
+
+        async def send_and_capture(message):
+            nonlocal status_code, headers, complete
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, receive_body, send_and_capture)
+        finally:
+            try:
+                if complete and status_code < 500 and "route" in scope:
+                    stored = await in_store(
+                        store.complete, key, status_code, request_fingerprint, headers, b"".join(chunks)
+                    )
+                else:
+                    await in_store(store.release, key)
+            finally:
+                self._finish(key, stored)
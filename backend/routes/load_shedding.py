@@ -0,0 +1,82 @@
+"""
+Load shedding.
+
+Past its capacity a worker only gets slower: requests queue for pool
+connections until every one of them times out. ``LoadSheddingMiddleware``
+(plain ASGI) refuses new requests with 503 and ``Retry-After`` instead,
+while either
+
+- ``LOAD_SHED_MAX_IN_FLIGHT`` requests are already being served by this
+  worker, or
+- the oldest checkout waiting for a pool connection has waited
+  ``LOAD_SHED_POOL_WAIT`` seconds (see ``config.pool``)
+
+so the requests that are admitted keep a bounded latency. Health checks,
+``/metrics`` and the long-lived event stream are never shed nor counted.
+"""
+
+import os
+from typing import Callable, Optional
+from fastapi.responses import JSONResponse
+from sqlalchemy.pool import Pool
+from services.metrics import registry
+
+# Load shedding configuration
+LOAD_SHED_ENABLED = os.getenv("LOAD_SHED_ENABLED", "false").lower() == "true"
+# Requests served at once per worker
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv("LOAD_SHED_MAX_IN_FLIGHT", "64"))
+# Seconds a pool checkout may wait before new requests are refused (0 disables)
+LOAD_SHED_POOL_WAIT = float(os.getenv("LOAD_SHED_POOL_WAIT", "0.5"))
+LOAD_SHED_RETRY_AFTER = int(os.getenv("LOAD_SHED_RETRY_AFTER", "1"))
+
+EXEMPT_PREFIXES = ("/health", "/metrics", "/todos/events")
+
+SHED = registry.counter("http_requests_shed_total", "Requests refused with 503 under overload", ("reason",))
+
+class LoadSheddingMiddleware:
+    """ASGI middleware refusing requests while the worker is overloaded"""
+
+    def __init__(
+        self,
+        app,
+        pool: Callable[[], Pool],
+        max_in_flight: int = LOAD_SHED_MAX_IN_FLIGHT,
+        max_pool_wait: float = LOAD_SHED_POOL_WAIT,
+    ):
+        self.app = app
+        self.pool = pool
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        # Only touched on the event loop, so no lock
+        self.in_flight = 0
+
+    def overload(self) -> Optional[str]:
+        """Why new requests are refused right now, or None"""
+        if self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        longest_wait = getattr(self.pool(), "longest_wait", None)
+        if self.max_pool_wait > 0 and longest_wait is not None and longest_wait() >= self.max_pool_wait:
+            return "pool_wait"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.overload()
+        if reason is not None:
+            SHED.inc(reason)
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(LOAD_SHED_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,102 @@
+"""
+HTTP request metrics and the ``/metrics`` exposition.
+
+``MetricsMiddleware`` is plain ASGI (no per-request Request objects or
+extra tasks) and records, per route template:
+
+- ``http_requests_total`` by method, route and status code
+- ``http_request_duration_seconds`` latency histogram
+- ``http_requests_in_flight`` gauge
+- SQL statements and DB time per request, and ``db_n_plus_one_total``
+  when one statement repeats ``N_PLUS_ONE_THRESHOLD`` times or more
+"""
+
+from fastapi import Response
+from time import perf_counter
+from typing import Callable, List
+import logging
+from config.pool import pool_status
+from config.queries import N_PLUS_ONE_THRESHOLD, track_queries
+from services.metrics import CONTENT_TYPE, registry
+
+logger = logging.getLogger(__name__)
+
+# Route label of requests that matched no route (keeps label cardinality bounded)
+UNMATCHED_ROUTE = "unmatched"
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUESTS = registry.counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+LATENCY = registry.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests being served", ("method",))
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries", "SQL statements per HTTP request", ("route",), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = registry.histogram("http_request_db_seconds", "SQL time per HTTP request", ("route",))
+N_PLUS_ONE = registry.counter("db_n_plus_one_total", "Requests that repeated one statement N+1 style", ("route",))
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status codes and DB usage per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(method)
+        start = perf_counter()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                elapsed = perf_counter() - start
+                IN_FLIGHT.dec(method)
+                route = route_label(scope)
+                REQUESTS.inc(method, route, str(status))
+                LATENCY.observe(elapsed, method, route)
+                REQUEST_QUERIES.observe(queries.count, route)
+                if queries.count:
+                    REQUEST_DB_TIME.observe(queries.duration, route)
+                    repeated = queries.repeated(N_PLUS_ONE_THRESHOLD)
+                    if repeated:
+                        N_PLUS_ONE.inc(route)
+                        statement, count = repeated[0]
+                        logger.warning("Possible N+1 in %s %s: %d x %s", method, route, count, statement)
+
+def pool_collector(get_pool: Callable) -> Callable[[], List[str]]:
+    """Scrape-time gauges of a connection pool, from ``pool_status``"""
+
+    def collect() -> List[str]:
+        status = pool_status(get_pool())
+        lines = []
+        for key in ("size", "checked_out", "checked_in", "overflow"):
+            if key in status:
+                lines += [f"# TYPE db_pool_{key} gauge", f"db_pool_{key} {status[key]}"]
+        wait = status.get("wait_time")
+        if wait is not None:
+            lines.append("# TYPE db_pool_wait_seconds histogram")
+            lines += [f'db_pool_wait_seconds_bucket{{le="{bound}"}} {count}' for bound, count in wait["buckets"].items()]
+            lines += [f"db_pool_wait_seconds_sum {wait['sum']!r}", f"db_pool_wait_seconds_count {wait['count']}"]
+            lines += ["# TYPE db_pool_timeouts_total counter", f"db_pool_timeouts_total {wait['timeouts']}"]
+        return lines
+
+    return collect
+
+def metrics_response() -> Response:
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
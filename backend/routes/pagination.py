@@ -0,0 +1,75 @@
+"""
+Keyset (cursor) pagination helpers shared by the todo routers.
+"""
+
+from dataclasses import dataclass
+from fastapi import HTTPException, Query
+from typing import Dict, Optional
+import base64
+import binascii
+import json
+import os
+from crud.todo import TodoPage
+
+# Headers used to hand out keyset pagination cursors
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+# Sent with the applied page size when a larger limit was cut down to it
+PAGE_SIZE_CAPPED_HEADER = "X-Page-Size-Capped"
+
+# Largest page served; larger limits are cut down to it, deeper reads page with the cursors
+TODO_MAX_PAGE_SIZE = int(os.getenv("TODO_MAX_PAGE_SIZE", "1000"))
+
+@dataclass
+class PageParams:
+    """Validated pagination query parameters"""
+    skip: int
+    limit: int
+    after_id: Optional[int]
+    before_id: Optional[int]
+    # Set when the requested limit was above TODO_MAX_PAGE_SIZE
+    capped: bool = False
+
+def encode_cursor(todo_id: int) -> str:
+    """Build an opaque pagination cursor pointing at a todo id"""
+    payload = json.dumps({"id": todo_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """Read the todo id back from a cursor, raising 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        todo_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if not isinstance(todo_id, int):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return todo_id
+
+def page_params(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+) -> PageParams:
+    """Dependency parsing offset (skip/limit) and cursor (after/before) paging"""
+    if after is not None and before is not None:
+        raise HTTPException(status_code=400, detail="Use either 'after' or 'before', not both")
+    return PageParams(
+        skip=skip,
+        limit=min(limit, TODO_MAX_PAGE_SIZE),
+        after_id=decode_cursor(after) if after is not None else None,
+        before_id=decode_cursor(before) if before is not None else None,
+        capped=limit > TODO_MAX_PAGE_SIZE,
+    )
+
+def cursor_headers(page: TodoPage, params: Optional[PageParams] = None) -> Dict[str, str]:
+    """Cursors for the neighbouring pages (and the page size, if capped), sent as response headers"""
+    headers = {}
+    if params is not None and params.capped:
+        headers[PAGE_SIZE_CAPPED_HEADER] = str(params.limit)
+    if page.has_next and page.next_after is not None:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(page.next_after)
+    if page.has_prev and page.prev_before is not None:
+        headers[PREV_CURSOR_HEADER] = encode_cursor(page.prev_before)
+    return headers
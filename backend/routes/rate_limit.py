@@ -0,0 +1,118 @@
+"""
+Per-client rate limiting.
+
+``RateLimitMiddleware`` (plain ASGI) keeps a token bucket per client
+address, method and route template, so one client hammering
+``GET /todos`` does not use up its allowance for writes. Routes listed
+in ``RATE_LIMITS`` get their own limit; the rest use
+``RATE_LIMIT_PER_SECOND`` / ``RATE_LIMIT_BURST``. Over the limit the client
+gets 429 with ``Retry-After``. Health checks and ``/metrics`` are never
+limited.
+
+Buckets live in each worker (``MemoryRateLimitBackend``) unless
+``RATE_LIMIT_REDIS_URL`` points every worker at one shared Redis.
+"""
+
+import math
+import os
+from collections import OrderedDict
+from typing import Dict, Tuple
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.routing import Match
+from routes.metrics import UNMATCHED_ROUTE
+from services.metrics import registry
+from services.rate_limit import MemoryRateLimitBackend, RateLimit, RateLimitBackend, RedisRateLimitBackend
+
+# Rate limit configuration
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+# Sustained requests per second and burst size per client, method and route
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "100"))
+# Clients tracked per worker by the in-memory backend
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+# Shared buckets for all workers (needs the redis package); empty keeps them per worker
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+# Take the client address from X-Forwarded-For (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# Request paths whose route template is remembered (bounded: paths carry ids)
+RATE_LIMIT_ROUTE_CACHE_SIZE = int(os.getenv("RATE_LIMIT_ROUTE_CACHE_SIZE", "4096"))
+
+DEFAULT_RATE_LIMIT = RateLimit(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+# (method, route template) -> limit; unlisted routes get DEFAULT_RATE_LIMIT
+RATE_LIMITS: Dict[Tuple[str, str], RateLimit] = {
+    # Each call streams the whole table
+    ("GET", "/todos/export"): RateLimit(1, 5),
+    ("POST", "/todos/import"): RateLimit(1, 5),
+}
+
+EXEMPT_PREFIXES = ("/health", "/metrics")
+
+RATE_LIMITED = registry.counter("http_requests_rate_limited_total", "Requests refused with 429", ("route",))
+
+def create_backend() -> RateLimitBackend:
+    if RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitBackend(RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitBackend(max_keys=RATE_LIMIT_MAX_CLIENTS)
+
+rate_limit_backend: RateLimitBackend = create_backend()
+
+def match_route(scope: dict) -> str:
+    """Template of the route that will serve the request (routing has not run yet)"""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+def client_address(scope: dict) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def retry_after(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 to clients over their token bucket"""
+
+    def __init__(self, app):
+        self.app = app
+        # (method, path, root_path) -> route template, least recently used first
+        self._routes: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+
+    def route(self, scope: dict) -> str:
+        """``match_route``, walking the route table once per distinct request line"""
+        key = (scope["method"], scope["path"], scope.get("root_path", ""))
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = match_route(scope)
+            if len(self._routes) > RATE_LIMIT_ROUTE_CACHE_SIZE:
+                self._routes.popitem(last=False)
+        else:
+            self._routes.move_to_end(key)
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        method = "GET" if scope["method"] == "HEAD" else scope["method"]
+        route = self.route(scope)
+        limit = RATE_LIMITS.get((method, route), DEFAULT_RATE_LIMIT)
+        decision = await rate_limit_backend.acquire((client_address(scope), method, route), limit)
+        if decision.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc(route)
+        response = JSONResponse(
+            {"detail": "Too many requests"}, status_code=429, headers={"Retry-After": retry_after(decision.retry_after)}
+        )
+        await response(scope, receive, send)
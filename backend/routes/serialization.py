@@ -0,0 +1,70 @@
+"""
+Fast JSON serialization of todo rows.
+
+List endpoints fetch plain column tuples and dump them through a pre-built
+``TypeAdapter`` over a ``TypedDict`` that mirrors ``models.schemas.Todo``.
+This skips per-row model validation and FastAPI's generic encoder while
+producing the same JSON the ``Todo`` response model would.
+
+Sparse fieldsets (``fields=``) get their own adapter over the subset of
+``TodoRow``, built once per distinct field set.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+from pydantic import TypeAdapter
+from typing import Any, List, Optional, Sequence, Tuple
+from typing_extensions import TypedDict
+from models.schemas import TodoSummary
+
+class TodoRow(TypedDict):
+    """Serialized shape of models.schemas.Todo (same field order)"""
+    title: str
+    description: Optional[str]
+    completed: bool
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+TODO_FIELDS = tuple(TodoRow.__annotations__)
+# The compact list projection
+SUMMARY_FIELDS = tuple(TodoSummary.model_fields)
+
+def _row_type(fields: Tuple[str, ...]) -> Any:
+    """TodoRow, or a TypedDict of the field subset (built at runtime, so untyped)"""
+    if fields == TODO_FIELDS:
+        return TodoRow
+    return TypedDict("TodoRowFields", {key: TodoRow.__annotations__[key] for key in fields})  # type: ignore[operator]
+
+@lru_cache(maxsize=None)
+def _adapters(fields: Tuple[str, ...]) -> Tuple[TypeAdapter, TypeAdapter]:
+    """List and single-row adapters for a field subset (in TodoRow order)"""
+    row_type = _row_type(fields)
+    return TypeAdapter(List[row_type]), TypeAdapter(row_type)  # type: ignore[valid-type]
+
+def _as_dict(todo: Any, fields: Sequence[str]) -> dict:
+    """Map a Row, dict or ORM object to the requested keys, in schema order"""
+    if isinstance(todo, dict):
+        return {key: todo[key] for key in fields}
+    mapping = getattr(todo, "_mapping", None)
+    if mapping is not None:
+        return {key: mapping[key] for key in fields}
+    return {key: getattr(todo, key) for key in fields}
+
+def dump_todos(todos: Sequence[Any], fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    """Serialize todo rows to a JSON array, limited to ``fields`` if given"""
+    fields = fields or TODO_FIELDS
+    rows_adapter = _adapters(fields)[0]
+    if todos and hasattr(todos[0], "_fields"):
+        # Rows of one result share a layout: pick the columns positionally
+        getter = itemgetter(*(todos[0]._fields.index(key) for key in fields))
+        if len(fields) == 1:
+            return rows_adapter.dump_json([{fields[0]: getter(row)} for row in todos])
+        return rows_adapter.dump_json([dict(zip(fields, getter(row))) for row in todos])
+    return rows_adapter.dump_json([_as_dict(todo, fields) for todo in todos])
+
+def dump_todo(todo: Any, fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    """Serialize a single todo row to a JSON object, limited to ``fields`` if given"""
+    fields = fields or TODO_FIELDS
+    return _adapters(fields)[1].dump_json(_as_dict(todo, fields))
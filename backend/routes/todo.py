@@ -1,58 +1,190 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from models.todo import Todo as TodoModel
-from models.schemas import Todo, TodoCreate, TodoUpdate
-from config.database import get_db
+from typing import List, Literal, Optional, Tuple
+from crud import stats as crud_stats, todo as crud
+from crud.todo import TodoFilter
+from models.schemas import Todo, TodoBulkDelete, TodoBulkResult, TodoBulkUpdate, TodoCreate, TodoImportResult, TodoStats, TodoUpdate
+from config.database import get_db, get_read_db
+from routes import batching, bulk, caching, changes, conditional, export
+from routes.fields import todo_fields_params
+from routes.filters import todo_filter_params
+from routes.pagination import PageParams, cursor_headers, page_params
+from routes.serialization import dump_todos
+from services.todo_import import ImportFormat, TodoImporter
 
 router = APIRouter(prefix="/todos", tags=["todos"])
 
 @router.get("/", response_model=List[Todo])
-def get_todos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all todos with pagination"""
-    todos = db.query(TodoModel).offset(skip).limit(limit).all()
-    return todos
+def get_todos(
+    request: Request,
+    page: PageParams = Depends(page_params),
+    todo_filter: TodoFilter = Depends(todo_filter_params),
+    fields: Optional[Tuple[str, ...]] = Depends(todo_fields_params),
+    db: Session = Depends(get_read_db),
+):
+    """Get todos with filtering, search, sorting and pagination.
+
+    Todos are ordered by id unless ``sort`` says otherwise. When sorted by
+    id, pass the ``X-Next-Cursor`` response header as ``after`` (or
+    ``X-Prev-Cursor`` as ``before``) to fetch the neighbouring page with
+    constant cost, however deep it is. ``fields=summary`` (or a field list)
+    loads and returns only those fields.
+    """
+    cached = caching.lookup(request, caching.page_key(request))
+    if cached is not None:
+        return cached
+
+    generation = caching.generation(request)
+    result = crud.list_todos(db, page.skip, page.limit, page.after_id, page.before_id, todo_filter, fields)
+    body = dump_todos(result.items, fields)
+    headers = conditional.page_headers(body, cursor_headers(result, page))
+    return conditional.not_modified(request, headers) or caching.store_page(
+        request, result, body, page.skip, not todo_filter.is_default(), headers, generation
+    )
+
+@router.get("/stats", response_model=TodoStats)
+def get_stats(days: int = Query(30, ge=1, le=366, description="Days of creation history"), db: Session = Depends(get_read_db)):
+    """Total, completed and pending counts plus todos created per day.
+
+    Read from counters the write endpoints keep up to date, so the cost does
+    not depend on the number of todos.
+    """
+    return crud_stats.get_stats(db, days)
+
+@router.get("/export")
+def export_todos(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    todo_filter: TodoFilter = Depends(export.export_filter_params),
+):
+    """Stream every matching todo as NDJSON or CSV with flat memory use"""
+    return StreamingResponse(
+        export.iter_export(format, todo_filter),
+        media_type=export.MEDIA_TYPES[format],
+        headers=export.content_disposition(format),
+    )
+
+@router.get("/events")
+async def todo_events(
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Stream created/updated/deleted todo events as Server-Sent Events.
+
+    Reconnecting EventSource clients resume from ``Last-Event-ID``; a
+    ``reset`` event means the gap could not be replayed and the list
+    should be reloaded.
+    """
+    return changes.event_response(last_event_id_header or last_event_id)
+
+@router.post("/import", response_model=TodoImportResult)
+async def import_todos(request: Request, format: ImportFormat = "ndjson", db: Session = Depends(get_db)):
+    """Load todos from an NDJSON or CSV request body as it streams in.
+
+    Rows are validated and written in chunks (COPY on PostgreSQL); invalid
+    rows are reported by line number and do not stop the load.
+    """
+    importer = TodoImporter(format)
+    try:
+        async for data in request.stream():
+            for batch in await run_in_threadpool(importer.feed, data):
+                await run_in_threadpool(importer.load, db, batch)
+        for batch in importer.finish():
+            await run_in_threadpool(importer.load, db, batch)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import body must be UTF-8")
+    finally:
+        if importer.imported:
+            caching.invalidate_created()
+            changes.publish_imported(importer.imported)
+    return importer.result()
+
+@router.post("/bulk", response_model=TodoBulkResult)
+def bulk_create_todos(todos: List[TodoCreate], db: Session = Depends(get_db)):
+    """Create many todos in one transaction with a multi-row INSERT"""
+    bulk.check_batch_size(len(todos))
+    rows = crud.bulk_create_todos(db, [todo.model_dump() for todo in todos])
+    caching.invalidate_created()
+    changes.publish_created(rows)
+    return bulk.created_result(rows)
+
+@router.patch("/bulk", response_model=TodoBulkResult)
+def bulk_update_todos(todos: List[TodoBulkUpdate], db: Session = Depends(get_db)):
+    """Partially update many todos in one transaction"""
+    bulk.check_batch_size(len(todos))
+    rows = crud.bulk_update_todos(db, bulk.update_payload(todos))
+    caching.invalidate_updated(rows)
+    changes.publish_updated(rows.values())
+    return bulk.updated_result([todo.id for todo in todos], rows)
+
+@router.delete("/bulk", response_model=TodoBulkResult)
+def bulk_delete_todos(payload: TodoBulkDelete, db: Session = Depends(get_db)):
+    """Delete many todos with a single DELETE ... WHERE id IN (...)"""
+    bulk.check_batch_size(len(payload.ids))
+    deleted = crud.bulk_delete_todos(db, payload.ids)
+    caching.invalidate_deleted(deleted)
+    changes.publish_deleted(sorted(deleted))
+    return bulk.deleted_result(payload.ids, deleted)
 
 @router.get("/{todo_id}", response_model=Todo)
-def get_todo(todo_id: int, db: Session = Depends(get_db)):
-    """Get a specific todo by ID"""
-    todo = db.query(TodoModel).filter(TodoModel.id == todo_id).first()
+def get_todo(
+    todo_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[Tuple[str, ...]] = Depends(todo_fields_params),
+    db: Session = Depends(get_read_db),
+):
+    """Get a specific todo by ID (``fields`` limits the fields returned)"""
+    cached = caching.lookup(request, caching.item_key(todo_id, fields))
+    if cached is not None:
+        return cached
+
+    generation = caching.generation(request)
+    todo = caching.todo_reads.do(caching.read_key(request, todo_id, fields), crud.find_todo, db, todo_id, fields)
     if todo is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-    return todo
+    headers = conditional.todo_headers(todo, fields)
+    return conditional.not_modified(request, headers) or caching.store_todo(
+        response, todo_id, todo, headers, generation, fields
+    )
 
 @router.post("/", response_model=Todo)
-def create_todo(todo: TodoCreate, db: Session = Depends(get_db)):
+def create_todo(todo: TodoCreate, response: Response, db: Session = Depends(get_db)):
     """Create a new todo"""
-    db_todo = TodoModel(**todo.model_dump())
-    db.add(db_todo)
-    db.commit()
-    db.refresh(db_todo)
-    return db_todo
+    created = crud.create_todo(db, todo.model_dump())
+    caching.invalidate_created()
+    changes.publish_created([created])
+    response.headers.update(conditional.todo_headers(created))
+    return created
 
 @router.put("/{todo_id}", response_model=Todo)
-def update_todo(todo_id: int, todo_update: TodoUpdate, db: Session = Depends(get_db)):
-    """Update an existing todo"""
-    todo = db.query(TodoModel).filter(TodoModel.id == todo_id).first()
+def update_todo(todo_id: int, todo_update: TodoUpdate, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Update an existing todo (send If-Match for optimistic concurrency)"""
+    if conditional.if_match_requested(request):
+        conditional.check_if_match(request, crud.lock_todo(db, todo_id))
+
+    # Update only provided fields, group-committed with concurrent updates when batching
+    data = todo_update.model_dump(exclude_unset=True)
+    if batching.batched(request, data):
+        todo = batching.update_todo(db, todo_id, data)
+    else:
+        todo = crud.update_todo(db, todo_id, data)
     if todo is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-
-    # Update only provided fields
-    update_data = todo_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(todo, field, value)
-
-    db.commit()
-    db.refresh(todo)
+    caching.invalidate_updated([todo_id])
+    changes.publish_updated([todo])
+    response.headers.update(conditional.todo_headers(todo))
     return todo
 
 @router.delete("/{todo_id}")
-def delete_todo(todo_id: int, db: Session = Depends(get_db)):
-    """Delete a todo"""
-    todo = db.query(TodoModel).filter(TodoModel.id == todo_id).first()
-    if todo is None:
-        raise HTTPException(status_code=404, detail="Todo not found")
+def delete_todo(todo_id: int, request: Request, db: Session = Depends(get_db)):
+    """Delete a todo (send If-Match for optimistic concurrency)"""
+    if conditional.if_match_requested(request):
+        conditional.check_if_match(request, crud.lock_todo(db, todo_id))
 
-    db.delete(todo)
-    db.commit()
-    return {"message": "Todo deleted successfully"}
\ No newline at end of file
+    if not crud.delete_todo(db, todo_id):
+        raise HTTPException(status_code=404, detail="Todo not found")
+    caching.invalidate_deleted([todo_id])
+    changes.publish_deleted([todo_id])
+    return {"message": "Todo deleted successfully"}
@@ -0,0 +1,201 @@
+"""
+Async versions of the todo CRUD routes.
+
+Used instead of ``routes.todo`` when ``DB_ASYNC`` is enabled. Handlers run on
+the event loop and reuse the ``crud`` functions through
+``AsyncSession.run_sync``, so no threadpool slot is held during DB I/O.
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Tuple
+from crud import stats as crud_stats, todo as crud
+from crud.todo import TodoFilter
+from models.schemas import Todo, TodoBulkDelete, TodoBulkResult, TodoBulkUpdate, TodoCreate, TodoImportResult, TodoStats, TodoUpdate
+from config.database import get_async_db, get_async_read_db
+from routes import batching, bulk, caching, changes, conditional, export
+from routes.fields import todo_fields_params
+from routes.filters import todo_filter_params
+from routes.pagination import PageParams, cursor_headers, page_params
+from routes.serialization import dump_todos
+from services.todo_import import ImportFormat, TodoImporter
+
+router = APIRouter(prefix="/todos", tags=["todos"])
+
+@router.get("/", response_model=List[Todo])
+async def get_todos(
+    request: Request,
+    page: PageParams = Depends(page_params),
+    todo_filter: TodoFilter = Depends(todo_filter_params),
+    fields: Optional[Tuple[str, ...]] = Depends(todo_fields_params),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Get todos with filtering, search, sorting and pagination.
+
+    Todos are ordered by id unless ``sort`` says otherwise. When sorted by
+    id, pass the ``X-Next-Cursor`` response header as ``after`` (or
+    ``X-Prev-Cursor`` as ``before``) to fetch the neighbouring page with
+    constant cost, however deep it is. ``fields=summary`` (or a field list)
+    loads and returns only those fields.
+    """
+    cached = caching.lookup(request, caching.page_key(request))
+    if cached is not None:
+        return cached
+
+    generation = caching.generation(request)
+    result = await db.run_sync(
+        crud.list_todos, page.skip, page.limit, page.after_id, page.before_id, todo_filter, fields
+    )
+    body = dump_todos(result.items, fields)
+    headers = conditional.page_headers(body, cursor_headers(result, page))
+    return conditional.not_modified(request, headers) or caching.store_page(
+        request, result, body, page.skip, not todo_filter.is_default(), headers, generation
+    )
+
+@router.get("/stats", response_model=TodoStats)
+async def get_stats(days: int = Query(30, ge=1, le=366, description="Days of creation history"), db: AsyncSession = Depends(get_async_read_db)):
+    """Total, completed and pending counts plus todos created per day.
+
+    Read from counters the write endpoints keep up to date, so the cost does
+    not depend on the number of todos.
+    """
+    return await db.run_sync(crud_stats.get_stats, days)
+
+@router.get("/export")
+async def export_todos(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    todo_filter: TodoFilter = Depends(export.export_filter_params),
+):
+    """Stream every matching todo as NDJSON or CSV with flat memory use"""
+    return StreamingResponse(
+        export.aiter_export(format, todo_filter),
+        media_type=export.MEDIA_TYPES[format],
+        headers=export.content_disposition(format),
+    )
+
+@router.get("/events")
+async def todo_events(
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Stream created/updated/deleted todo events as Server-Sent Events.
+
+    Reconnecting EventSource clients resume from ``Last-Event-ID``; a
+    ``reset`` event means the gap could not be replayed and the list
+    should be reloaded.
+    """
+    return changes.event_response(last_event_id_header or last_event_id)
+
+@router.post("/import", response_model=TodoImportResult)
+async def import_todos(request: Request, format: ImportFormat = "ndjson", db: AsyncSession = Depends(get_async_db)):
+    """Load todos from an NDJSON or CSV request body as it streams in.
+
+    Rows are validated and written in chunks (COPY on PostgreSQL); invalid
+    rows are reported by line number and do not stop the load.
+    """
+    importer = TodoImporter(format)
+    try:
+        async for data in request.stream():
+            for batch in await run_in_threadpool(importer.feed, data):
+                await db.run_sync(importer.load, batch)
+        for batch in importer.finish():
+            await db.run_sync(importer.load, batch)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import body must be UTF-8")
+    finally:
+        if importer.imported:
+            caching.invalidate_created()
+            changes.publish_imported(importer.imported)
+    return importer.result()
+
+@router.post("/bulk", response_model=TodoBulkResult)
+async def bulk_create_todos(todos: List[TodoCreate], db: AsyncSession = Depends(get_async_db)):
+    """Create many todos in one transaction with a multi-row INSERT"""
+    bulk.check_batch_size(len(todos))
+    rows = await db.run_sync(crud.bulk_create_todos, [todo.model_dump() for todo in todos])
+    caching.invalidate_created()
+    changes.publish_created(rows)
+    return bulk.created_result(rows)
+
+@router.patch("/bulk", response_model=TodoBulkResult)
+async def bulk_update_todos(todos: List[TodoBulkUpdate], db: AsyncSession = Depends(get_async_db)):
+    """Partially update many todos in one transaction"""
+    bulk.check_batch_size(len(todos))
+    rows = await db.run_sync(crud.bulk_update_todos, bulk.update_payload(todos))
+    caching.invalidate_updated(rows)
+    changes.publish_updated(rows.values())
+    return bulk.updated_result([todo.id for todo in todos], rows)
+
+@router.delete("/bulk", response_model=TodoBulkResult)
+async def bulk_delete_todos(payload: TodoBulkDelete, db: AsyncSession = Depends(get_async_db)):
+    """Delete many todos with a single DELETE ... WHERE id IN (...)"""
+    bulk.check_batch_size(len(payload.ids))
+    deleted = await db.run_sync(crud.bulk_delete_todos, payload.ids)
+    caching.invalidate_deleted(deleted)
+    changes.publish_deleted(sorted(deleted))
+    return bulk.deleted_result(payload.ids, deleted)
+
+@router.get("/{todo_id}", response_model=Todo)
+async def get_todo(
+    todo_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[Tuple[str, ...]] = Depends(todo_fields_params),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Get a specific todo by ID (``fields`` limits the fields returned)"""
+    cached = caching.lookup(request, caching.item_key(todo_id, fields))
+    if cached is not None:
+        return cached
+
+    generation = caching.generation(request)
+    todo = await caching.async_todo_reads.do(
+        caching.read_key(request, todo_id, fields), db.run_sync, crud.find_todo, todo_id, fields
+    )
+    if todo is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+    headers = conditional.todo_headers(todo, fields)
+    return conditional.not_modified(request, headers) or caching.store_todo(
+        response, todo_id, todo, headers, generation, fields
+    )
+
+@router.post("/", response_model=Todo)
+async def create_todo(todo: TodoCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Create a new todo"""
+    created = await db.run_sync(crud.create_todo, todo.model_dump())
+    caching.invalidate_created()
+    changes.publish_created([created])
+    response.headers.update(conditional.todo_headers(created))
+    return created
+
+@router.put("/{todo_id}", response_model=Todo)
+async def update_todo(todo_id: int, todo_update: TodoUpdate, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Update an existing todo (send If-Match for optimistic concurrency)"""
+    if conditional.if_match_requested(request):
+        conditional.check_if_match(request, await db.run_sync(crud.lock_todo, todo_id))
+
+    data = todo_update.model_dump(exclude_unset=True)
+    if batching.batched(request, data):
+        todo = await batching.update_todo_async(todo_id, data)
+    else:
+        todo = await db.run_sync(crud.update_todo, todo_id, data)
+    if todo is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+    caching.invalidate_updated([todo_id])
+    changes.publish_updated([todo])
+    response.headers.update(conditional.todo_headers(todo))
+    return todo
+
+@router.delete("/{todo_id}")
+async def delete_todo(todo_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Delete a todo (send If-Match for optimistic concurrency)"""
+    if conditional.if_match_requested(request):
+        conditional.check_if_match(request, await db.run_sync(crud.lock_todo, todo_id))
+
+    if not await db.run_sync(crud.delete_todo, todo_id):
+        raise HTTPException(status_code=404, detail="Todo not found")
+    caching.invalidate_deleted([todo_id])
+    changes.publish_deleted([todo_id])
+    return {"message": "Todo deleted successfully"}
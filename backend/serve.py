@@ -0,0 +1,87 @@
+"""
+Server entry point for production and development.
+
+Production (default) runs ``WEB_CONCURRENCY`` uvicorn worker processes
+(one per CPU unless set) under uvicorn's supervisor, which restarts
+crashed workers and drains them on SIGTERM, with uvloop and httptools.
+Each worker runs the ``main.py`` lifespan and owns its own connection
+pool, so the database sees up to
+``WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`` connections.
+
+Development keeps the single auto-reloading process.
+
+Workers do not create the schema; run ``python migrate.py`` once per deploy
+(or pass ``--migrate`` to do it here before the workers start).
+
+Usage (from the backend directory):
+    python serve.py             # production: multi-worker, no reload
+    python serve.py --reload    # development: one worker, reload on change
+    python serve.py --migrate   # create missing tables first, then serve
+"""
+
+import argparse
+import os
+import uvicorn
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+# Server configuration
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = env_int("PORT", 8000)
+WEB_CONCURRENCY = env_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+# Keep idle client connections (and proxy upstream connections) open this long
+KEEPALIVE_TIMEOUT = env_int("KEEPALIVE_TIMEOUT", 75)
+# Pending connections queued by the kernel before accept()
+BACKLOG = env_int("BACKLOG", 2048)
+# Seconds in-flight requests get to finish on shutdown
+GRACEFUL_TIMEOUT = env_int("GRACEFUL_TIMEOUT", 30)
+# Recycle a worker after this many requests (0 disables) to bound slow leaks
+MAX_REQUESTS = env_int("MAX_REQUESTS", 0)
+# Per-request access logging costs throughput; metrics cover request counts
+ACCESS_LOG = os.getenv("ACCESS_LOG", "false").lower() == "true"
+# Proxies trusted for X-Forwarded-* headers
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+def server_options(reload: bool = False, workers: int = WEB_CONCURRENCY) -> dict:
+    """Keyword arguments for ``uvicorn.run``"""
+    options = {
+        "host": HOST,
+        "port": PORT,
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "backlog": BACKLOG,
+        "timeout_keep_alive": KEEPALIVE_TIMEOUT,
+        "timeout_graceful_shutdown": GRACEFUL_TIMEOUT,
+        "proxy_headers": True,
+        "forwarded_allow_ips": FORWARDED_ALLOW_IPS,
+    }
+    if reload:
+        # The reloader supervises a single process
+        options.update(reload=True, loop="auto", http="auto")
+    else:
+        options.update(workers=max(workers, 1), access_log=ACCESS_LOG)
+        if MAX_REQUESTS:
+            options["limit_max_requests"] = MAX_REQUESTS
+    return options
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reload", action="store_true", default=os.getenv("RELOAD", "false").lower() == "true",
+                        help="development mode: one process, reload on code changes")
+    parser.add_argument("--migrate", action="store_true", help="create missing tables before starting the workers")
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY, help="worker processes (default: WEB_CONCURRENCY)")
+    args = parser.parse_args()
+
+    if args.migrate:
+        # Once here, not concurrently in every worker's lifespan
+        from config.database import engine
+        from migrate import create_schema
+        create_schema(engine)
+        engine.dispose()
+
+    uvicorn.run("main:app", **server_options(reload=args.reload, workers=args.workers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Response cache backends.
+
+``CacheBackend`` is the interface the routes talk to; ``MemoryCacheBackend``
+is a bounded, TTL-evicting LRU kept in the worker process. A shared store
+(Redis, memcached, ...) can be plugged in by implementing the same methods.
+
+Entries carry tags so writes can invalidate exactly the responses that
+contain a changed row. A generation counter guards against a slow reader
+storing data it fetched before a concurrent write was invalidated.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from time import monotonic
+from typing import Dict, Hashable, Iterable, Optional, Set
+
+@dataclass
+class CachedResponse:
+    """A serialized JSON response body plus the headers that go with it"""
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+class CacheBackend(ABC):
+    """Interface of a tagged response cache"""
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """Return the cached entry, or None on a miss"""
+
+    @abstractmethod
+    def set(self, key: Hashable, value: CachedResponse, tags: Iterable[Hashable], generation: int) -> None:
+        """Store an entry unless an invalidation happened since ``generation``"""
+
+    @abstractmethod
+    def generation(self) -> int:
+        """Current invalidation generation, read before loading from the DB"""
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[Hashable]) -> None:
+        """Drop every entry carrying one of the tags"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry"""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters"""
+
+class MemoryCacheBackend(CacheBackend):
+    """Thread-safe in-process LRU cache with a TTL per entry"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._generation = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= monotonic():
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tags, generation):
+        tags = frozenset(tags)
+        with self._lock:
+            if generation != self._generation:
+                # A write landed while this response was being built
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def invalidate(self, tags):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": type(self).__name__,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
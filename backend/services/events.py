@@ -0,0 +1,345 @@
+"""
+Change-event brokers for the todo change feed.
+
+``EventBroker`` is the interface the routes talk to. ``MemoryBroker`` fans
+events out to the subscribers of one worker process; ``PostgresBroker``
+sends every event through ``NOTIFY`` and delivers what its ``LISTEN``
+connection receives, so all uvicorn workers see all writes, in commit order.
+
+Each broker keeps the most recent events in a ring buffer so a client that
+reconnects with its last event id gets what it missed. Event ids are
+microsecond timestamps assigned by the publishing worker; they are unique
+and increase per worker, and replay resumes from the position of the last
+id in the buffer, which is the same in every worker. Listeners added with
+``add_listener`` see every event the worker delivers, subscribers or not.
+
+When the ``LISTEN`` connection drops (a database restart, a network
+blip), ``PostgresBroker`` reconnects with exponential backoff and then
+delivers a ``reset`` event locally: whatever was notified in between is
+lost, so clients reload and caches forget what they hold.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock, Thread
+from time import time_ns
+from typing import Any, Callable, Deque, List, Optional, Set
+import asyncio
+import json
+import logging
+import queue
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must stay below 8000 bytes
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+# Delivered when events may have been missed; receivers reload their state
+RESET = "reset"
+
+@dataclass
+class ChangeEvent:
+    """One change: its id, type and JSON-encoded data"""
+    id: int
+    type: str
+    data: bytes
+
+    def to_json(self) -> str:
+        return json.dumps({"id": self.id, "type": self.type, "data": self.data.decode()})
+
+    @classmethod
+    def from_json(cls, payload: str) -> "ChangeEvent":
+        value = json.loads(payload)
+        return cls(id=value["id"], type=value["type"], data=value["data"].encode())
+
+@dataclass(eq=False)
+class Subscription:
+    """A subscriber's queue, plus the buffered events it asked to replay.
+
+    ``reset`` is set when the requested id is no longer buffered, so the
+    client should reload its state instead of expecting a gap-free replay.
+    """
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    backlog: List[ChangeEvent] = field(default_factory=list)
+    reset: bool = False
+    overflowed: bool = False
+
+class EventBroker(ABC):
+    """Interface of a change-event broker"""
+
+    _listeners: List[Callable[[ChangeEvent], None]]
+
+    @abstractmethod
+    def publish(self, event_type: str, data: bytes) -> ChangeEvent:
+        """Publish an event; safe to call from any thread and never blocks on I/O"""
+
+    @abstractmethod
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """Register a subscriber on the running event loop"""
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering to a subscriber"""
+
+    async def start(self) -> None:
+        """Acquire background resources (called from the app lifespan)"""
+
+    async def stop(self) -> None:
+        """Release background resources"""
+
+    def start_sender(self) -> None:
+        """Send published events to the API workers from a process that does
+        not serve the feed (a job); nothing to do for an in-process broker"""
+
+    def stop_sender(self) -> None:
+        """Flush and stop what ``start_sender`` started"""
+
+    def add_listener(self, listener: Callable[[ChangeEvent], None]) -> None:
+        """Call ``listener`` with every event this worker delivers, from any worker"""
+        self._listeners.append(listener)
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Subscriber and event counters"""
+
+class MemoryBroker(EventBroker):
+    """In-process broker: delivers events to subscribers of this worker only"""
+
+    def __init__(self, buffer_size: int = 1000, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._buffer: Deque[ChangeEvent] = deque(maxlen=buffer_size)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = Lock()
+        self._last_id = 0
+        self._published = 0
+        self._dropped = 0
+        self._listeners = []
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._last_id = max(self._last_id + 1, time_ns() // 1000)
+            return self._last_id
+
+    def publish(self, event_type: str, data: bytes) -> ChangeEvent:
+        event = ChangeEvent(id=self.next_id(), type=event_type, data=data)
+        self.deliver(event)
+        return event
+
+    def deliver(self, event: ChangeEvent) -> None:
+        """Buffer an event and hand it to every subscriber"""
+        with self._lock:
+            self._published += 1
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for listener in self._listeners:
+            listener(event)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(self._enqueue, subscription, event)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                self.unsubscribe(subscription)
+
+    def _enqueue(self, subscription: Subscription, event: ChangeEvent) -> None:
+        if subscription.overflowed:
+            return
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client that cannot keep up is told to reload rather than
+            # letting its queue grow without bound
+            subscription.overflowed = True
+            self._dropped += 1
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(None)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(queue=asyncio.Queue(self.queue_size), loop=asyncio.get_running_loop())
+        with self._lock:
+            # Registering and snapshotting under one lock: nothing is missed or sent twice
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                subscription.backlog, subscription.reset = self._replay(last_event_id)
+        return subscription
+
+    def _replay(self, last_event_id: int):
+        events = list(self._buffer)
+        for position, event in enumerate(events):
+            if event.id == last_event_id:
+                return events[position + 1 :], False
+        if events and last_event_id >= events[0].id:
+            # Unknown id inside the buffered range: fall back to id order
+            return [event for event in events if event.id > last_event_id], False
+        # Older than anything buffered, or buffered by a process since restarted
+        return [], True
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "broker": type(self).__name__,
+                "subscribers": len(self._subscribers),
+                "buffered": len(self._buffer),
+                "published": self._published,
+                "dropped_subscribers": self._dropped,
+            }
+
+class PostgresBroker(MemoryBroker):
+    """Fans events out across workers with PostgreSQL LISTEN/NOTIFY.
+
+    ``publish`` only queues the event; a sender thread issues the NOTIFYs on
+    its own connection, so write handlers never wait on the fan-out. Events
+    reach local subscribers through the LISTEN connection like everyone
+    else's, which keeps their order identical in every worker. Until
+    ``start`` runs (or after ``stop``), events are delivered in-process only.
+    """
+
+    def __init__(
+        self,
+        engine_factory: Callable,
+        channel: str = "todo_events",
+        reconnect_delay: float = 0.5,
+        reconnect_max_delay: float = 30.0,
+        **options,
+    ):
+        super().__init__(**options)
+        self.engine_factory = engine_factory
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self._outbox: "queue.SimpleQueue[Optional[ChangeEvent]]" = queue.SimpleQueue()
+        self._sender: Optional[Thread] = None
+        # The LISTEN connection (psycopg2, detached from the pool)
+        self._listener: Any = None
+        self._reconnecting: Optional[asyncio.Task] = None
+        self._reconnects = 0
+
+    def publish(self, event_type: str, data: bytes) -> ChangeEvent:
+        event = ChangeEvent(id=self.next_id(), type=event_type, data=data)
+        if self._sender is None:
+            self.deliver(event)
+        else:
+            self._outbox.put(event)
+        return event
+
+    async def start(self) -> None:
+        self._watch(self._listen())
+        self.start_sender()
+
+    async def stop(self) -> None:
+        await asyncio.to_thread(self.stop_sender)
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            self._reconnecting = None
+        self._unwatch()
+
+    def _listen(self):
+        """Open a connection and LISTEN on the channel (blocking)"""
+        listener = _autocommit_connection(self.engine_factory())
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return listener
+
+    def _watch(self, listener) -> None:
+        self._listener = listener
+        asyncio.get_running_loop().add_reader(listener.driver_connection.fileno(), self._on_notify)
+
+    def _unwatch(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(listener.driver_connection.fileno())
+        except Exception:
+            pass  # The socket is gone already
+        try:
+            listener.close()
+        except Exception:
+            pass
+
+    async def _reconnect(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                listener = await asyncio.to_thread(self._listen)
+            except Exception as exc:
+                logger.warning("Todo events LISTEN reconnect failed, retrying in %.1fs: %s", delay, exc)
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+            self._watch(listener)
+            self._reconnecting = None
+            self._reconnects += 1
+            logger.info("Todo events LISTEN connection restored")
+            # NOTIFYs sent while disconnected are gone for good
+            self.deliver(ChangeEvent(id=self.next_id(), type=RESET, data=b"{}"))
+            return
+
+    def start_sender(self) -> None:
+        self._sender = Thread(target=self._send, args=(self.engine_factory(),), name="todo-events-notify", daemon=True)
+        self._sender.start()
+
+    def stop_sender(self) -> None:
+        if self._sender is not None:
+            self._outbox.put(None)
+            self._sender.join()
+            self._sender = None
+
+    def _on_notify(self) -> None:
+        from psycopg2 import InterfaceError, OperationalError  # type: ignore[import-untyped]
+        connection = self._listener.driver_connection
+        try:
+            connection.poll()
+        except (OperationalError, InterfaceError) as exc:
+            logger.warning("Todo events LISTEN connection lost, reconnecting: %s", exc)
+            self._unwatch()
+            self._reconnecting = asyncio.get_running_loop().create_task(self._reconnect())
+            return
+        while connection.notifies:
+            notify = connection.notifies.pop(0)
+            try:
+                self.deliver(ChangeEvent.from_json(notify.payload))
+            except (ValueError, KeyError):
+                logger.warning("Ignoring malformed todo event: %r", notify.payload)
+
+    def _send(self, engine) -> None:
+        connection = None
+        while True:
+            event = self._outbox.get()
+            if event is None:
+                break
+            payload = event.to_json()
+            if len(payload) > NOTIFY_PAYLOAD_LIMIT:
+                # Too big for NOTIFY: send the id only, clients fetch the rest
+                payload = ChangeEvent(event.id, event.type, _id_only(event.data)).to_json()
+            try:
+                if connection is None:
+                    connection = _autocommit_connection(engine)
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except Exception:
+                logger.exception("Failed to publish todo event %s", event.id)
+                if connection is not None:
+                    connection.invalidate()
+                    connection = None
+        if connection is not None:
+            connection.close()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "listen_reconnects": self._reconnects}
+
+def _autocommit_connection(engine):
+    """A psycopg2 connection taken out of the pool, since its session state changes"""
+    connection = engine.raw_connection()
+    connection.detach()
+    connection.driver_connection.autocommit = True
+    return connection
+
+def _id_only(data: bytes) -> bytes:
+    return json.dumps({"id": json.loads(data).get("id")}).encode()
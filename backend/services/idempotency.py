@@ -0,0 +1,136 @@
+"""
+Idempotency-Key response store.
+
+The ``idempotency_keys`` table (see ``crud.idempotency``) is the source of
+truth shared by all workers. A bounded, TTL-evicting LRU in front of it
+answers repeated retries of a finished request without a query. Only
+finished responses are kept in memory, and they never change, so that copy
+cannot go stale. Expired rows are purged in small batches every
+``purge_every`` claims.
+
+The DB methods open a session from ``session_factory``, or use the one
+passed as ``db`` (the async routes run them in ``AsyncSession.run_sync``).
+"""
+
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from threading import Lock
+from time import time
+from typing import Callable, ContextManager, List, Optional, Tuple, Union
+import json
+from sqlalchemy.orm import Session
+from crud import idempotency as crud
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """The first response sent for a key, replayed to its retries"""
+    status_code: int
+    fingerprint: str
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+
+# claim() results other than a StoredResponse
+CLAIMED = "claimed"
+IN_FLIGHT = "in_flight"
+
+def _encode_headers(headers: List[Tuple[bytes, bytes]]) -> str:
+    return json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers])
+
+def _decode_headers(value: str) -> List[Tuple[bytes, bytes]]:
+    return [(name.encode("latin-1"), header.encode("latin-1")) for name, header in json.loads(value)]
+
+class IdempotencyStore:
+    """Claims keys and keeps their responses in the DB, with an in-memory front"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl: float,
+        lease: float,
+        max_entries: int = 10000,
+        purge_every: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.lease = lease
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._lock = Lock()
+        self._claims = 0
+
+    def cached(self, key: str) -> Optional[StoredResponse]:
+        """The finished response from memory, without touching the DB"""
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            if stored.expires_at <= time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return stored
+
+    def _remember(self, key: str, stored: StoredResponse) -> None:
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _session(self, db: Optional[Session]) -> ContextManager[Session]:
+        return nullcontext(db) if db is not None else self.session_factory()
+
+    def claim(self, key: str, db: Optional[Session] = None) -> Union[StoredResponse, str]:
+        """Claim the key (``CLAIMED``), or report its response or ``IN_FLIGHT``"""
+        with self._session(db) as db:
+            self._maybe_purge(db)
+            while True:
+                now = time()
+                if crud.claim(db, key, now, self.lease):
+                    return CLAIMED
+                row = crud.get(db, key)
+                if row is None:
+                    # Released between the two statements; try again
+                    continue
+                if row.status_code is None:
+                    return IN_FLIGHT
+                stored = StoredResponse(
+                    row.status_code, row.fingerprint, _decode_headers(row.headers), row.body, row.expires_at
+                )
+                self._remember(key, stored)
+                return stored
+
+    def complete(
+        self, key: str, status_code: int, fingerprint: str, headers: List[Tuple[bytes, bytes]], body: bytes,
+        db: Optional[Session] = None,
+    ) -> StoredResponse:
+        """Store the response of a claimed key for ``ttl`` seconds"""
+        stored = StoredResponse(status_code, fingerprint, list(headers), body, time() + self.ttl)
+        with self._session(db) as db:
+            crud.complete(db, key, status_code, fingerprint, _encode_headers(stored.headers), body, stored.expires_at)
+        self._remember(key, stored)
+        return stored
+
+    def release(self, key: str, db: Optional[Session] = None) -> None:
+        """Give up a claim without a response to store"""
+        with self._session(db) as db:
+            crud.release(db, key)
+
+    def _maybe_purge(self, db: Session) -> None:
+        with self._lock:
+            self._claims += 1
+            due = self._claims % self.purge_every == 0
+        if due:
+            crud.purge_expired(db, time())
+
+    def clear(self) -> None:
+        """Drop the in-memory copies (the DB rows stay)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "ttl": self.ttl}
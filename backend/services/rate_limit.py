@@ -0,0 +1,106 @@
+"""
+Token-bucket rate limiter backends.
+
+Each bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second; a request takes one token or is refused with the time until one is
+available. ``RateLimitBackend`` is the interface the middleware talks to:
+
+- ``MemoryRateLimitBackend`` keeps buckets in the worker process (bounded
+  LRU), so every worker enforces its own share of the limit
+- ``RedisRateLimitBackend`` keeps them in Redis, updated atomically by a
+  Lua script, so all workers and hosts share one limit; it needs the
+  optional ``redis`` package
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+from typing import Hashable, Optional
+
+try:
+    import redis.asyncio as redis  # type: ignore[import-not-found]
+except ImportError:  # optional
+    redis = None
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Tokens per second and bucket size"""
+    rate: float
+    burst: int
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    # Seconds until a token is available (0 when allowed)
+    retry_after: float = 0.0
+
+class RateLimitBackend(ABC):
+    """Interface of a token-bucket store"""
+
+    @abstractmethod
+    async def acquire(self, key: Hashable, limit: RateLimit) -> Decision:
+        """Take a token from the key's bucket if there is one"""
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Thread-safe in-process buckets, least recently used evicted past ``max_keys``"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        # key -> (tokens, time of last refill)
+        self._buckets: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+    async def acquire(self, key, limit, now: Optional[float] = None):
+        now = monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - last) * limit.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                # An evicted client starts again from a full bucket
+                self._buckets.popitem(last=False)
+        return Decision(True) if allowed else Decision(False, (1 - tokens) / limit.rate)
+
+    def clear(self) -> None:
+        """Refill every bucket"""
+        with self._lock:
+            self._buckets.clear()
+
+# KEYS[1] bucket; ARGV rate, burst. Returns {allowed, retry_after}
+_TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local last = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+local allowed, retry_after = 0, (1 - tokens) / rate
+if tokens >= 1 then
+  tokens, allowed, retry_after = tokens - 1, 1, 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker through Redis"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        if redis is None:
+            raise RuntimeError("RedisRateLimitBackend needs the 'redis' package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key, limit):
+        name = self.prefix + ":".join(str(part) for part in (key if isinstance(key, tuple) else (key,)))
+        allowed, retry_after = await self._script(keys=[name], args=[limit.rate, limit.burst])
+        return Decision(bool(allowed), float(retry_after))
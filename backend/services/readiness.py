@@ -0,0 +1,69 @@
+"""
+Readiness probe with a cached result.
+
+Orchestrators poll readiness every few seconds from every replica, so
+``ReadinessProbe`` runs the real check (a ``SELECT 1`` over a pooled
+connection) at most once per ``ttl`` per worker. Concurrent probes while a
+check is running wait for that check instead of starting their own, and a
+check that hangs longer than ``timeout`` counts as a failure.
+"""
+
+import asyncio
+from time import monotonic, time
+from typing import Awaitable, Callable, Optional
+
+class ReadinessProbe:
+    """Single-flight, TTL-cached wrapper around an async readiness check"""
+
+    def __init__(self, check: Callable[[], Awaitable[None]], ttl: float = 5.0, timeout: float = 2.0):
+        self.check = check
+        self.ttl = ttl
+        self.timeout = timeout
+        self.checks = 0
+        # Only read while fresh (before _expires)
+        self._result: dict = {}
+        self._expires = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # A lock belongs to one event loop; make a new one if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+    def invalidate(self) -> None:
+        """Forget the cached result so the next probe checks again"""
+        self._expires = 0.0
+
+    async def status(self) -> dict:
+        """The cached result if fresh, otherwise the result of a new check"""
+        if monotonic() < self._expires:
+            return dict(self._result, cached=True)
+        async with self._get_lock():
+            # Another probe may have refreshed the result while this one waited
+            if monotonic() < self._expires:
+                return dict(self._result, cached=True)
+            self._result = await self._run()
+            self._expires = monotonic() + self.ttl
+            return dict(self._result, cached=False)
+
+    async def _run(self) -> dict:
+        self.checks += 1
+        start = monotonic()
+        error: Optional[str]
+        try:
+            await asyncio.wait_for(self.check(), self.timeout)
+        except asyncio.TimeoutError:
+            ready, error = False, f"timed out after {self.timeout}s"
+        except Exception as exc:
+            ready, error = False, f"{type(exc).__name__}: {exc}"
+        else:
+            ready, error = True, None
+        return {
+            "status": "ready" if ready else "unavailable",
+            "database": "ok" if ready else error,
+            "latency_ms": round((monotonic() - start) * 1000, 2),
+            "checked_at": time(),
+        }
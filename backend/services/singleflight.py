@@ -0,0 +1,100 @@
+"""
+Collapse identical concurrent calls into one.
+
+While a call for a key is running, later callers with the same key wait for
+its result instead of running it again, so a burst of requests for one
+popular todo costs one query. ``SingleFlight`` is for the threadpool (sync
+routes), ``AsyncSingleFlight`` for one event loop (async routes). Nothing is
+kept once the call returns. A write calls ``forget``, so readers arriving
+after it start a fresh call and cannot join one that may predate it.
+"""
+
+import asyncio
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """Thread-safe single-flight group"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = Lock()
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        """Return ``fn(*args)``, sharing the result of a running call with the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return call.result()
+        try:
+            result = fn(*args)
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            self._drop(key, call)
+
+    def forget(self, match: Callable[[Any], bool]) -> None:
+        """Let later callers of the matching keys start a new call"""
+        with self._lock:
+            for key in [key for key in self._calls if match(key)]:
+                del self._calls[key]
+
+    def _drop(self, key: Hashable, call: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+class AsyncSingleFlight:
+    """Single-flight group for coroutines on one event loop"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Await ``fn(*args)``, sharing the result of a running call with the same key"""
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+            self.shared += 1
+            try:
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+                # The leading caller was cancelled (client gone); run the call here
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn(*args)
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as exc:
+            call.set_exception(exc)
+            # Followers re-raise it; without any, don't log it as never retrieved
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def forget(self, match: Callable[[Any], bool]) -> None:
+        """Let later callers of the matching keys start a new call"""
+        for key in [key for key in self._calls if match(key)]:
+            del self._calls[key]
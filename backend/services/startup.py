@@ -0,0 +1,47 @@
+"""
+Startup profile of a worker.
+
+Records how long the worker took to become ready, as named phases: the
+import of ``main`` (with everything it pulls in) and each step of the app
+lifespan. The profile is logged once the lifespan finishes starting and
+served at ``/health/startup``; ``profile_startup.py`` adds a per-package
+breakdown of the import phase.
+"""
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StartupProfile:
+    """Durations of the startup phases, in the order they ran"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as phase ``name``"""
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, perf_counter() - started)
+
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def report(self) -> dict:
+        return {
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "total_ms": round(self.total() * 1000, 1),
+        }
+
+    def log(self) -> None:
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+        logger.info("Worker ready in %.0f ms (%s)", self.total() * 1000, phases)
@@ -0,0 +1,200 @@
+"""
+Streaming import of todos from NDJSON or CSV.
+
+``TodoImporter`` is fed the upload chunk by chunk, splits it into records,
+validates them with ``TodoCreate`` and hands back batches of at most
+``IMPORT_CHUNK_SIZE`` rows for ``crud.import_todos``. Only the current
+partial record and one pending batch are held in memory, so a load of any
+size runs in flat memory. Bad rows are reported by line number and skipped;
+they never abort the rest of the load.
+"""
+
+from dataclasses import dataclass, field
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Literal, Optional, Tuple
+import csv
+import json
+import os
+from crud import todo as crud
+from models.schemas import TodoCreate
+
+# Rows validated and written per batch (one COPY / executemany and one commit)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+# Errors listed in the result; further failures are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+ImportFormat = Literal["ndjson", "csv"]
+
+_batch_adapter = TypeAdapter(List[TodoCreate])
+_todo_adapter = TypeAdapter(TodoCreate)
+
+@dataclass
+class ImportBatch:
+    """Validated rows ready to load, with the line each came from"""
+    lines: List[int] = field(default_factory=list)
+    rows: List[dict] = field(default_factory=list)
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+class TodoImporter:
+    """Incremental NDJSON/CSV parser and validator for one import"""
+
+    def __init__(
+        self,
+        import_format: ImportFormat,
+        chunk_size: Optional[int] = None,
+        max_errors: Optional[int] = None,
+    ):
+        self.import_format = import_format
+        self.chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        self.max_errors = IMPORT_MAX_ERRORS if max_errors is None else max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self._decoder_buffer = b""
+        self._record: List[str] = []
+        self._record_line = 0
+        self._line = 0
+        self._header: Optional[List[str]] = None
+        self._pending: List[Tuple[int, str]] = []
+
+    def feed(self, data: bytes) -> List[ImportBatch]:
+        """Consume a chunk of the upload and return the batches that filled up"""
+        data = self._decoder_buffer + data
+        end = data.rfind(b"\n") + 1
+        self._decoder_buffer = data[end:]
+        if end:
+            self._add_lines(data[: end - 1].decode("utf-8").split("\n"))
+        return self._drain(final=False)
+
+    def finish(self) -> List[ImportBatch]:
+        """Flush the trailing record and the last partial batch"""
+        if self._decoder_buffer:
+            self._add_lines([self._decoder_buffer.decode("utf-8")])
+            self._decoder_buffer = b""
+        if self._record:
+            self.fail(self._record_line, "Unterminated quoted field")
+            self._record = []
+        return self._drain(final=True)
+
+    def load(self, db: Session, batch: ImportBatch) -> None:
+        """Write one batch; on a database error the whole batch is reported failed"""
+        try:
+            crud.import_todos(db, batch.rows)
+        except SQLAlchemyError as error:
+            db.rollback()
+            message = str(getattr(error, "orig", None) or error).splitlines()[0]
+            for line in batch.lines:
+                self.fail(line, message)
+        else:
+            self.imported += len(batch.rows)
+
+    def fail(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def result(self) -> dict:
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+    def _add_lines(self, lines: List[str]) -> None:
+        for line in lines:
+            self._line += 1
+            if self.import_format == "ndjson":
+                if line.strip():
+                    self._pending.append((self._line, line))
+                continue
+            # A CSV record may span lines inside a quoted field; it is complete
+            # once its quotes balance (embedded quotes are doubled)
+            if not self._record:
+                self._record_line = self._line
+            self._record.append(line)
+            if sum(part.count('"') for part in self._record) % 2 == 0:
+                record = "\n".join(self._record)
+                self._record = []
+                if record.strip():
+                    self._pending.append((self._record_line, record))
+
+    def _drain(self, final: bool) -> List[ImportBatch]:
+        batches = []
+        while len(self._pending) >= self.chunk_size or (final and self._pending):
+            chunk, self._pending = self._pending[: self.chunk_size], self._pending[self.chunk_size :]
+            batch = self._validate_chunk(chunk)
+            if batch.rows:
+                batches.append(batch)
+        return batches
+
+    def _validate_chunk(self, chunk: List[Tuple[int, str]]) -> ImportBatch:
+        if self.import_format == "ndjson":
+            # Fast path: pydantic-core parses and validates each line straight
+            # from JSON. One call per line, so a line is exactly one todo; lines
+            # joined into one array could split or merge rows across lines
+            try:
+                todos = [_todo_adapter.validate_json(text) for _, text in chunk]
+            except ValidationError:
+                return self._validate(self._parse_ndjson(chunk))
+            return ImportBatch(lines=[line for line, _ in chunk], rows=_batch_adapter.dump_python(todos))
+        return self._validate(self._parse_csv(chunk))
+
+    def _parse_ndjson(self, chunk: List[Tuple[int, str]]) -> List[Tuple[int, dict]]:
+        parsed = []
+        for line, text in chunk:
+            try:
+                value = json.loads(text)
+            except ValueError as error:
+                self.fail(line, f"Invalid JSON: {error}")
+                continue
+            if isinstance(value, dict):
+                parsed.append((line, value))
+            else:
+                self.fail(line, "Expected a JSON object")
+        return parsed
+
+    def _parse_csv(self, chunk: List[Tuple[int, str]]) -> List[Tuple[int, dict]]:
+        parsed = []
+        records = csv.reader(text for _, text in chunk)
+        for (line, _), values in zip(chunk, records):
+            if self._header is None:
+                self._header = [name.strip() for name in values]
+                continue
+            if len(values) != len(self._header):
+                self.fail(line, f"Expected {len(self._header)} fields, got {len(values)}")
+                continue
+            # Empty CSV cells mean "not given", so schema defaults apply
+            parsed.append((line, {name: value for name, value in zip(self._header, values) if value != ""}))
+        return parsed
+
+    def _validate(self, parsed: List[Tuple[int, dict]]) -> ImportBatch:
+        try:
+            todos = _batch_adapter.validate_python([value for _, value in parsed])
+        except ValidationError:
+            pass
+        else:
+            return ImportBatch(lines=[line for line, _ in parsed], rows=_batch_adapter.dump_python(todos))
+
+        # Some rows are bad: validate one by one to report them
+        batch = ImportBatch()
+        for line, value in parsed:
+            try:
+                todo = TodoCreate.model_validate(value)
+            except ValidationError as error:
+                self.fail(line, _validation_message(error))
+                continue
+            batch.lines.append(line)
+            batch.rows.append(todo.model_dump())
+        return batch
+
+def import_stream(db: Session, chunks: Iterable[bytes], import_format: ImportFormat, **options) -> dict:
+    """Import an iterable of byte chunks with a sync session and return the result"""
+    importer = TodoImporter(import_format, **options)
+    for data in chunks:
+        for batch in importer.feed(data):
+            importer.load(db, batch)
+    for batch in importer.finish():
+        importer.load(db, batch)
+    return importer.result()
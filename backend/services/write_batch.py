@@ -0,0 +1,176 @@
+"""
+Group commit of partial updates.
+
+Callers submit ``(id, fields)`` updates. The first caller of an empty batch
+becomes its leader: it waits up to ``max_delay`` seconds, or until the
+batch holds ``max_items`` ids, then flushes the whole batch with its own
+flush function in one transaction. Updates to the same id are merged in
+arrival order, so the last write wins per field. Every caller returns only
+after the flush, with the flushed row of its id, so a response still means
+the change is committed. When the group commit fails, each id is flushed
+again on its own, so an invalid update fails only the callers of its id.
+
+``UpdateBatcher`` is for threads (sync routes); ``AsyncUpdateBatcher`` for
+one event loop (async routes). The async flush runs as a task the batcher
+holds on to, so it finishes even when its leader is cancelled; its flush
+function must therefore not use anything the leader's request owns, such
+as its session.
+"""
+
+import asyncio
+from concurrent.futures import Future
+from threading import Event, Lock
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+# Flushes merged updates (``{"id": ..., **fields}``) and returns the rows by id
+Flush = Callable[[List[dict]], Dict[int, Any]]
+AsyncFlush = Callable[[List[dict]], Awaitable[Dict[int, Any]]]
+
+# Called after each flush with the batch size and flush seconds
+Observer = Callable[[int, float], None]
+
+def _merge(items: Dict[int, dict], todo_id: int, data: dict) -> None:
+    items.setdefault(todo_id, {"id": todo_id}).update(data)
+
+def _row(rows: Dict[int, Any], todo_id: int) -> Optional[Any]:
+    """The flushed row of an id; raises the error of an id that failed alone"""
+    row = rows.get(todo_id)
+    if isinstance(row, Exception):
+        raise row
+    return row
+
+def _flush_each(items: List[dict], flush: Flush) -> Dict[int, Any]:
+    rows: Dict[int, Any] = {}
+    for item in items:
+        try:
+            rows.update(flush([item]))
+        except Exception as exc:
+            rows[item["id"]] = exc
+    return rows
+
+async def _async_flush_each(items: List[dict], flush: AsyncFlush) -> Dict[int, Any]:
+    rows: Dict[int, Any] = {}
+    for item in items:
+        try:
+            rows.update(await flush([item]))
+        except Exception as exc:
+            rows[item["id"]] = exc
+    return rows
+
+class _Batch:
+    def __init__(self):
+        self.items: Dict[int, dict] = {}
+        self.full = Event()
+        self.result: Future = Future()
+
+class UpdateBatcher:
+    """Thread-safe group commit of updates"""
+
+    def __init__(self, max_items: int, max_delay: float, observe: Optional[Observer] = None):
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.observe = observe
+        self._batch: Optional[_Batch] = None
+        self._lock = Lock()
+
+    def submit(self, todo_id: int, data: dict, flush: Flush) -> Optional[Any]:
+        """Queue an update and return the todo's row once committed (None if it does not exist)"""
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if batch is None:
+                batch = self._batch = _Batch()
+            _merge(batch.items, todo_id, data)
+            if len(batch.items) >= self.max_items:
+                # Closed: later updates start the next batch
+                self._batch = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_delay)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._flush(batch, flush)
+        return _row(batch.result.result(), todo_id)
+
+    def _flush(self, batch: _Batch, flush: Flush) -> None:
+        start = perf_counter()
+        items = list(batch.items.values())
+        try:
+            try:
+                rows = flush(items)
+            except Exception:
+                if len(items) == 1:
+                    raise
+                rows = _flush_each(items, flush)
+        except BaseException as exc:
+            batch.result.set_exception(exc)
+        else:
+            batch.result.set_result(rows)
+        if self.observe is not None:
+            self.observe(len(batch.items), perf_counter() - start)
+
+class _AsyncBatch:
+    def __init__(self):
+        self.items: Dict[int, dict] = {}
+        self.full = asyncio.Event()
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class AsyncUpdateBatcher:
+    """Group commit of updates for coroutines on one event loop"""
+
+    def __init__(self, max_items: int, max_delay: float, observe: Optional[Observer] = None):
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.observe = observe
+        self._batch: Optional[_AsyncBatch] = None
+        # Running flushes; the event loop only keeps weak references to tasks
+        self._flushing: Set[asyncio.Task] = set()
+
+    async def submit(self, todo_id: int, data: dict, flush: AsyncFlush) -> Optional[Any]:
+        """Queue an update and return the todo's row once committed (None if it does not exist)"""
+        batch = self._batch
+        leader = batch is None
+        if batch is None:
+            batch = self._batch = _AsyncBatch()
+        _merge(batch.items, todo_id, data)
+        if len(batch.items) >= self.max_items:
+            self._batch = None
+            batch.full.set()
+
+        if leader:
+            try:
+                await asyncio.wait_for(batch.full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if self._batch is batch:
+                    self._batch = None
+                # A task, so a cancelled leader still flushes for the others
+                task = asyncio.ensure_future(self._flush(batch, flush))
+                self._flushing.add(task)
+                task.add_done_callback(self._flushing.discard)
+        return _row(await asyncio.shield(batch.result), todo_id)
+
+    async def _flush(self, batch: _AsyncBatch, flush: AsyncFlush) -> None:
+        start = perf_counter()
+        items = list(batch.items.values())
+        try:
+            try:
+                rows = await flush(items)
+            except Exception:
+                if len(items) == 1:
+                    raise
+                rows = await _async_flush_each(items, flush)
+        except asyncio.CancelledError:
+            batch.result.cancel()
+            raise
+        except Exception as exc:
+            batch.result.set_exception(exc)
+            batch.result.exception()
+        else:
+            batch.result.set_result(rows)
+        if self.observe is not None:
+            self.observe(len(batch.items), perf_counter() - start)
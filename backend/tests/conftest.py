@@ -1,10 +1,15 @@
+import os
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-from config.database import Base, get_db
-from models.todo import Todo
-import os
+from sqlalchemy.pool import NullPool, StaticPool
+from config.database import Base, get_db, get_async_db
+from models.todo import IdempotencyKey, Todo, TodoArchive, TodoCounter, TodoDailyCount
+
+# Off by default; the suite runs the full middleware stack, at limits no other test reaches
+os.environ.setdefault("RATE_LIMIT_ENABLED", "true")
+os.environ.setdefault("LOAD_SHED_ENABLED", "true")
 
 # Test database URL - use SQLite for testing
 TEST_DATABASE_URL = "sqlite:///./test.db"
@@ -19,13 +24,20 @@ test_engine = create_engine(
 # Create test session
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# Async engine over the same SQLite file for the async routes
+TEST_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+test_async_engine = create_async_engine(TEST_ASYNC_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=test_async_engine, autoflush=False, expire_on_commit=False)
+
 # Create tables at module level
 Base.metadata.create_all(bind=test_engine)
 
 # Mock database configuration for tests
 import config.database
+config.database.DATABASE_URL = TEST_DATABASE_URL
 config.database.engine = test_engine
 config.database.SessionLocal = TestingSessionLocal
+config.database.AsyncSessionLocal = AsyncTestingSessionLocal
 
 @pytest.fixture(scope="function")
 def test_db():
@@ -56,12 +68,18 @@ def client():
     """
     from fastapi.testclient import TestClient
     from main import app
+    from routes.idempotency import idempotency_store
+    from routes.rate_limit import rate_limit_backend
 
     # Clear all data before each test
     db = TestingSessionLocal()
     try:
-        # Delete all todos
+        # Delete all todos, their archive, statistics and stored idempotent responses
         db.query(Todo).delete()
+        db.query(TodoArchive).delete()
+        db.query(TodoCounter).delete()
+        db.query(TodoDailyCount).delete()
+        db.query(IdempotencyKey).delete()
         db.commit()
     finally:
         db.close()
@@ -75,6 +93,8 @@ def client():
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    idempotency_store.clear()
+    rate_limit_backend.clear()
 
     with TestClient(app) as client:
         yield client
@@ -82,6 +102,59 @@ def client():
     # Clean up
     app.dependency_overrides.clear()
 
+@pytest.fixture(scope="function")
+def query_counter():
+    """
+    Record the SQL statements sent to the test database.
+
+    Yields a list that collects every statement executed while the
+    fixture is active, so tests can assert round trips per request.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture(scope="function")
+def async_client():
+    """
+    Test client fixture for the async todo routes.
+
+    Mounts routes.todo_async on a bare app backed by an aiosqlite session,
+    which is what main.py serves when DB_ASYNC is enabled.
+    """
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes.todo_async import router as async_todo_router
+
+    # Clear all data before each test
+    db = TestingSessionLocal()
+    try:
+        db.query(Todo).delete()
+        db.query(TodoArchive).delete()
+        db.query(TodoCounter).delete()
+        db.query(TodoDailyCount).delete()
+        db.commit()
+    finally:
+        db.close()
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_todo_router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    with TestClient(app) as client:
+        yield client
+
 @pytest.fixture(scope="function")
 def sample_todo(test_db):
     """
@@ -0,0 +1,145 @@
+"""
+Tests for soft deletes and the archive job.
+
+These tests verify that:
+- Deleting a todo only marks it, and every endpoint stops seeing it
+- The job purges todos deleted before the grace period, batch by batch
+- The job moves old completed todos to todos_archive and out of the stats
+- Archived todos are announced, which drops their cached responses
+- reconcile() counts live todos only
+- Live-row list queries can use the partial index
+"""
+
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text, update
+from crud import archive, stats
+from crud.todo import TodoFilter, apply_filter, todos_table
+from models.todo import Todo, TodoArchive
+from routes import changes
+from services.cache import MemoryCacheBackend
+
+NOW = datetime.now(timezone.utc)
+LONG_AGO = NOW - timedelta(days=365)
+
+
+def age(db, todo_ids, **columns):
+    """Backdate timestamps of todos (deleted_at/updated_at)"""
+    db.execute(update(todos_table).where(todos_table.c.id.in_(todo_ids)).values(**columns))
+    db.commit()
+
+
+def stored_ids(db) -> list:
+    return list(db.execute(select(todos_table.c.id).order_by(todos_table.c.id)).scalars())
+
+
+class TestSoftDelete:
+    """Test DELETE /todos/{id} and DELETE /todos/bulk keep the row, marked deleted."""
+
+    def test_deleted_todo_is_hidden(self, client: TestClient, test_db):
+        """Test a deleted todo is gone from the API but still stored."""
+        todo_id = client.post("/todos", json={"title": "A"}).json()["id"]
+
+        assert client.delete(f"/todos/{todo_id}").status_code == 200
+
+        assert client.get(f"/todos/{todo_id}").status_code == 404
+        assert client.get("/todos/").json() == []
+        assert client.put(f"/todos/{todo_id}", json={"completed": True}).status_code == 404
+        assert client.delete(f"/todos/{todo_id}").status_code == 404
+        assert client.get("/todos/export").content == b""
+        assert test_db.get(Todo, todo_id).deleted_at is not None
+
+    def test_bulk_delete_is_soft(self, client: TestClient, test_db):
+        """Test bulk deletes mark rows once and keep the counters right."""
+        ids = [item["id"] for item in client.post("/todos/bulk", json=[{"title": "A"}, {"title": "B", "completed": True}]).json()["results"]]
+
+        first = client.request("DELETE", "/todos/bulk", json={"ids": ids}).json()["results"]
+        again = client.request("DELETE", "/todos/bulk", json={"ids": ids}).json()["results"]
+
+        assert [item["status"] for item in first] == ["deleted", "deleted"]
+        assert [item["status"] for item in again] == ["not_found", "not_found"]
+        assert client.patch("/todos/bulk", json=[{"id": ids[0], "title": "X"}]).json()["results"][0]["status"] == "not_found"
+        assert client.get("/todos/stats").json()["total"] == 0
+        assert stored_ids(test_db) == ids
+
+
+class TestArchiveJob:
+    """Test crud.archive."""
+
+    def test_purge_deleted_after_grace_period(self, client: TestClient, test_db):
+        """Test only todos deleted before the cutoff are purged."""
+        ids = [item["id"] for item in client.post("/todos/bulk", json=[{"title": "A"}, {"title": "B"}, {"title": "C"}]).json()["results"]]
+        client.request("DELETE", "/todos/bulk", json={"ids": ids[:2]})
+        age(test_db, ids[:1], deleted_at=LONG_AGO)
+
+        assert archive.run(test_db, now=NOW) == {"purged": 1, "archived": 0}
+        assert stored_ids(test_db) == ids[1:]
+        assert client.get("/todos/stats").json()["total"] == 1
+
+    def test_archive_completed(self, client: TestClient, test_db):
+        """Test old completed todos move to the archive and leave the counters."""
+        created = client.post(
+            "/todos/bulk", json=[{"title": "old done", "completed": True}, {"title": "old open"}, {"title": "new done", "completed": True}]
+        ).json()["results"]
+        ids = [item["id"] for item in created]
+        age(test_db, ids[:2], updated_at=LONG_AGO)
+
+        assert archive.run(test_db, now=NOW) == {"purged": 0, "archived": 1}
+
+        assert [todo["id"] for todo in client.get("/todos/").json()] == ids[1:]
+        archived = test_db.execute(select(TodoArchive)).scalars().all()
+        assert [(row.id, row.title, row.completed) for row in archived] == [(ids[0], "old done", True)]
+        assert archived[0].archived_at is not None
+        body = client.get("/todos/stats").json()
+        assert (body["total"], body["completed"]) == (2, 1)
+
+    def test_batches_are_bounded(self, client: TestClient, test_db):
+        """Test each batch moves at most batch_size rows and max_batches bounds a run."""
+        ids = [item["id"] for item in client.post("/todos/bulk", json=[{"title": str(i), "completed": True} for i in range(5)]).json()["results"]]
+        age(test_db, ids, updated_at=LONG_AGO)
+
+        assert archive.archive_completed(test_db, NOW, batch_size=2) == 2
+        assert archive.run(test_db, now=NOW, batch_size=2, max_batches=1)["archived"] == 2
+        assert archive.run(test_db, now=NOW, batch_size=2)["archived"] == 1
+        assert stored_ids(test_db) == []
+        assert client.get("/todos/stats").json()["completed"] == 0
+
+    def test_archived_todos_are_announced(self, client: TestClient, test_db, monkeypatch):
+        """Test archived ids reach on_archived, and publishing them drops cached responses."""
+        monkeypatch.setattr("routes.caching.TODO_CACHE_ENABLED", True)
+        monkeypatch.setattr("routes.caching.todo_cache", MemoryCacheBackend())
+        ids = [item["id"] for item in client.post("/todos/bulk", json=[{"title": "A", "completed": True}, {"title": "B"}]).json()["results"]]
+        age(test_db, ids, updated_at=LONG_AGO)
+        assert client.get(f"/todos/{ids[0]}").status_code == 200
+        announced = []
+
+        def on_archived(archived):
+            announced.extend(archived)
+            changes.publish_deleted(archived)
+
+        archive.run(test_db, now=NOW, on_archived=on_archived)
+
+        assert announced == ids[:1]
+        assert client.get(f"/todos/{ids[0]}").status_code == 404
+
+    def test_reconcile_counts_live_todos(self, client: TestClient, test_db):
+        """Test soft-deleted rows are not counted back into the totals."""
+        ids = [item["id"] for item in client.post("/todos/bulk", json=[{"title": "A", "completed": True}, {"title": "B"}]).json()["results"]]
+        client.delete(f"/todos/{ids[0]}")
+
+        corrections = stats.reconcile(test_db)
+
+        assert (corrections["total"], corrections["completed"]) == (0, 0)
+
+
+class TestLiveIndexes:
+    """Test the partial indexes over live rows."""
+
+    def test_completed_filter_uses_partial_index(self, test_db):
+        """Test SQLite plans the completed filter on ix_todos_live_completed_created_at."""
+        query = apply_filter(select(todos_table.c.id), TodoFilter(completed=True), "sqlite").order_by(todos_table.c.created_at)
+        compiled = query.compile(test_db.get_bind(), compile_kwargs={"literal_binds": True})
+
+        plan = " ".join(row[-1] for row in test_db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+        assert "ix_todos_live_completed_created_at" in plan
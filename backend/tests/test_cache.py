@@ -0,0 +1,193 @@
+"""
+Tests for the todo read cache.
+
+These tests verify that:
+- The memory backend evicts by size and TTL and counts hits/misses
+- Tagged entries are invalidated precisely
+- Cached API responses are invalidated by writes
+- Change events of other workers invalidate like local writes; a reset drops everything
+"""
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from models.todo import Todo
+from routes import changes
+from services.cache import CachedResponse, MemoryCacheBackend
+from services.events import RESET, ChangeEvent, MemoryBroker
+
+
+class TestMemoryCacheBackend:
+    """Test the in-process LRU/TTL cache backend."""
+
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits or misses."""
+        cache = MemoryCacheBackend()
+        assert cache.get("a") is None
+        cache.set("a", CachedResponse(body=b"1"), [], cache.generation())
+
+        assert cache.get("a").body == b"1"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full."""
+        cache = MemoryCacheBackend(max_entries=2)
+        cache.set("a", CachedResponse(body=b"a"), [], cache.generation())
+        cache.set("b", CachedResponse(body=b"b"), [], cache.generation())
+        cache.get("a")
+        cache.set("c", CachedResponse(body=b"c"), [], cache.generation())
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Test expired entries are treated as misses."""
+        cache = MemoryCacheBackend(ttl=0)
+        cache.set("a", CachedResponse(body=b"a"), [], cache.generation())
+
+        assert cache.get("a") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_by_tag(self):
+        """Test invalidation drops only the entries carrying the tag."""
+        cache = MemoryCacheBackend()
+        cache.set("page", CachedResponse(body=b"[]"), ["todo:1", "todo:2"], cache.generation())
+        cache.set("other", CachedResponse(body=b"[]"), ["todo:3"], cache.generation())
+
+        cache.invalidate(["todo:2"])
+
+        assert cache.get("page") is None
+        assert cache.get("other") is not None
+
+    def test_stale_generation_is_not_stored(self):
+        """Test a response read before an invalidation is not cached."""
+        cache = MemoryCacheBackend()
+        generation = cache.generation()
+        cache.invalidate(["todo:1"])
+        cache.set("a", CachedResponse(body=b"stale"), ["todo:1"], generation)
+
+        assert cache.get("a") is None
+
+
+@pytest.fixture
+def cached_client(client, monkeypatch):
+    """Test client with the read cache enabled on a fresh backend."""
+    monkeypatch.setattr("routes.caching.TODO_CACHE_ENABLED", True)
+    monkeypatch.setattr("routes.caching.todo_cache", MemoryCacheBackend())
+    return client
+
+
+class TestCachedTodoAPI:
+    """Test caching and invalidation through the API."""
+
+    def test_get_todo_is_cached(self, cached_client: TestClient, query_counter):
+        """Test repeated GET /todos/{id} is served from the cache."""
+        todo_id = cached_client.post("/todos", json={"title": "Cached"}).json()["id"]
+
+        first = cached_client.get(f"/todos/{todo_id}")
+        query_counter.clear()
+        second = cached_client.get(f"/todos/{todo_id}")
+
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert query_counter == []
+
+    def test_update_invalidates_item_and_pages(self, cached_client: TestClient):
+        """Test PUT drops the cached todo and the pages containing it."""
+        todo_id = cached_client.post("/todos", json={"title": "Before"}).json()["id"]
+        cached_client.get(f"/todos/{todo_id}")
+        cached_client.get("/todos")
+
+        cached_client.put(f"/todos/{todo_id}", json={"title": "After"})
+
+        assert cached_client.get(f"/todos/{todo_id}").json()["title"] == "After"
+        assert cached_client.get("/todos").json()[0]["title"] == "After"
+
+    def test_create_invalidates_tail_page(self, cached_client: TestClient):
+        """Test POST makes the new todo show up on the last page."""
+        cached_client.post("/todos", json={"title": "One"})
+        assert len(cached_client.get("/todos").json()) == 1
+
+        cached_client.post("/todos", json={"title": "Two"})
+
+        assert len(cached_client.get("/todos").json()) == 2
+
+    def test_delete_invalidates_item(self, cached_client: TestClient):
+        """Test DELETE drops the cached todo."""
+        todo_id = cached_client.post("/todos", json={"title": "Doomed"}).json()["id"]
+        cached_client.get(f"/todos/{todo_id}")
+
+        cached_client.delete(f"/todos/{todo_id}")
+
+        assert cached_client.get(f"/todos/{todo_id}").status_code == 404
+        assert cached_client.get("/todos").json() == []
+
+    def test_cursor_headers_are_cached(self, cached_client: TestClient):
+        """Test cached list pages keep their pagination cursors."""
+        for i in range(3):
+            cached_client.post("/todos", json={"title": f"Todo {i}"})
+
+        first = cached_client.get("/todos?limit=2")
+        second = cached_client.get("/todos?limit=2")
+
+        assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+        assert cached_client.get("/health/cache").json()["hits"] == 1
+
+    def test_update_invalidates_filtered_pages(self, cached_client: TestClient):
+        """Test a write drops filtered pages the row may move into."""
+        todo_id = cached_client.post("/todos", json={"title": "Pending"}).json()["id"]
+        assert cached_client.get("/todos?completed=true").json() == []
+
+        cached_client.put(f"/todos/{todo_id}", json={"completed": True})
+
+        assert [t["id"] for t in cached_client.get("/todos?completed=true").json()] == [todo_id]
+
+
+def remote_write(test_db, todo_id: int, title: str) -> None:
+    """Change a todo behind this worker's back, as another worker would"""
+    test_db.execute(update(Todo).where(Todo.id == todo_id).values(title=title))
+    test_db.commit()
+
+
+def remote_event(event_type: str, data: dict) -> None:
+    """Deliver another worker's change event to this worker"""
+    broker = changes.broker
+    assert isinstance(broker, MemoryBroker)
+    broker.deliver(ChangeEvent(id=broker.next_id(), type=event_type, data=json.dumps(data).encode()))
+
+
+class TestRemoteInvalidation:
+    """Test change events from other workers keep this worker's cache fresh."""
+
+    def test_remote_update_and_create(self, cached_client: TestClient, test_db):
+        """Test updated and created events drop the responses a local write would."""
+        todo_id = cached_client.post("/todos", json={"title": "Before"}).json()["id"]
+        cached_client.get(f"/todos/{todo_id}")
+        cached_client.get("/todos")
+
+        remote_write(test_db, todo_id, "After")
+        remote_event("updated", {"id": todo_id, "title": "After"})
+
+        assert cached_client.get(f"/todos/{todo_id}").json()["title"] == "After"
+        assert cached_client.get("/todos").json()[0]["title"] == "After"
+
+        test_db.add(Todo(title="Remote"))
+        test_db.commit()
+        remote_event("created", {"id": todo_id + 1, "title": "Remote"})
+
+        assert [todo["title"] for todo in cached_client.get("/todos").json()] == ["After", "Remote"]
+
+    def test_reset_drops_everything(self, cached_client: TestClient, test_db):
+        """Test a reset (missed events) clears the cache."""
+        todo_id = cached_client.post("/todos", json={"title": "Before"}).json()["id"]
+        cached_client.get(f"/todos/{todo_id}")
+
+        remote_write(test_db, todo_id, "Missed")
+        remote_event(RESET, {})
+
+        assert cached_client.get(f"/todos/{todo_id}").json()["title"] == "Missed"
+        assert cached_client.get("/health/cache").json()["entries"] == 1
@@ -0,0 +1,147 @@
+"""
+Tests for response compression and per-route cache headers.
+
+These tests verify that:
+- Large JSON, NDJSON and CSV responses are gzip-compressed when accepted
+- Small responses, event streams and clients without gzip get identity
+- Compressed bodies get their own ETag, which conditional requests still match
+- Accept-Encoding is negotiated by q-value, then server preference
+- Cache-Control and Vary follow the route's policy
+"""
+
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+from routes.compression import negotiate
+from routes.cache_policy import TODO_STATS_MAX_AGE
+
+
+def create_todos(client: TestClient, count: int) -> None:
+    client.post("/todos/bulk", json=[{"title": f"Todo {i}", "description": "x" * 40} for i in range(count)])
+
+
+class TestCompression:
+    """Test CompressionMiddleware on the app."""
+
+    def test_large_list_is_gzipped(self, client: TestClient):
+        """Test a large list is compressed and decodes to the same JSON."""
+        create_todos(client, 100)
+
+        response = client.get("/todos?limit=100", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()) == 100
+        # The wire size is the compressed length
+        assert int(response.headers["content-length"]) < len(response.content) / 4
+
+    def test_identity_without_accept_encoding(self, client: TestClient):
+        """Test clients that do not accept gzip get the plain body, with Vary set."""
+        create_todos(client, 100)
+
+        response = client.get("/todos?limit=100", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) == len(response.content)
+
+    def test_small_response_not_compressed(self, client: TestClient):
+        """Test bodies under COMPRESSION_MIN_SIZE are sent as they are."""
+        todo_id = client.post("/todos", json={"title": "Small"}).json()["id"]
+
+        response = client.get(f"/todos/{todo_id}", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_streamed_export_is_gzipped(self, client: TestClient):
+        """Test streamed NDJSON is compressed chunk by chunk into one gzip stream."""
+        create_todos(client, 50)
+
+        with client.stream("GET", "/todos/export", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert len(gzip.decompress(raw).splitlines()) == 50
+
+    def test_etag_names_the_coding(self, client: TestClient):
+        """Test a compressed body's strong ETag differs from the identity body's by a coding suffix."""
+        create_todos(client, 100)
+
+        plain = client.get("/todos?limit=100", headers={"Accept-Encoding": "identity"}).headers["etag"]
+        coded = client.get("/todos?limit=100", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+        assert coded == plain[:-1] + '-gzip"'
+
+    def test_conditional_request_still_matches(self, client: TestClient):
+        """Test the coded ETag of a compressed list answers If-None-Match with 304, echoing it."""
+        create_todos(client, 100)
+        etag = client.get("/todos?limit=100", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+        response = client.get("/todos?limit=100", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert "content-encoding" not in response.headers
+
+    def test_if_match_accepts_coded_etag(self, client: TestClient):
+        """Test If-Match compares the todo state, whichever coding the client's ETag names."""
+        todo_id = client.post("/todos", json={"title": "A", "description": "x" * 2000}).json()["id"]
+        etag = client.get(f"/todos/{todo_id}", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        assert etag.endswith('-gzip"')
+
+        assert client.put(f"/todos/{todo_id}", json={"title": "B"}, headers={"If-Match": etag}).status_code == 200
+        assert client.put(f"/todos/{todo_id}", json={"title": "C"}, headers={"If-Match": etag}).status_code == 412
+
+
+class TestNegotiation:
+    """Test Accept-Encoding negotiation."""
+
+    @pytest.mark.parametrize("header,expected", [
+        ("gzip, deflate, br, zstd", "zstd"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br, gzip", "br"),
+        ("gzip;q=0", None),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "br"),
+        ("deflate", None),
+        (None, None),
+    ])
+    def test_negotiate(self, header, expected):
+        """Test client q-values win and ties go to the server's order."""
+        assert negotiate(header, ["zstd", "br", "gzip"]) == expected
+
+
+class TestCachePolicy:
+    """Test Cache-Control and Vary per route."""
+
+    def test_todo_reads_revalidate(self, client: TestClient):
+        """Test lists and items may be stored but must be revalidated."""
+        todo_id = client.post("/todos", json={"title": "A"}).json()["id"]
+
+        for url in ("/todos", f"/todos/{todo_id}"):
+            response = client.get(url)
+            assert response.headers["cache-control"] == "private, no-cache"
+            assert "Origin" in response.headers["vary"]
+
+    def test_not_modified_keeps_policy(self, client: TestClient):
+        """Test 304 responses carry the same Cache-Control as the 200."""
+        todo_id = client.post("/todos", json={"title": "A"}).json()["id"]
+        etag = client.get(f"/todos/{todo_id}").headers["etag"]
+
+        response = client.get(f"/todos/{todo_id}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["cache-control"] == "private, no-cache"
+
+    def test_stats_max_age(self, client: TestClient):
+        """Test stats may be reused for a few seconds."""
+        response = client.get("/todos/stats")
+
+        assert response.headers["cache-control"] == f"private, max-age={TODO_STATS_MAX_AGE}"
+
+    def test_writes_and_errors_not_stored(self, client: TestClient):
+        """Test writes, errors and unlisted routes are no-store."""
+        assert client.post("/todos", json={"title": "A"}).headers["cache-control"] == "no-store"
+        assert client.get("/todos/999").headers["cache-control"] == "no-store"
+        assert client.get("/health").headers["cache-control"] == "no-store"
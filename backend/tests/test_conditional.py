@@ -0,0 +1,115 @@
+"""
+Tests for conditional requests on the Todo API.
+
+These tests verify that:
+- Reads send ETag / Last-Modified validators
+- If-None-Match and If-Modified-Since answer 304 for unchanged data
+- If-Match on PUT/DELETE rejects stale writes with 412
+"""
+
+from fastapi.testclient import TestClient
+from services.cache import MemoryCacheBackend
+
+
+class TestConditionalReads:
+    """Test ETag and Last-Modified on GET."""
+
+    def test_get_todo_not_modified(self, client: TestClient):
+        """Test GET /todos/{id} answers 304 for a matching ETag."""
+        todo_id = client.post("/todos", json={"title": "Tagged"}).json()["id"]
+        response = client.get(f"/todos/{todo_id}")
+        etag = response.headers["etag"]
+        assert "last-modified" in response.headers
+
+        response = client.get(f"/todos/{todo_id}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_etag_changes_on_update(self, client: TestClient):
+        """Test an update yields a new ETag, so old copies are refetched."""
+        todo_id = client.post("/todos", json={"title": "Tagged"}).json()["id"]
+        etag = client.get(f"/todos/{todo_id}").headers["etag"]
+
+        update = client.put(f"/todos/{todo_id}", json={"title": "Changed"})
+        assert update.headers["etag"] != etag
+
+        response = client.get(f"/todos/{todo_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["title"] == "Changed"
+
+    def test_if_modified_since(self, client: TestClient):
+        """Test If-Modified-Since answers 304 when not modified since."""
+        todo_id = client.post("/todos", json={"title": "Dated"}).json()["id"]
+        last_modified = client.get(f"/todos/{todo_id}").headers["last-modified"]
+
+        response = client.get(f"/todos/{todo_id}", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+        response = client.get(f"/todos/{todo_id}", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"})
+        assert response.status_code == 200
+
+    def test_list_not_modified(self, client: TestClient):
+        """Test GET /todos answers 304 until the page changes."""
+        client.post("/todos", json={"title": "Listed"})
+        etag = client.get("/todos").headers["etag"]
+
+        assert client.get("/todos", headers={"If-None-Match": etag}).status_code == 304
+
+        client.post("/todos", json={"title": "Another"})
+        assert client.get("/todos", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_cached_response_not_modified(self, client: TestClient, monkeypatch):
+        """Test cache hits keep their ETag and honor If-None-Match."""
+        monkeypatch.setattr("routes.caching.TODO_CACHE_ENABLED", True)
+        monkeypatch.setattr("routes.caching.todo_cache", MemoryCacheBackend())
+        todo_id = client.post("/todos", json={"title": "Cached"}).json()["id"]
+        etag = client.get(f"/todos/{todo_id}").headers["etag"]
+
+        response = client.get(f"/todos/{todo_id}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert client.get("/health/cache").json()["hits"] == 1
+
+
+class TestConditionalWrites:
+    """Test If-Match optimistic concurrency on PUT/DELETE."""
+
+    def test_update_with_matching_etag(self, client: TestClient):
+        """Test PUT succeeds when If-Match matches the current ETag."""
+        created = client.post("/todos", json={"title": "Original"})
+        etag = created.headers["etag"]
+
+        response = client.put(f"/todos/{created.json()['id']}", json={"title": "Mine"}, headers={"If-Match": etag})
+
+        assert response.status_code == 200
+        assert response.json()["title"] == "Mine"
+
+    def test_update_with_stale_etag(self, client: TestClient):
+        """Test PUT is rejected with 412 when the todo changed meanwhile."""
+        created = client.post("/todos", json={"title": "Original"})
+        todo_id, etag = created.json()["id"], created.headers["etag"]
+        client.put(f"/todos/{todo_id}", json={"title": "Theirs"})
+
+        response = client.put(f"/todos/{todo_id}", json={"title": "Mine"}, headers={"If-Match": etag})
+
+        assert response.status_code == 412
+        assert client.get(f"/todos/{todo_id}").json()["title"] == "Theirs"
+
+    def test_delete_with_stale_etag(self, client: TestClient):
+        """Test DELETE is rejected with 412 for a stale ETag."""
+        created = client.post("/todos", json={"title": "Original"})
+        todo_id = created.json()["id"]
+        client.put(f"/todos/{todo_id}", json={"completed": True})
+
+        response = client.delete(f"/todos/{todo_id}", headers={"If-Match": created.headers["etag"]})
+        assert response.status_code == 412
+
+        response = client.delete(f"/todos/{todo_id}", headers={"If-Match": "*"})
+        assert response.status_code == 200
+
+    def test_if_match_on_missing_todo(self, client: TestClient):
+        """Test If-Match on a non-existent todo still answers 404."""
+        response = client.put("/todos/999", json={"title": "x"}, headers={"If-Match": "*"})
+        assert response.status_code == 404
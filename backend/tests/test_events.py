@@ -0,0 +1,229 @@
+"""
+Tests for the todo change feed (GET /todos/events).
+
+These tests verify that:
+- Write handlers publish created/updated/deleted/imported events
+- The broker replays missed events after a last event id
+- Clients whose id left the buffer, or that fall behind, get a reset
+- The SSE stream frames events, heartbeats and the reconnect delay
+- A dropped LISTEN connection is reopened, followed by a reset
+"""
+
+import asyncio
+import json
+import socket
+import psycopg2  # type: ignore[import-untyped]
+import pytest
+from fastapi.testclient import TestClient
+from routes import changes
+from services import events
+from services.events import ChangeEvent, MemoryBroker, PostgresBroker
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    """Give the routes a fresh in-process broker."""
+    broker = MemoryBroker(buffer_size=10, queue_size=10)
+    monkeypatch.setattr(changes, "broker", broker)
+    return broker
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+class TestChangeFeedPublishing:
+    """Test the write handlers publish events."""
+
+    def test_writes_publish_events(self, client: TestClient, broker):
+        """Test create, update, delete and bulk writes reach a subscriber."""
+
+        async def scenario():
+            subscription = broker.subscribe()
+            todo = client.post("/todos", json={"title": "A"}).json()
+            client.put(f"/todos/{todo['id']}", json={"completed": True})
+            client.delete(f"/todos/{todo['id']}")
+            client.post("/todos/bulk", json=[{"title": "B"}])
+            client.post("/todos/import", content=b'{"title": "C"}\n{"title": "D"}\n')
+            await asyncio.sleep(0)
+            return drain(subscription)
+
+        events = asyncio.run(scenario())
+
+        assert [event.type for event in events] == ["created", "updated", "deleted", "created", "imported"]
+        assert json.loads(events[0].data)["title"] == "A"
+        assert json.loads(events[1].data)["completed"] is True
+        assert json.loads(events[2].data) == {"id": json.loads(events[0].data)["id"]}
+        assert json.loads(events[4].data) == {"count": 2}
+        assert [event.id for event in events] == sorted(event.id for event in events)
+
+    def test_failed_writes_publish_nothing(self, client: TestClient, broker):
+        """Test a 404 update or delete publishes no event."""
+        client.put("/todos/999", json={"title": "x"})
+        client.delete("/todos/999")
+
+        assert broker.stats()["published"] == 0
+
+    def test_invalid_event_id(self, client: TestClient, broker):
+        """Test a non-numeric last event id is rejected."""
+        response = client.get("/todos/events", headers={"Last-Event-ID": "abc"})
+        assert response.status_code == 400
+
+
+class TestMemoryBroker:
+    """Test replay and backpressure of the in-process broker."""
+
+    def test_replay_after_last_event_id(self):
+        """Test a resuming subscriber gets exactly the events after its id."""
+        broker = MemoryBroker(buffer_size=10)
+        first, second, third = (broker.publish("created", b"{}") for _ in range(3))
+
+        async def scenario():
+            return broker.subscribe(first.id)
+
+        subscription = asyncio.run(scenario())
+        assert subscription.backlog == [second, third]
+        assert subscription.reset is False
+
+    def test_reset_when_id_left_buffer(self):
+        """Test an id older than the buffer yields a reset instead of a gap."""
+        broker = MemoryBroker(buffer_size=2)
+        first = broker.publish("created", b"{}")
+        broker.publish("created", b"{}")
+        broker.publish("created", b"{}")
+
+        async def scenario():
+            return broker.subscribe(first.id)
+
+        subscription = asyncio.run(scenario())
+        assert subscription.backlog == []
+        assert subscription.reset is True
+
+    def test_slow_subscriber_overflows(self):
+        """Test a full queue is replaced by a single reset marker."""
+        broker = MemoryBroker(queue_size=2)
+
+        async def scenario():
+            subscription = broker.subscribe()
+            for _ in range(5):
+                broker.publish("created", b"{}")
+            await asyncio.sleep(0)
+            return drain(subscription)
+
+        assert asyncio.run(scenario()) == [None]
+        assert broker.stats()["dropped_subscribers"] == 1
+
+    def test_notify_payload_round_trip(self):
+        """Test events survive the JSON encoding used for NOTIFY."""
+        event = ChangeEvent(id=42, type="updated", data=b'{"id": 1}')
+        assert ChangeEvent.from_json(event.to_json()) == event
+
+
+class FakeListener:
+    """A LISTEN connection over a socket pair: poll() fails once the peer hangs up"""
+
+    def __init__(self):
+        self.sock, self.peer = socket.socketpair()
+        self.driver_connection = self
+        self.notifies = []
+        self.executed = []
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def poll(self):
+        if not self.sock.recv(1):
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement):
+        self.executed.append(statement)
+
+    def close(self):
+        self.sock.close()
+        self.peer.close()
+
+
+class TestPostgresBroker:
+    """Test the LISTEN connection of the cross-worker broker survives a drop."""
+
+    def test_reconnects_after_connection_loss(self, monkeypatch):
+        """Test a lost LISTEN connection is reopened with backoff and subscribers get a reset."""
+        listeners = []
+        attempts = []
+
+        def connect(engine):
+            attempts.append(engine)
+            if len(attempts) == 2:
+                raise psycopg2.OperationalError("the database system is starting up")
+            listeners.append(FakeListener())
+            return listeners[-1]
+
+        monkeypatch.setattr(events, "_autocommit_connection", connect)
+        broker = PostgresBroker(lambda: None, reconnect_delay=0.01, buffer_size=10)
+
+        async def scenario():
+            await broker.start()
+            subscription = broker.subscribe()
+            listeners[0].peer.close()
+            for _ in range(200):
+                await asyncio.sleep(0.01)
+                if not subscription.queue.empty():
+                    break
+            await broker.stop()
+            return drain(subscription)
+
+        received = asyncio.run(scenario())
+
+        assert [event.type for event in received] == [events.RESET]
+        assert len(attempts) == 3
+        assert [listener.executed for listener in listeners] == [['LISTEN "todo_events"']] * 2
+        assert broker.stats()["listen_reconnects"] == 1
+
+
+class TestEventStream:
+    """Test the SSE framing of the stream."""
+
+    def test_stream_frames(self, broker, monkeypatch):
+        """Test retry, replayed and live events, and heartbeats."""
+        monkeypatch.setattr(changes, "TODO_EVENTS_HEARTBEAT", 0.01)
+        replayed = broker.publish("created", b'{"id": 1}')
+        first = broker.publish("deleted", b'{"id": 1}')
+
+        async def scenario():
+            stream = changes.event_stream(replayed.id)
+            frames = [await stream.__anext__() for _ in range(2)]
+            live = broker.publish("created", b'{"id": 2}')
+            frames += [await stream.__anext__() for _ in range(2)]
+            await stream.aclose()
+            return frames, live
+
+        frames, live = asyncio.run(scenario())
+
+        assert frames[0] == b"retry: %d\n\n" % changes.TODO_EVENTS_RETRY
+        assert frames[1] == b'id: %d\nevent: deleted\ndata: {"id": 1}\n\n' % first.id
+        assert frames[2] == b'id: %d\nevent: created\ndata: {"id": 2}\n\n' % live.id
+        assert frames[3] == b": keep-alive\n\n"
+        assert broker.stats()["subscribers"] == 0
+
+    def test_stream_reset(self, broker):
+        """Test an unknown old id starts the stream with a reset event."""
+
+        async def scenario():
+            stream = changes.event_stream(1)
+            frames = [await stream.__anext__() for _ in range(2)]
+            await stream.aclose()
+            return frames
+
+        assert asyncio.run(scenario())[1] == changes.RESET_EVENT
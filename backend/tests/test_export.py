@@ -0,0 +1,78 @@
+"""
+Tests for the streaming GET /todos/export endpoint.
+
+These tests verify that:
+- The whole table is exported as NDJSON or CSV in id order
+- Export filters by completion and updated_at range
+- Rows are streamed in batches from a server-side cursor
+- The async routes produce the same output
+"""
+
+import csv
+import io
+import json
+import pytest
+from fastapi.testclient import TestClient
+from routes import export
+
+
+@pytest.fixture
+def todos(client: TestClient):
+    """Create a few todos and return them as returned by the API."""
+    data = [{"title": f"Todo {i}", "completed": i % 2 == 0} for i in range(5)]
+    return [client.post("/todos", json=item).json() for item in data]
+
+
+class TestTodoExport:
+    """Test the streaming export endpoint."""
+
+    def test_export_ndjson(self, client: TestClient, todos):
+        """Test the default format is one JSON document per line."""
+        response = client.get("/todos/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert 'filename="todos.ndjson"' in response.headers["content-disposition"]
+        assert [json.loads(line) for line in response.text.splitlines()] == todos
+
+    def test_export_csv(self, client: TestClient, todos):
+        """Test CSV export has a header row and one row per todo."""
+        response = client.get("/todos/export?format=csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert list(rows[0]) == ["title", "description", "completed", "id", "created_at", "updated_at"]
+        assert [int(row["id"]) for row in rows] == [t["id"] for t in todos]
+        assert rows[0]["completed"] == "True"
+
+    def test_export_filters(self, client: TestClient, todos):
+        """Test ?completed= and the updated_at range narrow the export."""
+        done = client.get("/todos/export?completed=true").text.splitlines()
+        assert [json.loads(line)["id"] for line in done] == [todos[0]["id"], todos[2]["id"], todos[4]["id"]]
+
+        future = client.get("/todos/export?updated_after=2999-01-01T00:00:00").text
+        assert future == ""
+        past = client.get("/todos/export?updated_before=2999-01-01T00:00:00").text
+        assert len(past.splitlines()) == len(todos)
+
+    def test_export_streams_in_batches(self, client: TestClient, todos, monkeypatch):
+        """Test rows are yielded one batch per chunk."""
+        monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+
+        chunks = list(export.iter_export("ndjson", export.TodoFilter()))
+
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+    def test_export_invalid_format(self, client: TestClient):
+        """Test an unknown format is rejected."""
+        assert client.get("/todos/export?format=xml").status_code == 422
+
+    def test_async_export(self, async_client: TestClient):
+        """Test the async routes stream the same export."""
+        async_client.post("/todos/bulk", json=[{"title": "A"}, {"title": "B", "completed": True}])
+
+        lines = async_client.get("/todos/export").text.splitlines()
+        assert [json.loads(line)["title"] for line in lines] == ["A", "B"]
+        rows = list(csv.DictReader(io.StringIO(async_client.get("/todos/export?format=csv&completed=true").text)))
+        assert [row["title"] for row in rows] == ["B"]
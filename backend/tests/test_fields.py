@@ -0,0 +1,124 @@
+"""
+Tests for sparse fieldsets (fields= on GET /todos and GET /todos/{id}).
+
+These tests verify that:
+- Only the requested fields are serialized, in schema order
+- Only the requested columns (plus id) are selected from the database
+- The summary projection matches the TodoSummary schema
+- Projections get their own ETags and cache entries
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from models.schemas import TodoSummary
+from routes import caching
+from services.cache import MemoryCacheBackend
+
+
+def create_todo(client: TestClient, **data) -> dict:
+    return client.post("/todos", json={"title": "Todo", "description": "long " * 200, **data}).json()
+
+
+class TestListFields:
+    """Test fields= on GET /todos."""
+
+    def test_summary_projection(self, client: TestClient):
+        """Test fields=summary returns id, title and completed only."""
+        create_todo(client, title="A", completed=True)
+
+        data = client.get("/todos?fields=summary").json()
+
+        assert data == [{"title": "A", "completed": True, "id": data[0]["id"]}]
+        TodoSummary.model_validate(data[0])
+
+    def test_field_list(self, client: TestClient):
+        """Test explicit fields are returned in schema order."""
+        create_todo(client, title="A")
+
+        data = client.get("/todos?fields=updated_at,title").json()
+
+        assert list(data[0]) == ["title", "updated_at"]
+
+    def test_columns_not_loaded(self, client: TestClient, query_counter):
+        """Test the description column is not selected for a summary."""
+        create_todo(client)
+        query_counter.clear()
+
+        client.get("/todos?fields=summary")
+
+        select = next(statement for statement in query_counter if statement.lstrip().startswith("SELECT"))
+        assert "description" not in select.split("FROM")[0]
+
+    def test_cursor_without_id_field(self, client: TestClient):
+        """Test pagination cursors still work when id is not requested."""
+        for title in ("A", "B", "C"):
+            create_todo(client, title=title)
+
+        first = client.get("/todos?fields=title&limit=2")
+        second = client.get(f"/todos?fields=title&limit=2&after={first.headers['x-next-cursor']}")
+
+        assert [todo["title"] for todo in first.json() + second.json()] == ["A", "B", "C"]
+
+    def test_unknown_field(self, client: TestClient):
+        """Test unknown fields are rejected."""
+        response = client.get("/todos?fields=title,secret")
+
+        assert response.status_code == 400
+        assert "secret" in response.json()["detail"]
+
+    def test_async_router(self, async_client: TestClient):
+        """Test the async routes honour fields= as well."""
+        todo_id = async_client.post("/todos", json={"title": "A", "description": "d"}).json()["id"]
+
+        assert async_client.get("/todos?fields=summary").json() == [{"title": "A", "completed": False, "id": todo_id}]
+        assert async_client.get(f"/todos/{todo_id}?fields=title").json() == {"title": "A"}
+
+
+class TestItemFields:
+    """Test fields= on GET /todos/{id}."""
+
+    def test_projection(self, client: TestClient):
+        """Test a single todo can be projected."""
+        todo = create_todo(client, title="A")
+
+        response = client.get(f"/todos/{todo['id']}?fields=summary")
+
+        assert response.json() == {"title": "A", "completed": False, "id": todo["id"]}
+        assert "last-modified" not in response.headers
+
+    def test_projection_etag(self, client: TestClient):
+        """Test projections have their own ETag, which changes with the selected fields."""
+        todo = create_todo(client, title="A")
+        url = f"/todos/{todo['id']}?fields=title"
+        full_etag = client.get(f"/todos/{todo['id']}").headers["etag"]
+        etag = client.get(url).headers["etag"]
+        assert etag != full_etag
+
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        client.put(f"/todos/{todo['id']}", json={"title": "B"})
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    def test_not_found(self, client: TestClient):
+        """Test a projection of a missing todo is a 404."""
+        assert client.get("/todos/999?fields=title").status_code == 404
+
+
+class TestCachedFields:
+    """Test projections in the read cache."""
+
+    @pytest.fixture
+    def cache_enabled(self, monkeypatch):
+        monkeypatch.setattr(caching, "TODO_CACHE_ENABLED", True)
+        monkeypatch.setattr(caching, "todo_cache", MemoryCacheBackend())
+
+    def test_projection_cached_separately(self, client: TestClient, cache_enabled):
+        """Test full and projected responses do not overwrite each other, and writes drop both."""
+        todo = create_todo(client, title="A")
+        url = f"/todos/{todo['id']}"
+
+        assert client.get(url).json()["description"]
+        assert client.get(url + "?fields=title").json() == {"title": "A"}
+        assert client.get(url).json()["description"]
+
+        client.put(url, json={"title": "B"})
+        assert client.get(url + "?fields=title").json() == {"title": "B"}
@@ -0,0 +1,94 @@
+"""
+Tests for filtering, searching and sorting GET /todos.
+
+These tests verify that:
+- Todos can be filtered by completion and time ranges
+- Text search matches title and description
+- Sorting works in both directions, with cursors for id order
+- The supporting indexes are declared on the model
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from models.todo import Todo
+
+
+@pytest.fixture
+def todos(client: TestClient):
+    """Create a small set of todos and return their ids."""
+    data = [
+        {"title": "Buy milk", "description": "2 litres", "completed": True},
+        {"title": "Write report", "description": "quarterly numbers"},
+        {"title": "Call mom"},
+        {"title": "Archive photos", "description": "buy a disk", "completed": True},
+    ]
+    return [client.post("/todos", json=item).json()["id"] for item in data]
+
+
+class TestTodoFilters:
+    """Test server-side filtering of GET /todos."""
+
+    def test_filter_completed(self, client: TestClient, todos):
+        """Test ?completed= returns only matching todos."""
+        done = client.get("/todos?completed=true").json()
+        pending = client.get("/todos?completed=false").json()
+
+        assert [t["id"] for t in done] == [todos[0], todos[3]]
+        assert [t["id"] for t in pending] == [todos[1], todos[2]]
+
+    def test_search_title_and_description(self, client: TestClient, todos):
+        """Test ?q= searches title and description case-insensitively."""
+        found = client.get("/todos?q=BUY").json()
+
+        assert [t["id"] for t in found] == [todos[0], todos[3]]
+
+    def test_search_combined_with_filter(self, client: TestClient, todos):
+        """Test search and completed filter combine."""
+        found = client.get("/todos?q=report&completed=true").json()
+        assert found == []
+
+    def test_created_time_range(self, client: TestClient, todos):
+        """Test created_after/created_before bound the listing."""
+        assert len(client.get("/todos?created_after=2000-01-01T00:00:00").json()) == 4
+        assert client.get("/todos?created_before=2000-01-01T00:00:00").json() == []
+
+    def test_sort_by_title(self, client: TestClient, todos):
+        """Test ?sort=title&order=desc orders by title descending."""
+        titles = [t["title"] for t in client.get("/todos?sort=title&order=desc").json()]
+
+        assert titles == ["Write report", "Call mom", "Buy milk", "Archive photos"]
+
+    def test_invalid_sort_field(self, client: TestClient):
+        """Test unknown sort fields are rejected."""
+        assert client.get("/todos?sort=description").status_code == 422
+
+    def test_descending_cursor_pagination(self, client: TestClient, todos):
+        """Test cursors follow descending id order."""
+        response = client.get("/todos?order=desc&limit=2")
+        assert [t["id"] for t in response.json()] == [todos[3], todos[2]]
+
+        cursor = response.headers["x-next-cursor"]
+        response = client.get(f"/todos?order=desc&limit=2&after={cursor}")
+        assert [t["id"] for t in response.json()] == [todos[1], todos[0]]
+
+        cursor = response.headers["x-prev-cursor"]
+        response = client.get(f"/todos?order=desc&limit=2&before={cursor}")
+        assert [t["id"] for t in response.json()] == [todos[3], todos[2]]
+
+    def test_cursor_requires_id_sort(self, client: TestClient, todos):
+        """Test cursors cannot be combined with other sort fields."""
+        cursor = client.get("/todos?limit=1").headers["x-next-cursor"]
+
+        assert client.get(f"/todos?sort=title&after={cursor}").status_code == 400
+
+
+class TestTodoIndexes:
+    """Test the indexes backing the list filters."""
+
+    def test_indexes_declared(self):
+        """Test the composite (live rows only) and full-text indexes exist on the table."""
+        indexes = {index.name: index for index in Todo.__table__.indexes}
+
+        assert str(indexes["ix_todos_live_completed_created_at"].dialect_options["postgresql"]["where"]) == "deleted_at IS NULL"
+        assert str(indexes["ix_todos_live_search"].dialect_options["postgresql"]["where"]) == "deleted_at IS NULL"
+        assert str(indexes["ix_todos_live_updated_at"].dialect_options["sqlite"]["where"]) == "deleted_at IS NULL"
@@ -0,0 +1,98 @@
+"""
+Tests for the health probes and the schema command.
+
+These tests verify that:
+- Liveness answers without touching the database
+- Readiness checks a pooled connection, caches the result and returns 503 on failure
+- Concurrent readiness probes share one database check
+- migrate.py creates missing tables and reports them in --check mode
+"""
+
+import asyncio
+from sqlalchemy import create_engine, inspect
+import main
+import migrate
+from services.readiness import ReadinessProbe
+
+
+class TestLiveness:
+    """Test the liveness endpoints."""
+
+    def test_live(self, client, query_counter):
+        """Test /health/live and /health answer without SQL."""
+        assert client.get("/health/live").json() == {"status": "alive"}
+        assert client.get("/health").status_code == 200
+        assert query_counter == []
+
+
+class TestReadiness:
+    """Test GET /health/ready."""
+
+    def test_ready_and_cached(self, client, query_counter):
+        """Test the database is checked once and the result reused within the TTL."""
+        main.readiness.invalidate()
+
+        first = client.get("/health/ready")
+        second = client.get("/health/ready")
+
+        assert first.status_code == 200
+        assert first.json()["status"] == "ready"
+        assert first.json()["cached"] is False
+        assert second.json()["cached"] is True
+        assert query_counter == ["SELECT 1"]
+
+    def test_unavailable_database(self, client, monkeypatch):
+        """Test a failing check returns 503 with the error."""
+        async def broken():
+            raise ConnectionError("connection refused")
+
+        monkeypatch.setattr(main.readiness, "check", broken)
+        main.readiness.invalidate()
+        try:
+            response = client.get("/health/ready")
+        finally:
+            main.readiness.invalidate()
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+        assert "connection refused" in response.json()["database"]
+
+    def test_timeout(self):
+        """Test a hanging check counts as not ready."""
+        async def hang():
+            await asyncio.sleep(1)
+
+        probe = ReadinessProbe(hang, ttl=5, timeout=0.01)
+
+        assert asyncio.run(probe.status())["status"] == "unavailable"
+
+    def test_concurrent_probes_share_one_check(self):
+        """Test probes arriving during a check wait for it instead of re-checking."""
+        async def slow():
+            await asyncio.sleep(0.01)
+
+        probe = ReadinessProbe(slow, ttl=5)
+
+        async def scenario():
+            return await asyncio.gather(*(probe.status() for _ in range(10)))
+
+        results = asyncio.run(scenario())
+
+        assert probe.checks == 1
+        assert all(result["status"] == "ready" for result in results)
+
+
+class TestMigrate:
+    """Test the standalone schema command."""
+
+    def test_create_and_check(self):
+        """Test missing tables are reported, then created idempotently."""
+        engine = create_engine("sqlite://")
+
+        assert "todos" in migrate.missing_tables(engine)
+
+        migrate.create_schema(engine)
+        migrate.create_schema(engine)
+
+        assert migrate.missing_tables(engine) == []
+        assert "todos" in inspect(engine).get_table_names()
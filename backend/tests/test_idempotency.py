@@ -0,0 +1,253 @@
+"""
+Tests for Idempotency-Key handling and single-flight reads.
+
+These tests verify that:
+- Retrying a write with the same Idempotency-Key replays the first response
+- Reusing a key for a different request is rejected
+- Keys are scoped per client, and the store uses the async session in DB_ASYNC mode
+- Concurrent duplicates wait for the first request instead of running
+- Keys claimed elsewhere, released and expired behave as documented
+- Identical concurrent reads share one call, and writes end the sharing
+"""
+
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from routes import caching, idempotency
+from routes.idempotency import IdempotencyMiddleware, idempotency_store
+from services.idempotency import CLAIMED, IN_FLIGHT
+from services.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def key_headers(key: str) -> dict:
+    return {"Idempotency-Key": key}
+
+
+def stored_key(key: str) -> str:
+    """The store key of a header sent by the test client"""
+    return idempotency.scoped_key({"client": ("testclient", 50000), "headers": []}, key)
+
+
+class TestIdempotencyKey:
+    """Test Idempotency-Key on the todo write routes."""
+
+    def test_retry_replays_create(self, client: TestClient):
+        """Test a retried create returns the first todo and creates nothing."""
+        first = client.post("/todos", json={"title": "Once"}, headers=key_headers("create-1"))
+        retry = client.post("/todos", json={"title": "Once"}, headers=key_headers("create-1"))
+
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+        assert len(client.get("/todos").json()) == 1
+
+    def test_replay_from_database(self, client: TestClient):
+        """Test another worker (empty memory front) replays from the table."""
+        first = client.post("/todos", json={"title": "Once"}, headers=key_headers("create-2"))
+        idempotency_store.clear()
+
+        retry = client.post("/todos", json={"title": "Once"}, headers=key_headers("create-2"))
+
+        assert retry.json()["id"] == first.json()["id"]
+        assert retry.headers["etag"] == first.headers["etag"]
+
+    def test_without_key_creates_twice(self, client: TestClient):
+        """Test writes without a key are not deduplicated."""
+        client.post("/todos", json={"title": "Twice"})
+        client.post("/todos", json={"title": "Twice"})
+
+        assert len(client.get("/todos").json()) == 2
+
+    def test_key_reused_for_other_request(self, client: TestClient):
+        """Test a key sent with a different body or path is a 422."""
+        todo_id = client.post("/todos", json={"title": "A"}, headers=key_headers("reused")).json()["id"]
+
+        assert client.post("/todos", json={"title": "B"}, headers=key_headers("reused")).status_code == 422
+        assert client.delete(f"/todos/{todo_id}", headers=key_headers("reused")).status_code == 422
+
+    def test_keys_are_scoped_per_client(self, client: TestClient):
+        """Test another client sending the same key and body runs its own request."""
+        other = TestClient(client.app, client=("203.0.113.9", 50000))
+        mine = client.post("/todos", json={"title": "Same"}, headers=key_headers("shared"))
+
+        theirs = other.post("/todos", json={"title": "Same"}, headers=key_headers("shared"))
+
+        assert "idempotent-replayed" not in theirs.headers
+        assert theirs.json()["id"] != mine.json()["id"]
+        assert other.post("/todos", json={"title": "Other"}, headers=key_headers("shared")).status_code == 422
+
+    def test_client_errors_are_replayed(self, client: TestClient):
+        """Test a stored 404 is replayed rather than run again."""
+        first = client.put("/todos/999", json={"title": "Missing"}, headers=key_headers("missing"))
+        retry = client.put("/todos/999", json={"title": "Missing"}, headers=key_headers("missing"))
+
+        assert first.status_code == retry.status_code == 404
+        assert retry.headers["idempotent-replayed"] == "true"
+
+    def test_invalid_key(self, client: TestClient):
+        """Test empty and overlong keys are rejected."""
+        assert client.post("/todos", json={"title": "A"}, headers=key_headers("")).status_code == 400
+        assert client.post("/todos", json={"title": "A"}, headers=key_headers("k" * 256)).status_code == 400
+
+    def test_in_flight_elsewhere_conflicts(self, client: TestClient, monkeypatch):
+        """Test a key another worker is still running gets 409 after the wait."""
+        monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_TIMEOUT", 0.1)
+        assert idempotency_store.claim(stored_key("busy")) == CLAIMED
+
+        response = client.post("/todos", json={"title": "A"}, headers=key_headers("busy"))
+
+        assert response.status_code == 409
+        assert client.get("/todos").json() == []
+
+    def test_released_key_runs_again(self, client: TestClient):
+        """Test a released claim (failed first attempt) lets the retry run."""
+        assert idempotency_store.claim(stored_key("failed")) == CLAIMED
+        assert idempotency_store.claim(stored_key("failed")) == IN_FLIGHT
+        idempotency_store.release(stored_key("failed"))
+
+        response = client.post("/todos", json={"title": "A"}, headers=key_headers("failed"))
+
+        assert response.status_code == 200
+        assert len(client.get("/todos").json()) == 1
+
+    def test_expired_key_is_taken_over(self, client: TestClient, monkeypatch):
+        """Test a stored response is not replayed after its TTL."""
+        monkeypatch.setattr(idempotency_store, "ttl", -1)
+        client.post("/todos", json={"title": "A"}, headers=key_headers("expired"))
+
+        response = client.post("/todos", json={"title": "A"}, headers=key_headers("expired"))
+
+        assert "idempotent-replayed" not in response.headers
+        assert len(client.get("/todos").json()) == 2
+
+
+class TestConcurrentDuplicates:
+    """Test duplicates that arrive while the first request runs."""
+
+    def test_duplicates_wait_and_replay(self, client: TestClient):
+        """Test concurrent requests with one key run the handler once."""
+        calls = 0
+
+        async def slow_create(scope, receive, send):
+            nonlocal calls
+            calls += 1
+            # What the router records when a route handles the request
+            scope["route"] = "/todos/"
+            await receive()
+            await asyncio.sleep(0.05)
+            await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": str(calls).encode()})
+
+        async def send_duplicates():
+            transport = httpx.ASGITransport(app=IdempotencyMiddleware(slow_create))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await asyncio.gather(*(
+                    http.post("/todos", content=b"{}", headers=key_headers("concurrent")) for _ in range(5)
+                ))
+
+        responses = asyncio.run(send_duplicates())
+
+        assert calls == 1
+        assert {response.status_code for response in responses} == {201}
+        assert {response.text for response in responses} == {"1"}
+        assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 4
+
+
+class TestAsyncStore:
+    """Test the key rows go through the async session in DB_ASYNC mode."""
+
+    def test_async_session_is_used(self, client: TestClient, monkeypatch):
+        """Test claim, complete and replay never open a sync session when DB_ASYNC is on."""
+        monkeypatch.setattr(idempotency.database, "DB_ASYNC", True)
+        monkeypatch.setattr(idempotency_store, "session_factory", None)
+
+        async def create(scope, receive, send):
+            scope["route"] = "/todos/"
+            await receive()
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b"created"})
+
+        async def send_twice():
+            transport = httpx.ASGITransport(app=IdempotencyMiddleware(create))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                first = await http.post("/todos", content=b"{}", headers=key_headers("async"))
+                idempotency_store.clear()
+                return first, await http.post("/todos", content=b"{}", headers=key_headers("async"))
+
+        first, retry = asyncio.run(send_twice())
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.headers["idempotent-replayed"] == "true"
+
+
+class TestSingleFlight:
+    """Test collapsing of identical concurrent calls."""
+
+    def test_threads_share_one_call(self):
+        """Test callers arriving during a call get its result without running it."""
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "todo"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("key", load)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("key", load))) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        while flight.shared < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        assert results == ["todo"] * 5
+        assert len(calls) == 1
+
+    def test_errors_are_shared(self):
+        """Test an exception reaches the caller and the failed call is not kept."""
+        flight = SingleFlight()
+
+        with pytest.raises(ValueError):
+            flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+        # Nothing is kept after the call
+        assert flight.do("key", lambda: 1) == 1
+
+    def test_async_share_one_call(self):
+        """Test concurrent coroutines share one awaited call."""
+        flight = AsyncSingleFlight()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        async def main():
+            return await asyncio.gather(*(flight.do("key", load) for _ in range(5)))
+
+        assert asyncio.run(main()) == [1] * 5
+        assert flight.shared == 4
+
+    def test_write_forgets_running_reads(self, monkeypatch):
+        """Test an update makes later readers start a new query."""
+        flight = SingleFlight()
+        monkeypatch.setattr(caching, "todo_reads", flight)
+        flight._calls[(1, None, False)] = object()
+        flight._calls[(2, None, False)] = object()
+
+        caching.invalidate_updated([1])
+
+        assert list(flight._calls) == [(2, None, False)]
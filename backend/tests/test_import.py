@@ -0,0 +1,136 @@
+"""
+Tests for streaming todo import (POST /todos/import and TodoImporter).
+
+These tests verify that:
+- NDJSON and CSV uploads are validated and loaded
+- Invalid rows are reported by line number without aborting the load
+- A line is never split into several rows
+- Records split across upload chunks are reassembled
+- Rows are written in batches of IMPORT_CHUNK_SIZE
+"""
+
+from fastapi.testclient import TestClient
+from models.todo import Todo
+from services.todo_import import TodoImporter, import_stream
+
+
+class TestTodoImport:
+    """Test the import endpoint."""
+
+    def test_import_ndjson(self, client: TestClient):
+        """Test NDJSON rows are created with schema defaults applied."""
+        body = b'{"title": "A"}\n{"title": "B", "description": "d", "completed": true}\n'
+        response = client.post("/todos/import", content=body)
+
+        assert response.status_code == 200
+        assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+        todos = client.get("/todos").json()
+        assert [(t["title"], t["description"], t["completed"]) for t in todos] == [
+            ("A", None, False),
+            ("B", "d", True),
+        ]
+
+    def test_import_csv(self, client: TestClient):
+        """Test CSV with a header row, quoted newlines and empty cells."""
+        body = b'title,description,completed\nA,,true\n"B, quoted","two\nlines",false\n'
+        response = client.post("/todos/import?format=csv", content=body)
+
+        assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+        todos = client.get("/todos").json()
+        assert [(t["title"], t["description"], t["completed"]) for t in todos] == [
+            ("A", None, True),
+            ("B, quoted", "two\nlines", False),
+        ]
+
+    def test_invalid_rows_are_reported(self, client: TestClient):
+        """Test bad rows are skipped with their line numbers."""
+        body = b'{"title": "ok"}\nnot json\n[1]\n{"title": ""}\n\n{"title": "also ok"}\n'
+        result = client.post("/todos/import", content=body).json()
+
+        assert result["imported"] == 2
+        assert result["failed"] == 3
+        assert [error["line"] for error in result["errors"]] == [2, 3, 4]
+        assert result["errors"][2]["error"].startswith("title:")
+        assert [t["title"] for t in client.get("/todos").json()] == ["ok", "also ok"]
+
+    def test_several_objects_on_one_line(self, client: TestClient):
+        """Test a line with comma-separated objects is one invalid row, not several todos."""
+        body = b'{"title": "A"}\n{"title": "x"},{"title": "y"}\n'
+        result = client.post("/todos/import", content=body).json()
+
+        assert (result["imported"], result["failed"]) == (1, 1)
+        assert result["errors"][0]["line"] == 2
+        assert [t["title"] for t in client.get("/todos").json()] == ["A"]
+
+    def test_rows_never_shift_between_lines(self, client: TestClient):
+        """Test lines that would line up again when joined are still checked one by one."""
+        body = b'{"title": "A"},{"title": "B"}\n{"title": "C", "tags": [1\n2]}\n{"title": "D"}\n'
+        result = client.post("/todos/import", content=body).json()
+
+        assert (result["imported"], result["failed"]) == (1, 3)
+        assert [error["line"] for error in result["errors"]] == [1, 2, 3]
+        assert [t["title"] for t in client.get("/todos").json()] == ["D"]
+
+    def test_csv_field_count_mismatch(self, client: TestClient):
+        """Test CSV rows with the wrong number of fields are rejected."""
+        body = b"title,completed\nA,true\nB\n"
+        result = client.post("/todos/import?format=csv", content=body).json()
+
+        assert result["imported"] == 1
+        assert result["errors"] == [{"line": 3, "error": "Expected 2 fields, got 1"}]
+
+    def test_import_invalidates_list_cache(self, client: TestClient):
+        """Test imported todos show up in subsequent listings."""
+        assert client.get("/todos").json() == []
+        client.post("/todos/import", content=b'{"title": "A"}\n')
+        assert len(client.get("/todos").json()) == 1
+
+    def test_async_import(self, async_client: TestClient):
+        """Test the async routes load the same upload."""
+        result = async_client.post("/todos/import", content=b'{"title": "A"}\n{"title": ""}\n').json()
+
+        assert result["imported"] == 1
+        assert result["failed"] == 1
+        assert [t["title"] for t in async_client.get("/todos").json()] == ["A"]
+
+
+class TestTodoImporter:
+    """Test the incremental parser directly."""
+
+    def test_records_split_across_chunks(self, test_db, client: TestClient):
+        """Test lines and multi-byte characters cut by chunk boundaries."""
+        data = 'title,description\n"zażółć","a\nb"\nlast,x'.encode()
+        chunks = [data[i : i + 3] for i in range(0, len(data), 3)]
+
+        result = import_stream(test_db, chunks, "csv")
+
+        assert result == {"imported": 2, "failed": 0, "errors": []}
+        assert [(t.title, t.description) for t in test_db.query(Todo).order_by(Todo.id)] == [
+            ("zażółć", "a\nb"),
+            ("last", "x"),
+        ]
+
+    def test_batches_of_chunk_size(self):
+        """Test full batches are returned as soon as they fill up."""
+        importer = TodoImporter("ndjson", chunk_size=2)
+
+        batches = importer.feed(b'{"title": "1"}\n{"title": "2"}\n{"title": "3"}\n')
+        assert [batch.lines for batch in batches] == [[1, 2]]
+        assert [batch.lines for batch in importer.finish()] == [[3]]
+
+    def test_error_list_is_capped(self):
+        """Test only max_errors failures are listed but all are counted."""
+        importer = TodoImporter("ndjson", max_errors=2)
+        importer.feed(b"x\n" * 5)
+        importer.finish()
+
+        assert importer.failed == 5
+        assert len(importer.errors) == 2
+
+    def test_unterminated_quote(self):
+        """Test a dangling quoted field is reported at its first line."""
+        importer = TodoImporter("csv")
+        importer.feed(b'title\n"open\nstill open\n')
+        importer.finish()
+
+        assert importer.errors == [{"line": 2, "error": "Unterminated quoted field"}]
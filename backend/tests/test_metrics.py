@@ -0,0 +1,144 @@
+"""
+Tests for request and query metrics (GET /metrics).
+
+These tests verify that:
+- Metrics are rendered in the Prometheus text format
+- Requests are counted per route template, method and status
+- SQL statements are timed, and slow queries and N+1 patterns flagged
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from config.pool import TimedQueuePool
+import config.queries
+from config.queries import instrument_engine, track_queries, uninstrument_engine
+from routes import metrics as route_metrics
+from routes.metrics import MetricsMiddleware, pool_collector
+from services.metrics import MetricsRegistry
+from tests.conftest import test_engine
+
+
+@pytest.fixture
+def instrumented_engine():
+    """Time the statements of the test engine."""
+    instrument_engine(test_engine)
+    yield test_engine
+    uninstrument_engine(test_engine)
+
+
+class TestMetricsRegistry:
+    """Test the metric primitives and text exposition."""
+
+    def test_render(self):
+        """Test counters, gauges and cumulative histogram buckets."""
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests", ("route",))
+        in_flight = registry.gauge("in_flight", "In flight")
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+        requests.inc('/a"b')
+        in_flight.inc()
+        in_flight.dec()
+        latency.observe(0.05)
+        latency.observe(0.5)
+
+        lines = registry.render().splitlines()
+        assert "# TYPE requests_total counter" in lines
+        assert 'requests_total{route="/a\\"b"} 1' in lines
+        assert "in_flight 0" in lines
+        assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+        assert "latency_seconds_count 2" in lines
+
+
+class TestRequestMetrics:
+    """Test the metrics middleware and /metrics endpoint."""
+
+    def test_metrics_endpoint(self, client: TestClient):
+        """Test requests are labelled by route template and status."""
+        todo = client.post("/todos", json={"title": "A"}).json()
+        client.get(f"/todos/{todo['id']}")
+        client.get("/todos/999999")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'http_requests_total{method="GET",route="/todos/{todo_id}",status="200"}' in response.text
+        assert 'http_requests_total{method="GET",route="/todos/{todo_id}",status="404"}' in response.text
+        assert "http_requests_in_flight" in response.text
+        assert "# TYPE db_query_duration_seconds histogram" in response.text
+
+    def test_pool_collector(self):
+        """Test pool gauges and the checkout wait histogram are exposed."""
+        engine = create_engine("sqlite:///./test.db", poolclass=TimedQueuePool)
+        engine.connect().close()
+
+        lines = pool_collector(lambda: engine.pool)()
+
+        assert "db_pool_checked_out 0" in lines
+        assert "db_pool_wait_seconds_count 1" in lines
+        assert "db_pool_timeouts_total 0" in lines
+        engine.dispose()
+
+    def test_unmatched_routes_share_a_label(self, client: TestClient):
+        """Test unknown paths do not create one series each."""
+        before = route_metrics.REQUESTS.value("GET", "unmatched", "404")
+        client.get("/no/such/path")
+        client.get("/another/path")
+        assert route_metrics.REQUESTS.value("GET", "unmatched", "404") == before + 2
+
+
+class TestQueryMetrics:
+    """Test SQL statement instrumentation."""
+
+    def test_queries_tracked_per_request(self, instrumented_engine):
+        """Test statements in a request are counted and N+1 repeats flagged."""
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/n-plus-one")
+        def n_plus_one():
+            with instrumented_engine.connect() as conn:
+                for i in range(config.queries.N_PLUS_ONE_THRESHOLD):
+                    conn.execute(text("SELECT :i"), {"i": i})
+            return {}
+
+        before = route_metrics.N_PLUS_ONE.value("/n-plus-one")
+        queries_before = route_metrics.REQUEST_QUERIES.count("/n-plus-one")
+        TestClient(app).get("/n-plus-one")
+
+        assert route_metrics.N_PLUS_ONE.value("/n-plus-one") == before + 1
+        assert route_metrics.REQUEST_QUERIES.count("/n-plus-one") == queries_before + 1
+
+    def test_track_queries(self, instrumented_engine):
+        """Test statements are tallied inside track_queries only."""
+        with instrumented_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with track_queries() as stats:
+                conn.execute(text("SELECT 2"))
+                conn.execute(text("SELECT 2"))
+
+        assert stats.count == 2
+        assert stats.statements == {"SELECT 2": 2}
+        assert stats.repeated(2) == [("SELECT 2", 2)]
+
+    def test_slow_queries(self, instrumented_engine, monkeypatch):
+        """Test statements over SLOW_QUERY_SECONDS are counted."""
+        monkeypatch.setattr(config.queries, "SLOW_QUERY_SECONDS", 0)
+        before = config.queries.SLOW_QUERIES.value()
+
+        with instrumented_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert config.queries.SLOW_QUERIES.value() == before + 1
+
+    def test_failed_statement_keeps_timer_balanced(self, instrumented_engine):
+        """Test an erroring statement does not leave a start time behind."""
+        with instrumented_engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            assert conn.info.get("query_start") == []
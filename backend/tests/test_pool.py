@@ -0,0 +1,65 @@
+"""
+Tests for connection pool instrumentation.
+
+These tests verify that:
+- Checkout wait times are recorded in the histogram
+- Pool exhaustion timeouts are counted
+- Pool statistics are reported for QueuePool and other pool classes
+"""
+
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import StaticPool
+from config.pool import TimedQueuePool, WaitHistogram, pool_status
+
+
+class TestWaitHistogram:
+    """Test the checkout wait histogram."""
+
+    def test_buckets_are_cumulative(self):
+        """Test observations land in cumulative buckets."""
+        histogram = WaitHistogram(buckets=(0.01, 0.1))
+        histogram.observe(0.005)
+        histogram.observe(0.05)
+        histogram.observe(2.0)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 3
+        assert snapshot["buckets"] == {"0.01": 1, "0.1": 2, "+Inf": 3}
+        assert snapshot["sum"] == pytest.approx(2.055)
+
+
+class TestTimedQueuePool:
+    """Test the instrumented QueuePool."""
+
+    def test_checkout_is_recorded(self, tmp_path):
+        """Test each checkout is observed and reflected in pool status."""
+        engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool, pool_size=2, max_overflow=0)
+
+        with engine.connect():
+            status = pool_status(engine.pool)
+            assert status["pool_class"] == "TimedQueuePool"
+            assert status["size"] == 2
+            assert status["checked_out"] == 1
+            assert status["wait_time"]["count"] == 1
+
+        assert pool_status(engine.pool)["checked_out"] == 0
+        engine.dispose()
+
+    def test_timeout_is_counted(self, tmp_path):
+        """Test an exhausted pool records a timeout."""
+        engine = create_engine(
+            f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.01
+        )
+
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        assert pool_status(engine.pool)["wait_time"]["timeouts"] == 1
+        engine.dispose()
+
+    def test_status_of_uninstrumented_pool(self):
+        """Test pools without queue statistics only report their class."""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        assert pool_status(engine.pool) == {"pool_class": "StaticPool"}
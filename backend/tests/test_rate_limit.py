@@ -0,0 +1,174 @@
+"""
+Tests for rate limiting, load shedding and the page size cap.
+
+These tests verify that:
+- Token buckets allow a burst, then refuse with the time until the next token
+- Clients over their limit get 429 with Retry-After, per route, health checks exempt
+- Overloaded workers answer 503 with Retry-After (in-flight requests, pool waits)
+- The pool reports how long its oldest waiting checkout has waited
+- get_todos cuts pages above TODO_MAX_PAGE_SIZE down to it and says so
+"""
+
+import asyncio
+import threading
+import time
+import httpx
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from routes import rate_limit
+from routes.load_shedding import LoadSheddingMiddleware
+from config.pool import TimedQueuePool
+from services.rate_limit import MemoryRateLimitBackend, RateLimit
+
+
+class TestMemoryBackend:
+    """Test the in-process token buckets."""
+
+    def test_burst_then_refill(self):
+        """Test a full bucket serves its burst, then one token per 1/rate seconds."""
+        backend = MemoryRateLimitBackend()
+        limit = RateLimit(rate=2, burst=3)
+
+        async def take(now):
+            return await backend.acquire("client", limit, now=now)
+
+        decisions = [asyncio.run(take(0.0)) for _ in range(4)]
+        assert [decision.allowed for decision in decisions] == [True, True, True, False]
+        assert decisions[-1].retry_after == 0.5
+        assert asyncio.run(take(0.5)).allowed
+
+    def test_least_recent_client_evicted(self):
+        """Test the number of buckets stays bounded."""
+        backend = MemoryRateLimitBackend(max_keys=2)
+        for client in ("a", "b", "c"):
+            asyncio.run(backend.acquire(client, RateLimit(1, 1)))
+
+        assert list(backend._buckets) == ["b", "c"]
+
+
+class TestRateLimitMiddleware:
+    """Test RateLimitMiddleware on the app."""
+
+    def test_limit_per_route(self, client: TestClient, monkeypatch):
+        """Test a client over its limit gets 429 on that route only."""
+        monkeypatch.setattr(rate_limit, "DEFAULT_RATE_LIMIT", RateLimit(rate=0.1, burst=2))
+
+        statuses = [client.get("/todos/").status_code for _ in range(3)]
+        limited = client.get("/todos/")
+
+        assert statuses == [200, 200, 429]
+        assert int(limited.headers["retry-after"]) >= 1
+        assert client.get("/todos/stats").status_code == 200
+
+    def test_route_resolved_once(self, client: TestClient, monkeypatch):
+        """Test repeated requests to a path reuse its route template."""
+        monkeypatch.setattr(rate_limit, "DEFAULT_RATE_LIMIT", RateLimit(rate=0.1, burst=1))
+        walks = []
+
+        def match_route(scope):
+            walks.append(scope["path"])
+            return "/todos/{todo_id}"
+
+        monkeypatch.setattr(rate_limit, "match_route", match_route)
+
+        statuses = [client.get(path).status_code for path in ("/todos/7", "/todos/7", "/todos/8")]
+
+        assert statuses == [404, 429, 429]
+        assert walks == ["/todos/7", "/todos/8"]
+
+    def test_health_not_limited(self, client: TestClient, monkeypatch):
+        """Test probes are never refused."""
+        monkeypatch.setattr(rate_limit, "DEFAULT_RATE_LIMIT", RateLimit(rate=0.1, burst=1))
+
+        assert {client.get("/health/live").status_code for _ in range(5)} == {200}
+
+    def test_forwarded_client(self, client: TestClient, monkeypatch):
+        """Test X-Forwarded-For separates clients when the proxy is trusted."""
+        monkeypatch.setattr(rate_limit, "DEFAULT_RATE_LIMIT", RateLimit(rate=0.1, burst=1))
+        monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_FORWARDED", True)
+
+        assert client.get("/todos/", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 200
+        assert client.get("/todos/", headers={"X-Forwarded-For": "10.0.0.2"}).status_code == 200
+        assert client.get("/todos/", headers={"X-Forwarded-For": "10.0.0.1, 10.0.0.9"}).status_code == 429
+
+
+async def slow_app(scope, receive, send):
+    await asyncio.sleep(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class IdlePool:
+    def longest_wait(self) -> float:
+        return 0.0
+
+
+class StalledPool:
+    def longest_wait(self) -> float:
+        return 2.0
+
+
+def send_concurrently(app, count: int, path: str = "/todos/"):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            return await asyncio.gather(*(http.get(path) for _ in range(count)))
+    return asyncio.run(main())
+
+
+class TestLoadShedding:
+    """Test LoadSheddingMiddleware."""
+
+    def test_in_flight_limit(self):
+        """Test requests past max_in_flight are refused with 503 and Retry-After."""
+        app = LoadSheddingMiddleware(slow_app, pool=IdlePool, max_in_flight=2)
+
+        responses = send_concurrently(app, 5)
+
+        assert sorted(response.status_code for response in responses) == [200, 200, 503, 503, 503]
+        assert all(response.headers["retry-after"] == "1" for response in responses if response.status_code == 503)
+        assert app.in_flight == 0
+
+    def test_pool_wait(self):
+        """Test requests are refused while a pool checkout has waited too long."""
+        app = LoadSheddingMiddleware(slow_app, pool=StalledPool, max_pool_wait=0.5)
+
+        assert [response.status_code for response in send_concurrently(app, 2)] == [503, 503]
+        # Probes still answer
+        assert send_concurrently(app, 1, "/health/live")[0].status_code == 200
+
+    def test_longest_wait(self):
+        """Test the pool reports a checkout blocked on an exhausted pool."""
+        engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=1)
+        held = engine.connect()
+        waiter = threading.Thread(target=lambda: engine.connect().close())
+        waiter.start()
+        time.sleep(0.2)
+
+        assert engine.pool.longest_wait() >= 0.1
+        held.close()
+        waiter.join(5)
+        assert engine.pool.longest_wait() == 0.0
+        engine.dispose()
+
+
+class TestPageSizeCap:
+    """Test the server-side cap on limit."""
+
+    def test_limit_above_cap(self, client: TestClient, monkeypatch):
+        """Test huge pages are served at the cap, flagged by a header."""
+        monkeypatch.setattr("routes.pagination.TODO_MAX_PAGE_SIZE", 2)
+        client.post("/todos/bulk", json=[{"title": str(i)} for i in range(3)])
+
+        capped = client.get("/todos/?limit=100000")
+        at_cap = client.get("/todos/?limit=2")
+
+        assert capped.status_code == 200
+        assert len(capped.json()) == 2
+        assert capped.headers["x-page-size-capped"] == "2"
+        assert "x-next-cursor" in capped.headers
+        assert "x-page-size-capped" not in at_cap.headers
+
+    def test_negative_paging(self, client: TestClient):
+        """Test negative limit (no LIMIT on SQLite) and skip are rejected."""
+        assert client.get("/todos/?limit=-1").status_code == 422
+        assert client.get("/todos/?skip=-1").status_code == 422
@@ -0,0 +1,141 @@
+"""
+Tests for read-replica routing.
+
+These tests verify that:
+- Reads go to a replica and writes to the primary
+- Round-robin and least-connections balancing pick the expected replica
+- The read-your-writes cookie and X-Consistency: strong pin reads to the primary
+- Replica reads are not stored in the read cache
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from config.database import Base
+from config.replicas import PRIMARY_COOKIE, ReplicaSet, pinned_to_primary
+from models.todo import Todo
+from routes.consistency import ReadYourWritesMiddleware
+from services.cache import MemoryCacheBackend
+
+
+def replica_engine(path, title: str):
+    """A SQLite 'replica' file holding one todo with the given title"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add(Todo(id=1, title=title))
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """Route reads to one replica whose data differs from the primary's"""
+    engine = replica_engine(tmp_path / "replica.db", "From replica")
+    monkeypatch.setattr("config.database.replicas", ReplicaSet([engine]))
+    yield engine
+    engine.dispose()
+
+
+class TestReplicaRouting:
+    """Test which database the routes use."""
+
+    def test_reads_use_replica(self, client: TestClient, replica):
+        """Test list and item reads are served by the replica."""
+        assert [todo["title"] for todo in client.get("/todos").json()] == ["From replica"]
+        assert client.get("/todos/1").json()["title"] == "From replica"
+
+    def test_writes_use_primary(self, client: TestClient, test_db, replica):
+        """Test creates land on the primary and not on the replica."""
+        client.post("/todos", json={"title": "Written"})
+
+        assert [todo.title for todo in test_db.query(Todo)] == ["Written"]
+        assert [todo["title"] for todo in client.get("/todos").json()] == ["From replica"]
+
+    def test_strong_consistency_header(self, client: TestClient, replica):
+        """Test X-Consistency: strong reads the primary."""
+        client.post("/todos", json={"title": "Written"})
+
+        response = client.get("/todos", headers={"X-Consistency": "strong"})
+
+        assert [todo["title"] for todo in response.json()] == ["Written"]
+
+    def test_read_your_writes_cookie(self, client: TestClient, replica):
+        """Test a successful write pins the client's next reads to the primary."""
+        pinned = TestClient(ReadYourWritesMiddleware(client.app))
+
+        response = pinned.post("/todos", json={"title": "Written"})
+
+        assert PRIMARY_COOKIE in response.cookies
+        assert [todo["title"] for todo in pinned.get("/todos").json()] == ["Written"]
+        # Other clients still read the replica
+        assert [todo["title"] for todo in client.get("/todos").json()] == ["From replica"]
+
+    def test_failed_write_does_not_pin(self, client: TestClient, replica):
+        """Test error responses do not set the cookie."""
+        pinned = TestClient(ReadYourWritesMiddleware(client.app))
+
+        response = pinned.put("/todos/999", json={"title": "Missing"})
+
+        assert response.status_code == 404
+        assert PRIMARY_COOKIE not in response.cookies
+
+    def test_replica_reads_not_cached(self, client: TestClient, replica, monkeypatch):
+        """Test a lagging replica cannot refill the cache after a write."""
+        monkeypatch.setattr("routes.caching.TODO_CACHE_ENABLED", True)
+        monkeypatch.setattr("routes.caching.todo_cache", MemoryCacheBackend())
+
+        client.get("/todos/1")
+        client.get("/todos")
+
+        assert client.get("/health/cache").json()["entries"] == 0
+
+    def test_async_reads_use_replica(self, async_client: TestClient, tmp_path, monkeypatch):
+        """Test the async routes read from an async replica."""
+        replica_engine(tmp_path / "replica.db", "From replica").dispose()
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+        monkeypatch.setattr("config.database.async_replicas", ReplicaSet([engine]))
+
+        async_client.post("/todos", json={"title": "Written"})
+
+        assert [todo["title"] for todo in async_client.get("/todos").json()] == ["From replica"]
+        response = async_client.get("/todos", headers={"X-Consistency": "strong"})
+        assert [todo["title"] for todo in response.json()] == ["Written"]
+
+
+class TestReplicaSet:
+    """Test replica balancing."""
+
+    def test_round_robin(self):
+        """Test replicas are used in turn."""
+        replicas = ReplicaSet(["a", "b", "c"], "round_robin")
+
+        assert [replicas.choose() for _ in range(4)] == ["a", "b", "c", "a"]
+
+    def test_least_connections(self, monkeypatch):
+        """Test the replica with the fewest checked-out connections wins, ties in turn."""
+        load = {"a": 2, "b": 0, "c": 0}
+        monkeypatch.setattr("config.replicas.checked_out", lambda engine: load[engine])
+        replicas = ReplicaSet(["a", "b", "c"], "least_connections")
+
+        assert [replicas.choose() for _ in range(3)] == ["b", "b", "c"]
+
+    def test_no_replicas(self):
+        """Test an empty set chooses nothing, so reads fall back to the primary."""
+        assert not ReplicaSet([])
+        assert ReplicaSet([]).choose() is None
+
+    def test_unknown_strategy(self):
+        """Test a misspelled strategy fails at startup."""
+        with pytest.raises(ValueError):
+            ReplicaSet([], "random")
+
+    def test_pin_expires(self):
+        """Test only a future cookie timestamp pins to the primary."""
+        assert pinned_to_primary({PRIMARY_COOKIE: "9999999999"}, {})
+        assert not pinned_to_primary({PRIMARY_COOKIE: "1"}, {})
+        assert not pinned_to_primary({PRIMARY_COOKIE: "garbage"}, {})
+        assert not pinned_to_primary({}, {})
@@ -0,0 +1,42 @@
+"""
+Tests for the fast todo serialization path.
+
+These tests verify that the row serializer stays in sync with the Todo
+response schema and produces the same JSON.
+"""
+
+import json
+from datetime import datetime, timezone
+from models.schemas import Todo
+from routes.serialization import TodoRow, dump_todo, dump_todos
+
+
+class TestTodoSerialization:
+    """Test serialization of todo rows."""
+
+    def test_fields_match_schema(self):
+        """Test TodoRow mirrors the fields of the Todo schema."""
+        assert list(TodoRow.__annotations__) == list(Todo.model_fields)
+
+    def test_output_matches_response_model(self):
+        """Test rows serialize exactly like the Todo response model."""
+        row = {
+            "id": 1,
+            "title": "Fast",
+            "description": None,
+            "completed": True,
+            "created_at": datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+            "updated_at": datetime(2025, 1, 2, 3, 4, 5),
+        }
+
+        assert dump_todo(row) == Todo(**row).model_dump_json().encode()
+        assert json.loads(dump_todos([row, row])) == [json.loads(Todo(**row).model_dump_json())] * 2
+
+    def test_list_response_uses_fast_path(self, client):
+        """Test GET /todos returns the same fields as the schema."""
+        client.post("/todos", json={"title": "Listed", "description": "text"})
+
+        todo = client.get("/todos").json()[0]
+
+        assert Todo(**todo).title == "Listed"
+        assert list(todo) == list(Todo.model_fields)
@@ -0,0 +1,32 @@
+"""
+Tests for the server entry point (serve.py).
+
+These tests verify that:
+- Production runs several workers with uvloop/httptools and no reload
+- Development mode keeps a single reloading process
+"""
+
+import serve
+
+
+class TestServerOptions:
+    """Test the uvicorn options built by serve.py."""
+
+    def test_production_options(self):
+        """Test production mode uses workers, fast loop/parser and graceful shutdown."""
+        options = serve.server_options(workers=4)
+
+        assert options["workers"] == 4
+        assert options["loop"] == "uvloop"
+        assert options["http"] == "httptools"
+        assert options["lifespan"] == "on"
+        assert options["timeout_graceful_shutdown"] == serve.GRACEFUL_TIMEOUT
+        assert options["backlog"] == serve.BACKLOG
+        assert "reload" not in options
+
+    def test_reload_options(self):
+        """Test development mode is one reloading process."""
+        options = serve.server_options(reload=True)
+
+        assert options["reload"] is True
+        assert "workers" not in options
@@ -0,0 +1,89 @@
+"""
+Tests for worker cold start.
+
+These tests verify that:
+- Importing main loads no database driver and builds no engine
+- Engines and session factories are built on first access or by the lifespan
+- Importing main stays within STARTUP_IMPORT_BUDGET seconds
+- The lifespan starts within STARTUP_LIFESPAN_BUDGET seconds and reports its phases
+- profile_startup.py breaks the import down per package
+
+The budgets are generous regression guards (several times what a CI
+runner needs) and can be tightened or loosened through the environment.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+import profile_startup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds allowed for "import main" in a fresh interpreter (best of 3)
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "3"))
+# Seconds allowed for the lifespan phases against the test database
+STARTUP_LIFESPAN_BUDGET = float(os.getenv("STARTUP_LIFESPAN_BUDGET", "0.5"))
+
+
+def run_python(code: str) -> dict:
+    """Run code in a fresh interpreter from the backend directory; it prints JSON"""
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestLazyEngines:
+    """Test config.database builds nothing at import."""
+
+    def test_import_builds_nothing(self):
+        """Test importing the app loads no driver, engine or async extension."""
+        state = run_python(
+            "import json, sys, main, config.database as d; "
+            "print(json.dumps({'modules': [m for m in ('psycopg2', 'asyncpg', 'sqlalchemy.ext.asyncio') if m in sys.modules], "
+            "'built': [name for name in ('engine', 'SessionLocal', 'replicas') if name in vars(d)]}))"
+        )
+
+        assert state == {"modules": [], "built": []}
+
+    def test_built_on_first_access(self):
+        """Test the session factory builds the engine it is bound to, once."""
+        state = run_python(
+            "import json, config.database as d; factory = d.SessionLocal; "
+            "print(json.dumps({'bound': factory.kw['bind'] is d.engine, 'same': d.SessionLocal is factory}))"
+        )
+
+        assert state == {"bound": True, "same": True}
+
+
+class TestStartupBudgets:
+    """Regression budgets for the cold start of a worker."""
+
+    def test_import_budget(self):
+        """Test importing main stays within the import budget."""
+        timings = [
+            run_python("import json, time; t = time.perf_counter(); import main; print(json.dumps(time.perf_counter() - t))")
+            for _ in range(3)
+        ]
+
+        assert min(timings) < STARTUP_IMPORT_BUDGET
+
+    def test_lifespan_budget(self, client: TestClient):
+        """Test the lifespan phases are reported and stay within the lifespan budget."""
+        phases = client.get("/health/startup").json()["phases_ms"]
+
+        assert list(phases) == ["import", "engines", "event_broker"]
+        assert (phases["engines"] + phases["event_broker"]) / 1000 < STARTUP_LIFESPAN_BUDGET
+
+
+class TestProfileReport:
+    """Test profile_startup.py."""
+
+    def test_import_breakdown(self):
+        """Test the import time is split per top-level package, largest first."""
+        total, packages = profile_startup.import_breakdown()
+        seconds = dict(packages)
+
+        assert total > 0
+        assert {"fastapi", "sqlalchemy", "routes"} <= set(seconds)
+        assert [value for _, value in packages] == sorted(seconds.values(), reverse=True)
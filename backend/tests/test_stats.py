@@ -0,0 +1,133 @@
+"""
+Tests for todo statistics (GET /todos/stats and crud.stats).
+
+These tests verify that:
+- Every write path keeps the total/completed counters in step
+- Creations are counted per day, with empty days reported as zero
+- Reading the statistics never scans the todos table
+- Rows written outside crud.todo are counted too
+- reconcile() repairs counters that drifted from the table
+"""
+
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from crud import stats
+from models.todo import Todo, TodoCounter, TodoDailyCount
+
+
+def counts(client: TestClient) -> tuple:
+    body = client.get("/todos/stats").json()
+    return body["total"], body["completed"], body["pending"]
+
+
+class TestStatsEndpoint:
+    """Test the counters behind GET /todos/stats."""
+
+    def test_empty(self, client: TestClient):
+        """Test a fresh database reports zeros for every day."""
+        body = client.get("/todos/stats?days=7").json()
+
+        assert (body["total"], body["completed"], body["pending"]) == (0, 0, 0)
+        assert len(body["created_per_day"]) == 7
+        assert all(day["created"] == 0 for day in body["created_per_day"])
+        assert body["average_created_per_day"] == 0
+
+    def test_single_writes(self, client: TestClient):
+        """Test create, complete, reopen and delete move the counters."""
+        first = client.post("/todos", json={"title": "A"}).json()["id"]
+        second = client.post("/todos", json={"title": "B", "completed": True}).json()["id"]
+        assert counts(client) == (2, 1, 1)
+
+        client.put(f"/todos/{first}", json={"completed": True})
+        client.put(f"/todos/{first}", json={"completed": True, "title": "again"})
+        assert counts(client) == (2, 2, 0)
+
+        client.put(f"/todos/{second}", json={"completed": False})
+        client.delete(f"/todos/{first}")
+        assert counts(client) == (1, 0, 1)
+
+    def test_bulk_and_import(self, client: TestClient):
+        """Test bulk endpoints and imports update the counters in their transaction."""
+        created = client.post("/todos/bulk", json=[{"title": "A"}, {"title": "B", "completed": True}]).json()
+        ids = [item["id"] for item in created["results"]]
+        client.post("/todos/import", content=b'{"title": "C", "completed": true}\n{"title": "D"}\n')
+        assert counts(client) == (4, 2, 2)
+
+        client.patch("/todos/bulk", json=[{"id": ids[0], "completed": True}, {"id": ids[1], "completed": False}, {"id": 999, "completed": True}])
+        assert counts(client) == (4, 2, 2)
+
+        client.request("DELETE", "/todos/bulk", json={"ids": ids})
+        assert counts(client) == (2, 1, 1)
+
+    def test_created_per_day(self, client: TestClient):
+        """Test today's creations land in the last entry of the series."""
+        for title in ("A", "B", "C"):
+            client.post("/todos", json={"title": title})
+
+        body = client.get("/todos/stats?days=3").json()
+
+        assert [day["created"] for day in body["created_per_day"]] == [0, 0, 3]
+        assert body["created_per_day"][-1]["day"] == stats.today().isoformat()
+        assert body["average_created_per_day"] == 1
+
+    def test_does_not_scan_todos(self, client: TestClient, query_counter):
+        """Test the endpoint reads only the summary tables."""
+        client.post("/todos", json={"title": "A"})
+        query_counter.clear()
+
+        client.get("/todos/stats")
+
+        assert query_counter
+        assert not any("FROM todos" in statement for statement in query_counter)
+
+    def test_days_validation(self, client: TestClient):
+        """Test the history length is bounded."""
+        assert client.get("/todos/stats?days=0").status_code == 422
+        assert client.get("/todos/stats?days=1000").status_code == 422
+
+    def test_async_router(self, async_client: TestClient):
+        """Test the async routes maintain and serve the same counters."""
+        todo_id = async_client.post("/todos", json={"title": "A"}).json()["id"]
+        async_client.put(f"/todos/{todo_id}", json={"completed": True})
+
+        assert counts(async_client) == (1, 1, 0)
+
+
+class TestReconcile:
+    """Test repairing drifted counters."""
+
+    def test_writes_behind_the_api(self, client: TestClient, test_db):
+        """Test rows written without crud.todo are counted by the triggers."""
+        client.post("/todos", json={"title": "A"})
+        test_db.add_all([Todo(title="raw", completed=True), Todo(title="raw")])
+        test_db.commit()
+
+        assert counts(client) == (3, 1, 2)
+        assert stats.reconcile(test_db) == {"total": 0, "completed": 0, "days_backfilled": 0}
+
+    def test_reconcile(self, client: TestClient, test_db):
+        """Test counters that lost rows (e.g. added to an existing database) are recounted."""
+        client.post("/todos", json={"title": "A"})
+        client.post("/todos", json={"title": "B", "completed": True})
+        test_db.query(TodoCounter).filter(TodoCounter.name == stats.TOTAL).delete()
+        test_db.commit()
+        assert counts(client) == (0, 1, -1)
+
+        corrections = stats.reconcile(test_db)
+
+        assert corrections["total"] == 2
+        assert corrections["completed"] == 0
+        assert counts(client) == (2, 1, 1)
+        assert stats.reconcile(test_db) == {"total": 0, "completed": 0, "days_backfilled": 0}
+
+    def test_reconcile_backfills_days(self, client: TestClient, test_db):
+        """Test days without recorded creations are backfilled from surviving rows."""
+        test_db.add(Todo(title="old", created_at=datetime.now(timezone.utc) - timedelta(days=2)))
+        test_db.commit()
+        test_db.query(TodoDailyCount).delete()
+        test_db.commit()
+
+        assert stats.reconcile(test_db)["days_backfilled"] == 1
+
+        body = client.get("/todos/stats?days=3").json()
+        assert [day["created"] for day in body["created_per_day"]] == [1, 0, 0]
@@ -9,8 +9,8 @@ These tests verify that our REST API works correctly:
 - DELETE /todos/{id} - delete todo
 """
 
-import pytest
 from fastapi.testclient import TestClient
+from routes.pagination import encode_cursor
 
 
 class TestTodoAPI:
@@ -188,6 +188,13 @@ class TestTodoAPI:
         data = response.json()
         assert data["status"] == "healthy"
 
+    def test_pool_health_endpoint(self, client: TestClient):
+        """Test GET /health/pool reports the pool class."""
+        response = client.get("/health/pool")
+
+        assert response.status_code == 200
+        assert "pool_class" in response.json()
+
     def test_root_endpoint(self, client: TestClient):
         """Test GET / root endpoint."""
         response = client.get("/")
@@ -217,3 +224,131 @@ class TestTodoAPI:
         response = client.get("/todos?skip=10&limit=2")
         data = response.json()
         assert len(data) == 0
+
+    def test_cursor_pagination(self, client: TestClient):
+        """Test GET /todos walks pages with after/before cursors."""
+        ids = [client.post("/todos", json={"title": f"Todo {i}"}).json()["id"] for i in range(5)]
+
+        # First page hands out a cursor for the next one
+        response = client.get("/todos?limit=2")
+        assert [t["id"] for t in response.json()] == ids[:2]
+        assert "x-prev-cursor" not in response.headers
+        next_cursor = response.headers["x-next-cursor"]
+
+        response = client.get(f"/todos?limit=2&after={next_cursor}")
+        assert [t["id"] for t in response.json()] == ids[2:4]
+        prev_cursor = response.headers["x-prev-cursor"]
+
+        # Last page has no next cursor
+        response = client.get(f"/todos?limit=2&after={response.headers['x-next-cursor']}")
+        assert [t["id"] for t in response.json()] == ids[4:]
+        assert "x-next-cursor" not in response.headers
+
+        # Walking backwards returns the previous page in ascending order
+        response = client.get(f"/todos?limit=2&before={prev_cursor}")
+        assert [t["id"] for t in response.json()] == ids[:2]
+        assert "x-prev-cursor" not in response.headers
+
+    def test_cursor_pagination_back_to_first_page(self, client: TestClient):
+        """Test GET /todos pages backward to the first page and forward again."""
+        ids = [client.post("/todos", json={"title": f"Todo {i}"}).json()["id"] for i in range(3)]
+
+        response = client.get("/todos?limit=2")
+        response = client.get(f"/todos?limit=2&after={response.headers['x-next-cursor']}")
+        assert [t["id"] for t in response.json()] == ids[2:]
+
+        # Back to the first page, which still points forward
+        response = client.get(f"/todos?limit=2&before={response.headers['x-prev-cursor']}")
+        assert [t["id"] for t in response.json()] == ids[:2]
+        assert "x-prev-cursor" not in response.headers
+        response = client.get(f"/todos?limit=2&after={response.headers['x-next-cursor']}")
+        assert [t["id"] for t in response.json()] == ids[2:]
+
+        # An empty page before the first one still leads back to where the client came from
+        response = client.get(f"/todos?limit=2&before={encode_cursor(ids[0])}")
+        assert response.json() == []
+        assert "x-prev-cursor" not in response.headers
+        response = client.get(f"/todos?limit=2&after={response.headers['x-next-cursor']}")
+        assert [t["id"] for t in response.json()] == ids[:2]
+
+    def test_cursor_pagination_invalid_cursor(self, client: TestClient):
+        """Test GET /todos rejects malformed cursors."""
+        assert client.get("/todos?after=not-a-cursor").status_code == 400
+        assert client.get("/todos?after=abc&before=abc").status_code == 400
+
+    def test_bulk_create_todos(self, client: TestClient):
+        """Test POST /todos/bulk creates todos in request order."""
+        response = client.post("/todos/bulk", json=[{"title": f"Bulk {i}"} for i in range(3)])
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert all(r["status"] == "created" for r in results)
+        assert [r["todo"]["title"] for r in results] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+        assert all(r["todo"]["completed"] == False for r in results)
+        assert len(client.get("/todos").json()) == 3
+
+    def test_bulk_update_todos(self, client: TestClient):
+        """Test PATCH /todos/bulk updates existing todos and reports missing ones."""
+        first = client.post("/todos", json={"title": "First", "description": "keep"}).json()
+        second = client.post("/todos", json={"title": "Second"}).json()
+
+        response = client.patch("/todos/bulk", json=[
+            {"id": first["id"], "completed": True},
+            {"id": 999},
+            {"id": second["id"], "title": "Renamed"},
+        ])
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["updated", "not_found", "updated"]
+        assert results[0]["todo"]["completed"] == True
+        assert results[0]["todo"]["description"] == "keep"
+        assert results[2]["todo"]["title"] == "Renamed"
+        assert client.get(f"/todos/{first['id']}").json()["completed"] == True
+
+    def test_bulk_delete_todos(self, client: TestClient):
+        """Test DELETE /todos/bulk deletes todos and reports missing ones."""
+        todo_id = client.post("/todos", json={"title": "Doomed"}).json()["id"]
+
+        response = client.request("DELETE", "/todos/bulk", json={"ids": [todo_id, 999]})
+
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()["results"]] == ["deleted", "not_found"]
+        assert client.get(f"/todos/{todo_id}").status_code == 404
+
+    def test_bulk_request_too_large(self, client: TestClient, monkeypatch):
+        """Test bulk requests above BULK_MAX_ITEMS are rejected."""
+        monkeypatch.setattr("routes.bulk.BULK_MAX_ITEMS", 2)
+
+        response = client.post("/todos/bulk", json=[{"title": f"Bulk {i}"} for i in range(3)])
+
+        assert response.status_code == 413
+
+    def test_write_round_trips(self, client: TestClient, query_counter):
+        """Test create, update and delete each cost one SQL round trip, statistics included."""
+        todo_id = client.post("/todos", json={"title": "Counted"}).json()["id"]
+        assert len(query_counter) == 1
+        assert "RETURNING" in query_counter[0]
+
+        query_counter.clear()
+        assert client.put(f"/todos/{todo_id}", json={"title": "Renamed"}).status_code == 200
+        assert len(query_counter) == 1
+
+        query_counter.clear()
+        response = client.put(f"/todos/{todo_id}", json={"completed": True})
+        assert response.json()["completed"] == True
+        assert len(query_counter) == 1
+        assert client.get("/todos/stats").json()["completed"] == 1
+
+        query_counter.clear()
+        assert client.put("/todos/999", json={"completed": True}).status_code == 404
+        assert len(query_counter) == 1
+
+        query_counter.clear()
+        assert client.delete(f"/todos/{todo_id}").status_code == 200
+        assert len(query_counter) == 1
+
+        query_counter.clear()
+        assert client.delete(f"/todos/{todo_id}").status_code == 404
+        assert len(query_counter) == 1
@@ -0,0 +1,73 @@
+"""
+Tests for the async Todo API routes (DB_ASYNC mode).
+
+These mirror the sync API tests to make sure both stacks behave the same.
+"""
+
+from fastapi.testclient import TestClient
+
+
+class TestTodoAsyncAPI:
+    """Test the async Todo REST API endpoints."""
+
+    def test_crud_round_trip(self, async_client: TestClient):
+        """Test create, read, update and delete through the async routes."""
+        response = async_client.post("/todos", json={"title": "Async Todo", "description": "async"})
+        assert response.status_code == 200
+        created = response.json()
+        assert created["title"] == "Async Todo"
+        assert created["completed"] == False
+        assert "created_at" in created and "updated_at" in created
+
+        response = async_client.get(f"/todos/{created['id']}")
+        assert response.status_code == 200
+        assert response.json()["description"] == "async"
+
+        response = async_client.put(f"/todos/{created['id']}", json={"completed": True})
+        assert response.status_code == 200
+        assert response.json()["completed"] == True
+        assert response.json()["title"] == "Async Todo"
+
+        response = async_client.delete(f"/todos/{created['id']}")
+        assert response.status_code == 200
+        assert async_client.get(f"/todos/{created['id']}").status_code == 404
+
+    def test_missing_todo_returns_404(self, async_client: TestClient):
+        """Test async routes return 404 for non-existent todos."""
+        assert async_client.get("/todos/999").status_code == 404
+        assert async_client.put("/todos/999", json={"title": "x"}).status_code == 404
+        assert async_client.delete("/todos/999").status_code == 404
+
+    def test_cursor_pagination(self, async_client: TestClient):
+        """Test async GET /todos hands out keyset cursors."""
+        ids = [async_client.post("/todos", json={"title": f"Todo {i}"}).json()["id"] for i in range(3)]
+
+        response = async_client.get("/todos?limit=2")
+        assert [t["id"] for t in response.json()] == ids[:2]
+
+        response = async_client.get(f"/todos?limit=2&after={response.headers['x-next-cursor']}")
+        assert [t["id"] for t in response.json()] == ids[2:]
+        assert "x-next-cursor" not in response.headers
+
+    def test_bulk_endpoints(self, async_client: TestClient):
+        """Test bulk create, update and delete through the async routes."""
+        results = async_client.post("/todos/bulk", json=[{"title": "A"}, {"title": "B"}]).json()["results"]
+        ids = [r["id"] for r in results]
+
+        response = async_client.patch("/todos/bulk", json=[{"id": ids[0], "completed": True}])
+        assert response.json()["results"][0]["todo"]["completed"] == True
+
+        response = async_client.request("DELETE", "/todos/bulk", json={"ids": ids})
+        assert [r["status"] for r in response.json()["results"]] == ["deleted", "deleted"]
+
+    def test_conditional_requests(self, async_client: TestClient):
+        """Test ETag, If-None-Match and If-Match through the async routes."""
+        created = async_client.post("/todos", json={"title": "Tagged"})
+        todo_id, etag = created.json()["id"], created.headers["etag"]
+
+        response = async_client.get(f"/todos/{todo_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        async_client.put(f"/todos/{todo_id}", json={"title": "Changed"})
+        response = async_client.delete(f"/todos/{todo_id}", headers={"If-Match": etag})
+        assert response.status_code == 412
@@ -0,0 +1,196 @@
+"""
+Tests for write-behind batching of todo updates.
+
+These tests verify that:
+- Concurrent updates are flushed together, merged per id (last write wins per field)
+- A full batch is flushed without waiting for the delay
+- A failed flush fails every caller of the batch
+- One invalid update fails only its own caller
+- A cancelled async leader still flushes for the rest of its batch
+- Batched PUT /todos/{id} responses show the committed todo and keep the stats right
+- If-Match updates bypass the batch
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+from routes import batching
+from services.write_batch import AsyncUpdateBatcher, UpdateBatcher
+
+
+def echo_flush(flushed: list):
+    """A flush recording its items and returning them as the rows"""
+    def flush(items):
+        flushed.append(items)
+        return {item["id"]: item for item in items}
+    return flush
+
+
+class TestUpdateBatcher:
+    """Test UpdateBatcher and AsyncUpdateBatcher."""
+
+    def test_concurrent_updates_share_a_flush(self):
+        """Test updates within the delay are merged into one flush."""
+        batcher = UpdateBatcher(max_items=100, max_delay=0.1)
+        flushed = []
+        updates = [(1, {"completed": True}), (2, {"title": "B"}), (1, {"title": "A"}), (1, {"completed": False})]
+
+        with ThreadPoolExecutor(len(updates)) as pool:
+            results = list(pool.map(lambda update: batcher.submit(*update, echo_flush(flushed)), updates))
+
+        assert len(flushed) == 1
+        assert sorted(flushed[0], key=lambda item: item["id"]) == [
+            {"id": 1, "completed": False, "title": "A"},
+            {"id": 2, "title": "B"},
+        ]
+        assert results[0] == results[2] == results[3] == {"id": 1, "completed": False, "title": "A"}
+
+    def test_full_batch_flushes_at_once(self):
+        """Test reaching max_items flushes without waiting for max_delay."""
+        sizes = []
+        batcher = UpdateBatcher(max_items=3, max_delay=5, observe=lambda size, seconds: sizes.append(size))
+
+        with ThreadPoolExecutor(3) as pool:
+            results = list(pool.map(lambda todo_id: batcher.submit(todo_id, {"completed": True}, echo_flush([])), [1, 2, 3]))
+
+        assert sizes == [3]
+        assert [row["id"] for row in results] == [1, 2, 3]
+
+    def test_flush_error_reaches_every_caller(self):
+        """Test a failed group commit fails all its updates."""
+        batcher = UpdateBatcher(max_items=2, max_delay=5)
+
+        def failing_flush(items):
+            raise RuntimeError("deadlock")
+
+        with ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(batcher.submit, todo_id, {"completed": True}, failing_flush) for todo_id in (1, 2)]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result()
+
+    def test_invalid_item_fails_only_its_caller(self):
+        """Test a failed group commit is retried per id, so valid updates still succeed."""
+        flushed = []
+
+        def flush(items):
+            if any(item.get("title", "") is None for item in items):
+                raise ValueError("title is NOT NULL")
+            return echo_flush(flushed)(items)
+
+        batcher = UpdateBatcher(max_items=2, max_delay=5)
+        with ThreadPoolExecutor(2) as pool:
+            invalid = pool.submit(batcher.submit, 1, {"title": None}, flush)
+            valid = pool.submit(batcher.submit, 2, {"completed": True}, flush)
+
+            with pytest.raises(ValueError):
+                invalid.result()
+            assert valid.result() == {"id": 2, "completed": True}
+        assert flushed == [[{"id": 2, "completed": True}]]
+
+    def test_async_updates_share_a_flush(self):
+        """Test concurrent coroutines are flushed together."""
+        flushed = []
+
+        async def flush(items):
+            return echo_flush(flushed)(items)
+
+        async def main():
+            batcher = AsyncUpdateBatcher(max_items=100, max_delay=0.05)
+            return await asyncio.gather(*(batcher.submit(todo_id, {"completed": True}, flush) for todo_id in (1, 2, 3)))
+
+        results = asyncio.run(main())
+
+        assert len(flushed) == 1
+        assert [row["id"] for row in results] == [1, 2, 3]
+
+    def test_cancelled_leader_still_flushes(self):
+        """Test the batch is written when the coroutine that opened it is cancelled."""
+        flushed = []
+
+        async def flush(items):
+            await asyncio.sleep(0.01)
+            return echo_flush(flushed)(items)
+
+        async def main():
+            batcher = AsyncUpdateBatcher(max_items=100, max_delay=0.01)
+            leader = asyncio.ensure_future(batcher.submit(1, {"completed": True}, flush))
+            follower = asyncio.ensure_future(batcher.submit(2, {"completed": True}, flush))
+            await asyncio.sleep(0.015)
+            leader.cancel()
+            return await follower
+
+        result = asyncio.run(main())
+
+        assert flushed == [[{"id": 1, "completed": True}, {"id": 2, "completed": True}]]
+        assert result == {"id": 2, "completed": True}
+
+
+@pytest.fixture
+def batching_client(client: TestClient, monkeypatch):
+    """The client with TODO_WRITE_BATCHING on and a short delay"""
+    monkeypatch.setattr(batching, "TODO_WRITE_BATCHING", True)
+    monkeypatch.setattr(batching, "update_batcher", UpdateBatcher(max_items=100, max_delay=0.001))
+    return client
+
+
+class TestBatchedUpdates:
+    """Test PUT /todos/{id} with batching enabled."""
+
+    def test_update_round_trip(self, batching_client: TestClient):
+        """Test a batched update returns the committed todo with its validators."""
+        todo_id = batching_client.post("/todos", json={"title": "A"}).json()["id"]
+
+        response = batching_client.put(f"/todos/{todo_id}", json={"completed": True})
+
+        assert response.status_code == 200
+        assert response.json()["completed"] is True
+        assert response.headers["etag"] == batching_client.get(f"/todos/{todo_id}").headers["etag"]
+        assert batching_client.get("/todos/stats").json()["completed"] == 1
+
+    def test_missing_todo(self, batching_client: TestClient):
+        """Test a batched update of a missing todo is a 404."""
+        assert batching_client.put("/todos/999", json={"completed": True}).status_code == 404
+
+    def test_concurrent_toggles_commit_together(self, batching_client: TestClient, monkeypatch):
+        """Test a burst of toggles is written in one batch."""
+        sizes = []
+        monkeypatch.setattr(
+            batching, "update_batcher", UpdateBatcher(max_items=4, max_delay=5, observe=lambda size, seconds: sizes.append(size))
+        )
+        ids = [batching_client.post("/todos", json={"title": f"T{i}"}).json()["id"] for i in range(4)]
+
+        with ThreadPoolExecutor(4) as pool:
+            responses = list(pool.map(lambda todo_id: batching_client.put(f"/todos/{todo_id}", json={"completed": True}), ids))
+
+        assert sizes == [4]
+        assert all(response.json()["completed"] for response in responses)
+        assert batching_client.get("/todos/stats").json()["completed"] == 4
+
+    def test_invalid_update_spares_its_batch(self, batching_client: TestClient, monkeypatch):
+        """Test a NOT NULL violation fails its own request, not a concurrent valid one."""
+        monkeypatch.setattr(batching, "update_batcher", UpdateBatcher(max_items=2, max_delay=5))
+        invalid_id, valid_id = (batching_client.post("/todos", json={"title": title}).json()["id"] for title in ("A", "B"))
+
+        with ThreadPoolExecutor(2) as pool:
+            invalid = pool.submit(batching_client.put, f"/todos/{invalid_id}", json={"title": None})
+            valid = pool.submit(batching_client.put, f"/todos/{valid_id}", json={"completed": True})
+
+            with pytest.raises(IntegrityError):
+                invalid.result()
+            assert valid.result().status_code == 200
+        assert batching_client.get(f"/todos/{invalid_id}").json()["title"] == "A"
+        assert batching_client.get(f"/todos/{valid_id}").json()["completed"] is True
+
+    def test_if_match_bypasses_batch(self, batching_client: TestClient, monkeypatch):
+        """Test conditional updates are written on their own."""
+        monkeypatch.setattr(batching, "update_batcher", None)
+        created = batching_client.post("/todos", json={"title": "A"})
+
+        response = batching_client.put(
+            f"/todos/{created.json()['id']}", json={"completed": True}, headers={"If-Match": created.headers["etag"]}
+        )
+
+        assert response.status_code == 200
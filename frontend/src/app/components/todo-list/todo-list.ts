@@ -1,9 +1,13 @@
-import { Component, signal, inject, OnInit, computed } from '@angular/core';
+import { Component, signal, inject, OnInit, OnDestroy } from '@angular/core';
+import { Subject, Subscription, debounceTime } from 'rxjs';
 import { CommonModule } from '@angular/common';
 import { TodoService } from '../../services/todo.service';
 import { TodoItemComponent } from '../todo-item/todo-item';
 import { TodoFormComponent } from '../todo-form/todo-form';
-import { Todo, TodoCreate } from '../../models/todo.model';
+import { Todo, TodoChange, TodoCreate, TodoStats } from '../../models/todo.model';
+
+// A burst of change feed events (an import, a bulk edit) refreshes the counts once
+const STATS_REFRESH_DEBOUNCE_MS = 500;
 
 @Component({
   selector: 'app-todo-list',
@@ -12,8 +16,10 @@ import { Todo, TodoCreate } from '../../models/todo.model';
   templateUrl: './todo-list.html',
   styleUrl: './todo-list.scss'
 })
-export class TodoListComponent implements OnInit {
+export class TodoListComponent implements OnInit, OnDestroy {
   private todoService = inject(TodoService);
+  private changes?: Subscription;
+  private statsRefresh = new Subject<void>();
 
   // State management with signals
   todos = signal<Todo[]>([]);
@@ -22,13 +28,41 @@ export class TodoListComponent implements OnInit {
   showForm = signal(false);
   editingTodo = signal<Todo | null>(null);
 
-  // Computed signals
-  completedTodos = computed(() => this.todos().filter(todo => todo.completed));
-  pendingTodos = computed(() => this.todos().filter(todo => !todo.completed));
-  totalTodos = computed(() => this.todos().length);
+  // Counts from the server, refreshed after our writes and (debounced) after change events
+  stats = signal<TodoStats | null>(null);
 
   ngOnInit() {
     this.loadTodos();
+    this.loadStats();
+    // Keep the list in sync with changes from other tabs and users
+    this.changes = this.todoService.watchChanges().subscribe(change => this.applyChange(change));
+    this.changes.add(this.statsRefresh.pipe(debounceTime(STATS_REFRESH_DEBOUNCE_MS)).subscribe(() => this.loadStats()));
+  }
+
+  ngOnDestroy() {
+    this.changes?.unsubscribe();
+  }
+
+  // Apply a change feed event; events for our own writes are no-ops
+  private applyChange(change: TodoChange) {
+    this.statsRefresh.next();
+    switch (change.type) {
+      case 'created':
+      case 'updated': {
+        const todo = change.todo;
+        this.todos.update(todos =>
+          todos.some(t => t.id === todo.id)
+            ? todos.map(t => t.id === todo.id ? todo : t)
+            : [...todos, todo]
+        );
+        break;
+      }
+      case 'deleted':
+        this.todos.update(todos => todos.filter(t => t.id !== change.id));
+        break;
+      default:
+        this.loadTodos();
+    }
   }
 
   // Load todos from API
@@ -49,6 +83,14 @@ export class TodoListComponent implements OnInit {
     });
   }
 
+  // Load counts from API
+  loadStats() {
+    this.todoService.getStats().subscribe({
+      next: (stats) => this.stats.set(stats),
+      error: (err) => console.error('Error loading stats:', err)
+    });
+  }
+
   // Show form for creating new todo
   showCreateForm() {
     this.editingTodo.set(null);
@@ -83,6 +125,7 @@ export class TodoListComponent implements OnInit {
     this.todoService.createTodo(todoData).subscribe({
       next: (newTodo) => {
         this.todos.update(todos => [...todos, newTodo]);
+        this.loadStats();
         this.hideForm();
       },
       error: (err) => {
@@ -99,6 +142,7 @@ export class TodoListComponent implements OnInit {
         this.todos.update(todos =>
           todos.map(todo => todo.id === id ? updatedTodo : todo)
         );
+        this.loadStats();
         this.hideForm();
       },
       error: (err) => {
@@ -115,6 +159,7 @@ export class TodoListComponent implements OnInit {
         this.todos.update(todos =>
           todos.map(t => t.id === todo.id ? updatedTodo : t)
         );
+        this.loadStats();
       },
       error: (err) => {
         this.error.set('Nie udało się zmienić statusu zadania');
@@ -129,6 +174,7 @@ export class TodoListComponent implements OnInit {
       this.todoService.deleteTodo(todo.id).subscribe({
         next: () => {
           this.todos.update(todos => todos.filter(t => t.id !== todo.id));
+          this.loadStats();
         },
         error: (err) => {
           this.error.set('Nie udało się usunąć zadania');
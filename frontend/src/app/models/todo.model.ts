@@ -19,3 +19,33 @@ export interface TodoUpdate {
   completed?: boolean;
 }
 
+
+export interface TodoQuery {
+  completed?: boolean;
+  q?: string;
+  sort?: 'id' | 'created_at' | 'updated_at' | 'title';
+  order?: 'asc' | 'desc';
+  created_after?: string;
+  created_before?: string;
+  updated_after?: string;
+  updated_before?: string;
+  skip?: number;
+  limit?: number;
+  // Comma-separated fields, or 'summary' for id, title and completed
+  fields?: string;
+}
+
+// Event pushed by the /todos/events change feed
+export type TodoChange =
+  | { type: 'created' | 'updated'; todo: Todo }
+  | { type: 'deleted'; id: number }
+  | { type: 'reset' | 'imported' };
+
+// Aggregate counts from /todos/stats
+export interface TodoStats {
+  total: number;
+  completed: number;
+  pending: number;
+  created_per_day: { day: string; created: number }[];
+  average_created_per_day: number;
+}
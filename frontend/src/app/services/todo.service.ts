@@ -1,16 +1,18 @@
-import { Injectable } from '@angular/core';
-import { HttpClient, HttpErrorResponse } from '@angular/common/http';
+import { Injectable, NgZone } from '@angular/core';
+import { HttpClient, HttpErrorResponse, HttpHeaders, HttpParams } from '@angular/common/http';
 import { Observable, throwError } from 'rxjs';
-import { catchError, map, switchMap } from 'rxjs/operators';
-import { Todo, TodoCreate, TodoUpdate } from '../models/todo.model';
+import { catchError, map, retry, switchMap } from 'rxjs/operators';
+import { Todo, TodoChange, TodoCreate, TodoQuery, TodoStats, TodoUpdate } from '../models/todo.model';
 
 @Injectable({
   providedIn: 'root'
 })
 export class TodoService {
   private apiUrl: string;
+  // Send and keep the API's cookies (read-your-writes pins reads to the primary)
+  private readonly options = { withCredentials: true };
 
-  constructor(private http: HttpClient) {
+  constructor(private http: HttpClient, private zone: NgZone) {
     // Dynamic API URL based on current location (SSR-safe)
     let hostname: string;
     let port: string;
@@ -36,37 +38,52 @@ export class TodoService {
     console.log('TodoService API URL:', this.apiUrl, 'Hostname:', hostname);
   }
 
-  // Get all todos
-  getTodos(): Observable<Todo[]> {
-    return this.http.get<Todo[]>(this.apiUrl).pipe(
+  // Get todos, optionally filtered/sorted on the server
+  getTodos(query: TodoQuery = {}): Observable<Todo[]> {
+    let params = new HttpParams();
+    for (const [key, value] of Object.entries(query)) {
+      if (value !== undefined && value !== null && value !== '') {
+        params = params.set(key, String(value));
+      }
+    }
+    return this.http.get<Todo[]>(this.apiUrl, { ...this.options, params }).pipe(
+      catchError(this.handleError)
+    );
+  }
+
+  // Get total/completed/pending counts (cheap server-side counters)
+  getStats(days = 30): Observable<TodoStats> {
+    return this.http.get<TodoStats>(`${this.apiUrl}/stats`, { ...this.options, params: { days } }).pipe(
       catchError(this.handleError)
     );
   }
 
   // Get single todo by ID
   getTodo(id: number): Observable<Todo> {
-    return this.http.get<Todo>(`${this.apiUrl}/${id}`).pipe(
+    return this.http.get<Todo>(`${this.apiUrl}/${id}`, this.options).pipe(
       catchError(this.handleError)
     );
   }
 
-  // Create new todo
+  // Create new todo; retries reuse one Idempotency-Key, so they never create it twice
   createTodo(todo: TodoCreate): Observable<Todo> {
-    return this.http.post<Todo>(this.apiUrl, todo).pipe(
+    const headers = new HttpHeaders({ 'Idempotency-Key': crypto.randomUUID() });
+    return this.http.post<Todo>(this.apiUrl, todo, { ...this.options, headers }).pipe(
+      retry({ count: 2, delay: 500 }),
       catchError(this.handleError)
     );
   }
 
   // Update existing todo
   updateTodo(id: number, todo: TodoUpdate): Observable<Todo> {
-    return this.http.put<Todo>(`${this.apiUrl}/${id}`, todo).pipe(
+    return this.http.put<Todo>(`${this.apiUrl}/${id}`, todo, this.options).pipe(
       catchError(this.handleError)
     );
   }
 
   // Delete todo
   deleteTodo(id: number): Observable<void> {
-    return this.http.delete<void>(`${this.apiUrl}/${id}`).pipe(
+    return this.http.delete<void>(`${this.apiUrl}/${id}`, this.options).pipe(
       catchError(this.handleError)
     );
   }
@@ -85,6 +102,29 @@ export class TodoService {
     );
   }
 
+  // Push notifications of changes made by anyone (Server-Sent Events).
+  // EventSource reconnects on its own and resumes from the last event id;
+  // 'reset' and 'imported' mean the list should be reloaded.
+  watchChanges(): Observable<TodoChange> {
+    return new Observable<TodoChange>(subscriber => {
+      if (typeof EventSource === 'undefined') {
+        // Server-side rendering: no change feed
+        subscriber.complete();
+        return;
+      }
+      const source = new EventSource(`${this.apiUrl}/events`);
+      const emit = (change: TodoChange) => this.zone.run(() => subscriber.next(change));
+
+      source.addEventListener('created', (e: MessageEvent) => emit({ type: 'created', todo: JSON.parse(e.data) }));
+      source.addEventListener('updated', (e: MessageEvent) => emit({ type: 'updated', todo: JSON.parse(e.data) }));
+      source.addEventListener('deleted', (e: MessageEvent) => emit({ type: 'deleted', id: JSON.parse(e.data).id }));
+      source.addEventListener('imported', () => emit({ type: 'imported' }));
+      source.addEventListener('reset', () => emit({ type: 'reset' }));
+
+      return () => source.close();
+    });
+  }
+
   private handleError(error: HttpErrorResponse): Observable<never> {
     let errorMessage = 'An unknown error occurred!';
 